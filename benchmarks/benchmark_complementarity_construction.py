@@ -0,0 +1,44 @@
+"""
+Construction time of the NLP for each MpccMode versus the horizon length,
+on the sliding mode OCP.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_complementarity_construction
+"""
+import time
+
+import casadi as ca
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import get_default_options, get_sliding_mode_ocp_description, TERMINAL_TIME
+
+N_STAGES_VALUES = [10, 25, 50]
+MPCC_MODES = [mode for mode in nosnoc.MpccMode]
+
+
+def get_construction_time(mpcc_mode, N_stages):
+    opts = get_default_options()
+    opts.mpcc_mode = mpcc_mode
+    opts.N_stages = N_stages
+    opts.terminal_time = TERMINAL_TIME
+    opts.print_level = 0
+    if mpcc_mode in [nosnoc.MpccMode.FISCHER_BURMEISTER, nosnoc.MpccMode.FISCHER_BURMEISTER_IP_AUG]:
+        opts.cross_comp_mode = nosnoc.CrossComplementarityMode.COMPLEMENT_ALL_STAGE_VALUES_WITH_EACH_OTHER
+    model, ocp = get_sliding_mode_ocp_description()
+    t = time.perf_counter()
+    problem = nosnoc.construct_problem(opts, model, ocp)
+    t_problem = time.perf_counter() - t
+    n_nodes = ca.Function('g_fun', [problem.w, problem.p], [problem.g]).n_nodes()
+    return t_problem, len(problem.lbg), n_nodes
+
+
+def run_benchmark():
+    print("mpcc_mode \t\t\t N_stages \t n_g \t g nodes \t construction time [s]")
+    for mpcc_mode in MPCC_MODES:
+        for N_stages in N_STAGES_VALUES:
+            t_problem, n_g, n_nodes = get_construction_time(mpcc_mode, N_stages)
+            print(f"{mpcc_mode.name:<30} \t {N_stages} \t\t {n_g} \t {n_nodes} \t\t {t_problem:.3f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,59 @@
+"""
+NLP size, build time and solve time of the Stewart representation with and without
+opts.eliminate_lambda, on the sliding mode OCP and on a synthetic model with 2^n_c regions.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_eliminate_lambda
+"""
+import time
+
+import numpy as np
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import get_default_options, get_sliding_mode_ocp_description, TERMINAL_TIME
+from benchmarks.benchmark_step_lifting import get_sign_model, TSIM
+
+N_C_VALUES = [3, 5]
+
+
+def get_ocp_solver(eliminate_lambda):
+    opts = get_default_options()
+    opts.pss_mode = nosnoc.PssMode.STEWART
+    opts.eliminate_lambda = eliminate_lambda
+    opts.terminal_time = TERMINAL_TIME
+    opts.print_level = 0
+    model, ocp = get_sliding_mode_ocp_description()
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+def get_sign_solver(n_c, eliminate_lambda):
+    opts = nosnoc.NosnocOpts()
+    opts.pss_mode = nosnoc.PssMode.STEWART
+    opts.eliminate_lambda = eliminate_lambda
+    opts.N_finite_elements = 4
+    opts.n_s = 2
+    opts.terminal_time = TSIM
+    opts.comp_tol = 1e-6
+    opts.print_level = 0
+    return nosnoc.NosnocSolver(opts, get_sign_model(n_c))
+
+
+def run_benchmark():
+    problems = [("sliding mode OCP", get_ocp_solver)]
+    problems += [(f"sign model n_c = {n_c}", lambda eliminate_lambda, n_c=n_c: get_sign_solver(n_c, eliminate_lambda))
+                 for n_c in N_C_VALUES]
+    print("problem \t\t eliminate_lambda \t n_w \t n_g \t build time [s] \t nlp iter \t CPU time [s] \t cost")
+    for name, get_solver in problems:
+        for eliminate_lambda in [False, True]:
+            t = time.perf_counter()
+            solver = get_solver(eliminate_lambda)
+            build_time = time.perf_counter() - t
+            results = solver.solve()
+            nlp_iter = sum(it for it in results["nlp_iter"] if it is not None)
+            print(f"{name:<20} \t {eliminate_lambda} \t\t\t {len(solver.problem.w0)} \t {len(solver.problem.lbg)} \t "
+                  f"{build_time:.3f} \t\t {nlp_iter} \t\t {sum(results['cpu_time_nlp']):.3f} \t\t "
+                  f"{np.squeeze(results['cost_val']):.4e}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
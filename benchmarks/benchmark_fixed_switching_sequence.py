@@ -0,0 +1,65 @@
+"""
+CPU time of repeated solves with perturbed initial states with and without
+opts.fixed_switching_sequence, for the car OCP with a speed dependent switch.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_fixed_switching_sequence
+"""
+import time
+
+import numpy as np
+
+import nosnoc
+from examples.simple_car_algebraics.simple_car_algebraic import car_model, get_default_options
+
+N_SOLVES = 20
+
+
+def get_solver(pss_mode, fixed_switching_sequence):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.terminal_time = 30
+    opts.N_stages = 10
+    opts.pss_mode = pss_mode
+    opts.fixed_switching_sequence = fixed_switching_sequence
+    model, ocp = car_model()
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+def run(pss_mode, fixed_switching_sequence, x0_list):
+    solver = get_solver(pss_mode, fixed_switching_sequence)
+    cost = []
+    n_fixed = 0
+    n_iter = 0
+    t = time.process_time()
+    for x0 in x0_list:
+        solver.set('x0', x0)
+        results = solver.solve()
+        cost.append(results["cost_val"])
+        n_fixed += results["fixed_switching_sequence"]
+        n_iter += sum(results["nlp_iter"])
+    return time.process_time() - t, n_iter, n_fixed, np.array(cost)
+
+
+def main():
+    rng = np.random.default_rng(1)
+    # small perturbations of the nominal state and a few large jumps, which change the sequence
+    x0_list = [np.array([0.0, 0.0])]
+    for k in range(1, N_SOLVES):
+        if k % 10 == 0:
+            x0_list.append(np.array([0.0, 20.0]) + rng.uniform(-1, 1, 2))
+        else:
+            x0_list.append(x0_list[-1] + rng.uniform(-0.5, 0.5, 2))
+
+    print("pss_mode \t fixed sequence \t CPU time [s] \t NLP iter \t fixed solves \t mean cost")
+    for pss_mode in [nosnoc.PssMode.STEWART, nosnoc.PssMode.STEP]:
+        cpu_ref, iter_ref, _, cost_ref = run(pss_mode, False, x0_list)
+        cpu, n_iter, n_fixed, cost = run(pss_mode, True, x0_list)
+        print(f"{pss_mode.name} \t False \t\t\t {cpu_ref:.3f} \t\t {iter_ref} \t\t 0 \t\t "
+              f"{np.mean(cost_ref):.4f}")
+        print(f"{pss_mode.name} \t True \t\t\t {cpu:.3f} \t\t {n_iter} \t\t {n_fixed}/{N_SOLVES} "
+              f"\t {np.mean(cost):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+IPOPT iterations and CPU time of ConstraintHandling.LEAST_SQUARES with the exact Hessian
+versus the Gauss-Newton Hessian (opts.gauss_newton_hessian), on the simplest examples
+and the sliding mode OCP.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_gauss_newton
+"""
+import time
+
+import numpy as np
+
+import nosnoc
+from examples.simplest.simplest_example import get_default_options, get_simplest_model_switch, get_simplest_model_sliding
+from examples.sliding_mode_ocp.sliding_mode_ocp import get_sliding_mode_ocp_description, TERMINAL_TIME
+from examples.sliding_mode_ocp.sliding_mode_ocp import get_default_options as get_ocp_options
+
+
+def set_least_squares_options(opts, gauss_newton_hessian):
+    opts.constraint_handling = nosnoc.ConstraintHandling.LEAST_SQUARES
+    opts.gauss_newton_hessian = gauss_newton_hessian
+    opts.cross_comp_mode = nosnoc.CrossComplementarityMode.COMPLEMENT_ALL_STAGE_VALUES_WITH_EACH_OTHER
+    opts.mpcc_mode = nosnoc.MpccMode.FISCHER_BURMEISTER_IP_AUG
+    opts.step_equilibration = nosnoc.StepEquilibrationMode.DIRECT_COMPLEMENTARITY
+    opts.initialization_strategy = nosnoc.InitializationStrategy.ALL_XCURRENT_W0_START
+    opts.sigma_0 = 1e0
+    opts.gamma_h = np.inf
+    opts.print_level = 0
+    return opts
+
+
+def get_simplest_solver(get_model, gauss_newton_hessian):
+    opts = set_least_squares_options(get_default_options(), gauss_newton_hessian)
+    opts.terminal_time = np.pi / 4
+    return nosnoc.NosnocSolver(opts, get_model())
+
+
+def get_ocp_solver(gauss_newton_hessian):
+    opts = set_least_squares_options(get_ocp_options(), gauss_newton_hessian)
+    opts.terminal_time = TERMINAL_TIME
+    model, ocp = get_sliding_mode_ocp_description()
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+def run_benchmark():
+    problems = [
+        ("simplest switch", lambda gn: get_simplest_solver(get_simplest_model_switch, gn)),
+        ("simplest sliding", lambda gn: get_simplest_solver(get_simplest_model_sliding, gn)),
+        ("sliding mode OCP", get_ocp_solver),
+    ]
+    print("problem \t\t Gauss-Newton \t build time [s] \t nlp iter \t CPU time [s] \t complementarity \t status")
+    for name, get_solver in problems:
+        for gauss_newton_hessian in [False, True]:
+            t = time.perf_counter()
+            try:
+                solver = get_solver(gauss_newton_hessian)
+            except Exception as err:
+                print(f"{name:<20} \t {gauss_newton_hessian} \t\t not applicable: {err}")
+                continue
+            build_time = time.perf_counter() - t
+            results = solver.solve()
+            nlp_iter = sum(it for it in results["nlp_iter"] if it is not None)
+            cpu_time = sum(t for t in results["cpu_time_nlp"] if t is not None)
+            comp_res = float(solver.problem.comp_res(results["w_sol"], solver.p_val))
+            print(f"{name:<20} \t {gauss_newton_hessian} \t\t {build_time:.3f} \t\t {nlp_iter} \t\t "
+                  f"{cpu_time:.3f} \t\t {comp_res:.2e} \t\t {results['status']}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,77 @@
+"""
+IPOPT iterations (corrector steps) and CPU time of the homotopy loop with and without
+opts.homotopy_predictor.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_homotopy_predictor
+"""
+import time
+
+import nosnoc
+from examples.simplest.simplest_example import (
+    get_default_options as get_simplest_options,
+    get_simplest_model_sliding,
+    get_simplest_model_switch,
+)
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options as get_sliding_mode_options,
+    TERMINAL_TIME,
+)
+from examples.simple_car_algebraics.simple_car_algebraic import (
+    car_model,
+    get_default_options as get_car_options,
+)
+
+
+def get_simplest_sliding():
+    return get_simplest_options(), get_simplest_model_sliding(), None
+
+
+def get_simplest_switch():
+    return get_simplest_options(), get_simplest_model_switch(), None
+
+
+def get_sliding_mode_ocp():
+    opts = get_sliding_mode_options()
+    opts.terminal_time = TERMINAL_TIME
+    return (opts, *get_sliding_mode_ocp_description())
+
+
+def get_car_ocp():
+    opts = get_car_options()
+    opts.terminal_time = 30
+    return (opts, *car_model())
+
+
+PROBLEMS = {
+    "simplest_sliding": get_simplest_sliding,
+    "simplest_switch": get_simplest_switch,
+    "sliding_mode_ocp": get_sliding_mode_ocp,
+    "car_ocp": get_car_ocp,
+}
+MPCC_MODES = [nosnoc.MpccMode.SCHOLTES_INEQ, nosnoc.MpccMode.SCHOLTES_EQ]
+
+
+def main():
+    print("problem \t\t mpcc_mode \t predictor \t NLP iter \t CPU time [s] \t predictor time [s] \t cost")
+    for name, get_problem in PROBLEMS.items():
+        for mpcc_mode in MPCC_MODES:
+            for homotopy_predictor in [False, True]:
+                opts, model, ocp = get_problem()
+                opts.print_level = 0
+                opts.mpcc_mode = mpcc_mode
+                opts.homotopy_predictor = homotopy_predictor
+                solver = nosnoc.NosnocSolver(opts, model, ocp)
+                t = time.process_time()
+                results = solver.solve()
+                cpu_time = time.process_time() - t
+                n_iter = sum(i for i in results["nlp_iter"] if i is not None)
+                cpu_time_predictor = sum(
+                    t for t in results.get("cpu_time_predictor", []) if t is not None)
+                print(f"{name:16s} \t {mpcc_mode.name} \t {homotopy_predictor} \t\t {n_iter} \t\t "
+                      f"{cpu_time:.3f} \t\t {cpu_time_predictor:.3f} \t\t\t {results['cost_val']:.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+IPOPT iterations, skipped homotopy iterations and CPU time of a sequence of solves with slowly
+changing initial states, warm started with InitializationStrategy.ALL_XCURRENT_WOPT_PREV,
+with and without opts.homotopy_warm_start.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_homotopy_warm_start
+"""
+import time
+
+import numpy as np
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options as get_sliding_mode_options,
+    TERMINAL_TIME,
+)
+from examples.simple_car_algebraics.simple_car_algebraic import (
+    car_model,
+    get_default_options as get_car_options,
+)
+
+N_SOLVES = 10
+
+
+def get_sliding_mode_ocp():
+    opts = get_sliding_mode_options()
+    opts.terminal_time = TERMINAL_TIME
+    return (opts, *get_sliding_mode_ocp_description(), np.array([0.01, 0.01, 0.0, 0.0]))
+
+
+def get_car_ocp():
+    opts = get_car_options()
+    opts.terminal_time = 30
+    return (opts, *car_model(), np.array([0.1, 0.0]))
+
+
+PROBLEMS = {
+    "sliding_mode_ocp": get_sliding_mode_ocp,
+    "car_ocp": get_car_ocp,
+}
+
+
+def main():
+    print("problem \t\t warm start \t NLP iter \t skipped \t CPU time [s] \t mean cost")
+    for name, get_problem in PROBLEMS.items():
+        for homotopy_warm_start in [False, True]:
+            opts, model, ocp, delta_x0 = get_problem()
+            opts.print_level = 0
+            opts.homotopy_warm_start = homotopy_warm_start
+            opts.initialization_strategy = nosnoc.InitializationStrategy.ALL_XCURRENT_WOPT_PREV
+            solver = nosnoc.NosnocSolver(opts, model, ocp)
+            x0 = model.x0.copy()
+            n_iter = 0
+            n_skipped = 0
+            cost = []
+            t = time.process_time()
+            for k in range(N_SOLVES):
+                solver.set('x0', x0 + k * delta_x0)
+                results = solver.solve()
+                n_iter += sum(i for i in results["nlp_iter"] if i is not None)
+                n_skipped += results.get("homotopy_iter_skipped", 0)
+                cost.append(results["cost_val"])
+            cpu_time = time.process_time() - t
+            print(f"{name:16s} \t {homotopy_warm_start} \t\t {n_iter} \t\t {n_skipped} \t\t "
+                  f"{cpu_time:.3f} \t\t {np.mean(cost):.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+IPOPT iterations, homotopy iterations and CPU time of the relaxation modes SCHOLTES_INEQ and
+ELASTIC_INEQ compared to the exact penalty MpccMode.L1_PENALTY, each with
+opts.set_recommended_homotopy_schedule().
+
+Run from the repository root:
+    python -m benchmarks.benchmark_l1_penalty
+"""
+import time
+
+import nosnoc
+from benchmarks.benchmark_homotopy_predictor import PROBLEMS
+
+MPCC_MODES = [nosnoc.MpccMode.SCHOLTES_INEQ, nosnoc.MpccMode.ELASTIC_INEQ, nosnoc.MpccMode.L1_PENALTY]
+
+
+def main():
+    print("problem \t\t mpcc_mode \t homotopy iter \t NLP iter \t CPU time [s] \t cost")
+    for name, get_problem in PROBLEMS.items():
+        for mpcc_mode in MPCC_MODES:
+            opts, model, ocp = get_problem()
+            opts.print_level = 0
+            opts.mpcc_mode = mpcc_mode
+            opts.set_recommended_homotopy_schedule()
+            solver = nosnoc.NosnocSolver(opts, model, ocp)
+            t = time.process_time()
+            results = solver.solve()
+            cpu_time = time.process_time() - t
+            nlp_iter = [i for i in results["nlp_iter"] if i is not None]
+            print(f"{name:16s} \t {mpcc_mode.name} \t {len(nlp_iter)} \t\t {sum(nlp_iter)} \t\t "
+                  f"{cpu_time:.3f} \t\t {results['cost_val']:.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+NLP CPU time of the IPOPT linear solver configurations tried by nosnoc.autotune_linear_solver()
+on the sliding mode OCP, and construction of a second solver that picks up the tuned options.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_linear_solver_tuning
+"""
+import os
+import tempfile
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options,
+    TERMINAL_TIME,
+)
+
+
+def get_solver(tuning_file=None):
+    opts = get_default_options()
+    opts.terminal_time = TERMINAL_TIME
+    opts.print_level = 0
+    opts.linear_solver_tuning_file = tuning_file
+    model, ocp = get_sliding_mode_ocp_description()
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+def run_benchmark():
+    print(f"available linear solvers: {nosnoc.get_available_linear_solvers()}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file = os.path.join(tmp_dir, "linear_solver_tuning.json")
+        tuning = nosnoc.autotune_linear_solver(get_solver(), n_repeat=2, file=file)
+        print("configuration \t\t\t\t\t\t CPU time [s]")
+        for ipopt_opts, cpu_time in tuning["timings"]:
+            print(f"{str(ipopt_opts):<56} {cpu_time:.3f}")
+        print(f"fastest: {tuning['ipopt_opts']}")
+
+        solver = get_solver(file)
+        print(f"options applied on construction: {solver.tuned_ipopt_opts}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
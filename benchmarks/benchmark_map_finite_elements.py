@@ -0,0 +1,58 @@
+"""
+Time spent in the evaluation of the NLP functions (constraints, constraint Jacobian, Lagrangian Hessian)
+by IPOPT on the 50 stage hopper OCP, for the default SX formulation and the finite element constraints
+mapped with opts.map_finite_elements over 1, 2, 4 and 8 threads.
+
+The first homotopy iteration is solved with a limited number of IPOPT iterations.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_map_finite_elements
+"""
+import os
+import time
+
+import nosnoc
+from examples.hopper_robot.hopper_ocp import get_hopper_ocp_description, get_default_options
+
+N_STAGES = 50
+MAX_ITER_IPOPT = 50
+FUNCTIONS = ['nlp_g', 'nlp_jac_g', 'nlp_hess_l']
+N_THREADS_VALUES = [1, 2, 4, 8]
+
+
+def get_settings():
+    settings = [(False, 'serial', 1), (True, 'serial', 1)]
+    # thread counts above the CPU count are run as well, they oversubscribe the cores
+    settings += [(True, 'thread', n_threads) for n_threads in N_THREADS_VALUES]
+    settings += [(True, 'openmp', n_threads) for n_threads in N_THREADS_VALUES]
+    return settings
+
+
+def run_benchmark():
+    print(f"CPU count: {os.cpu_count()}")
+    print("mapped \t parallelization \t threads \t build [s] \t " + " \t ".join(f"{f} [s]" for f in FUNCTIONS) +
+          " \t total NLP [s]")
+    for map_finite_elements, parallelization, n_threads in get_settings():
+        opts = get_default_options()
+        opts.terminal_time = 5.0
+        opts.N_stages = N_STAGES
+        opts.max_iter_homotopy = 1
+        opts.opts_casadi_nlp['ipopt']['max_iter'] = MAX_ITER_IPOPT
+        opts.print_level = 0
+        opts.map_finite_elements = map_finite_elements
+        opts.parallelization = parallelization
+        opts.n_threads = n_threads
+        model, ocp, _, _, _, _ = get_hopper_ocp_description(opts, 1.0, True)
+
+        t = time.perf_counter()
+        solver = nosnoc.NosnocSolver(opts, model, ocp)
+        build_time = time.perf_counter() - t
+        solver.solve()
+        stats = solver.solver.stats()
+        t_fun = [stats.get(f't_wall_{f}', 0.0) for f in FUNCTIONS]
+        print(f"{map_finite_elements} \t {parallelization:<10} \t\t {n_threads} \t\t {build_time:.2f} \t\t " +
+              " \t\t ".join(f"{t:.3f}" for t in t_fun) + f" \t\t {stats['t_wall_total']:.3f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,54 @@
+"""
+Total CPU time and accuracy of adaptive mesh refinement, see nosnoc.solve_with_mesh_refinement(),
+compared to uniform refinement of all control stages with the same error estimate
+and tolerance, for the oscillator with and without FESD.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_mesh_refinement
+"""
+import numpy as np
+
+import nosnoc
+from examples.oscillator.oscillator_example import (
+    get_oscillator_model,
+    get_default_options,
+    TSIM,
+    X_SOL,
+)
+
+N_STAGES = 10
+# (use_fesd, tol): without FESD, the error estimate at a switch is only first order in the step size
+CASES = [(True, 1e-3), (True, 1e-4), (False, 1e-2)]
+
+
+def get_options(use_fesd: bool):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.n_s = 2
+    opts.N_stages = N_STAGES
+    opts.N_finite_elements = 2
+    opts.terminal_time = TSIM
+    opts.use_fesd = use_fesd
+    return opts
+
+
+def run_benchmark():
+    print("use_fesd \t tol \t refinement \t iterations \t sum(Nfe) \t converged \t error x(T) "
+          "\t total CPU time [s]")
+    for use_fesd, tol in CASES:
+        for uniform in [False, True]:
+            results = nosnoc.solve_with_mesh_refinement(get_options(use_fesd),
+                                                        get_oscillator_model(),
+                                                        tol=tol,
+                                                        max_refinements=8,
+                                                        max_Nfe=256,
+                                                        uniform=uniform)
+            err = np.max(np.abs(results["x_out"] - X_SOL))
+            refinement = 'uniform' if uniform else 'adaptive'
+            print(f"{use_fesd} \t\t {tol:.0e} \t {refinement} \t {len(results['mesh_refinement'])} "
+                  f"\t\t {sum(results['Nfe_list'])} \t\t {results['converged']} \t\t {err:.2e} "
+                  f"\t {results['cpu_time_total']:.3f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,119 @@
+"""
+IPOPT iterations, homotopy iterations and CPU time per MpccMode relaxation on the bundled
+simulation and OCP examples, each with opts.set_recommended_homotopy_schedule().
+STEFFENSEN_ULBRICH has no recommended schedule, it uses STEFFENSEN_ULBRICH_SCHEDULE.
+Simulations report the deviation of the final state from the SCHOLTES_INEQ simulation, OCPs
+report the optimal cost.
+
+The oscillator uses StepEquilibrationMode.HEURISTIC_MEAN instead of DIRECT_COMPLEMENTARITY,
+which is not implemented with KANZOW_SCHWARTZ and STEFFENSEN_ULBRICH.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_mpcc_relaxations
+"""
+import time
+
+import numpy as np
+
+import nosnoc
+from benchmarks.benchmark_homotopy_predictor import PROBLEMS as OCP_PROBLEMS
+from examples.oscillator.oscillator_example import (
+    get_oscillator_model,
+    get_default_options as get_oscillator_options,
+    TSIM as TSIM_OSCILLATOR,
+)
+from examples.relay.relay_feedback_system import (
+    get_relay_feedback_system_model,
+    get_default_options as get_relay_options,
+)
+from examples.Acary2014.irma import (
+    get_irma_model,
+    get_default_options as get_irma_options,
+    TSIM as TSIM_IRMA,
+)
+
+MPCC_MODES = [
+    nosnoc.MpccMode.SCHOLTES_INEQ,
+    nosnoc.MpccMode.KANZOW_SCHWARTZ,
+    nosnoc.MpccMode.STEFFENSEN_ULBRICH,
+]
+# (sigma_0, homotopy_update_slope), the best of the schedules tried for STEFFENSEN_ULBRICH
+STEFFENSEN_ULBRICH_SCHEDULE = (1.0, 1e-2)
+
+
+def get_oscillator_sim():
+    n_sim = 29
+    opts = get_oscillator_options()
+    opts.step_equilibration = nosnoc.StepEquilibrationMode.HEURISTIC_MEAN
+    opts.terminal_time = TSIM_OSCILLATOR / n_sim
+    return opts, get_oscillator_model(), n_sim
+
+
+def get_relay_sim():
+    # first 50 of the 200 steps of the example
+    opts = get_relay_options()
+    opts.terminal_time = 10 / 200
+    return opts, get_relay_feedback_system_model(), 50
+
+
+def get_irma_sim():
+    # first 20 of the 500 steps of the example
+    opts = get_irma_options()
+    opts.terminal_time = TSIM_IRMA / 500
+    return opts, get_irma_model(switch_on=1, lifting=True), 20
+
+
+SIM_PROBLEMS = {
+    "oscillator_sim": get_oscillator_sim,
+    "relay_sim": get_relay_sim,
+    "irma_sim": get_irma_sim,
+}
+
+
+def solve(opts, model, ocp=None, n_sim=1):
+    opts.print_level = 0
+    opts.set_recommended_homotopy_schedule()
+    if opts.mpcc_mode == nosnoc.MpccMode.STEFFENSEN_ULBRICH:
+        opts.sigma_0, opts.homotopy_update_slope = STEFFENSEN_ULBRICH_SCHEDULE
+    solver = nosnoc.NosnocSolver(opts, model, ocp)
+    x = np.array(model.x0, dtype=float)
+    n_homotopy_iter = 0
+    n_iter = 0
+    n_fail = 0
+    t = time.process_time()
+    for _ in range(n_sim):
+        solver.set('x0', x)
+        results = solver.solve()
+        nlp_iter = [i for i in results["nlp_iter"] if i is not None]
+        n_homotopy_iter += len(nlp_iter)
+        n_iter += sum(nlp_iter)
+        n_fail += results["status"] != nosnoc.Status.SUCCESS
+        x = results["x_list"][-1]
+    cpu_time = time.process_time() - t
+    return n_homotopy_iter, n_iter, n_fail, cpu_time, x, results["cost_val"]
+
+
+def main():
+    print("problem \t\t mpcc_mode \t\t homotopy iter \t NLP iter \t failures \t CPU time [s] \t "
+          "final state error / cost")
+    for name, get_problem in SIM_PROBLEMS.items():
+        x_ref = None
+        for mpcc_mode in MPCC_MODES:
+            opts, model, n_sim = get_problem()
+            opts.mpcc_mode = mpcc_mode
+            n_homotopy_iter, n_iter, n_fail, cpu_time, x, _ = solve(opts, model, n_sim=n_sim)
+            if x_ref is None:
+                x_ref = x
+            print(f"{name:16s} \t {mpcc_mode.name:18s} \t {n_homotopy_iter} \t\t {n_iter} \t\t "
+                  f"{n_fail} \t\t {cpu_time:.3f} \t\t {np.max(np.abs(x - x_ref)):.1e}")
+    for name, get_problem in OCP_PROBLEMS.items():
+        for mpcc_mode in MPCC_MODES:
+            opts, model, ocp = get_problem()
+            opts.mpcc_mode = mpcc_mode
+            n_homotopy_iter, n_iter, n_fail, cpu_time, _, cost = solve(opts, model, ocp)
+            print(f"{name:16s} \t {mpcc_mode.name:18s} \t {n_homotopy_iter} \t\t {n_iter} \t\t "
+                  f"{n_fail} \t\t {cpu_time:.3f} \t\t {cost:.6f}")
+
+
+if __name__ == "__main__":
+    main()
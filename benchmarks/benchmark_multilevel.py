@@ -0,0 +1,71 @@
+"""
+CPU time and IPOPT iterations of a cold solve of the sliding mode OCP compared to
+nosnoc.NosnocMultilevelSolver, which first solves coarser discretizations and initializes
+the fine problem with the prolongated solution.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_multilevel
+"""
+import time
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options,
+    TERMINAL_TIME,
+)
+
+SIZES = [(12, 4), (24, 4)]  # (N_stages, N_finite_elements)
+LEVELS = {
+    "stages/2, Nfe/2": lambda opts: [
+        nosnoc.create_coarse_opts(opts, N_stages=opts.N_stages // 2,
+                                  N_finite_elements=opts.N_finite_elements // 2)
+    ],
+    "Nfe=1, n_s=1": lambda opts: [nosnoc.create_coarse_opts(opts, N_finite_elements=1, n_s=1)],
+}
+
+
+def get_options(N_stages: int, N_finite_elements: int):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.terminal_time = TERMINAL_TIME
+    opts.N_stages = N_stages
+    opts.N_finite_elements = N_finite_elements
+    return opts
+
+
+def format_levels(results: dict) -> str:
+    return ", ".join(f"{level['cpu_time']:.2f} s / {level['nlp_iter']} it"
+                     for level in results["multilevel"])
+
+
+def run_benchmark():
+    print("N_stages x Nfe \t coarse levels \t sigma_0 fine \t CPU time [s] \t IPOPT iter \t cost"
+          "\t\t per level (CPU / iter)")
+    for N_stages, N_finite_elements in SIZES:
+        opts = get_options(N_stages, N_finite_elements)
+        model, ocp = get_sliding_mode_ocp_description()
+        t = time.process_time()
+        solver = nosnoc.NosnocSolver(opts, model, ocp)
+        t_create = time.process_time() - t
+        results = solver.solve()
+        cpu_time = time.process_time() - t - t_create
+        nlp_iter = sum(n for n in results["nlp_iter"] if n is not None)
+        print(f"{N_stages} x {N_finite_elements} \t\t cold \t\t\t - \t\t {cpu_time:.3f} "
+              f"\t\t {nlp_iter} \t\t {results['cost_val']:.4f}")
+
+        for name, get_levels in LEVELS.items():
+            for sigma_0_fine in [None, 1e-6]:
+                opts_levels = get_levels(opts) + [opts]
+                model, ocp = get_sliding_mode_ocp_description()
+                solver = nosnoc.NosnocMultilevelSolver(opts_levels, model, ocp,
+                                                       sigma_0_fine=sigma_0_fine)
+                results = solver.solve()
+                nlp_iter = sum(level["nlp_iter"] for level in results["multilevel"])
+                print(f"{N_stages} x {N_finite_elements} \t\t {name} \t {sigma_0_fine} \t\t "
+                      f"{results['cpu_time_total']:.3f} \t\t {nlp_iter} "
+                      f"\t\t {results['cost_val']:.4f}\t {format_levels(results)}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
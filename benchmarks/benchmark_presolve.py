@@ -0,0 +1,68 @@
+"""
+NLP size and IPOPT CPU time per iteration with and without opts.presolve, for problems with
+fixed variables from opts.fix_active_set_fe0 and the polishing step.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_presolve
+"""
+import numpy as np
+
+import nosnoc
+from examples.simplest.simplest_example import get_default_options as get_simplest_options
+from examples.simplest.simplest_example import get_simplest_model_sliding
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options as get_sliding_mode_options,
+    TERMINAL_TIME,
+)
+
+
+def get_simplest_problem():
+    opts = get_simplest_options()
+    opts.N_finite_elements = 20
+    opts.n_s = 3
+    return opts, get_simplest_model_sliding(), None
+
+
+def get_sliding_mode_problem():
+    opts = get_sliding_mode_options()
+    opts.terminal_time = TERMINAL_TIME
+    model, ocp = get_sliding_mode_ocp_description()
+    return opts, model, ocp
+
+
+PROBLEMS = {
+    "simplest_sliding": get_simplest_problem,
+    "sliding_mode_ocp": get_sliding_mode_problem,
+}
+
+
+def run_benchmark():
+    print("problem \t\t presolve \t n_w (last NLP) \t n_g (last NLP) \t nlp iter \t CPU time / iter [ms] \t |dw|")
+    for name, get_problem in PROBLEMS.items():
+        w_ref = None
+        for presolve in [False, True]:
+            opts, model, ocp = get_problem()
+            opts.presolve = presolve
+            opts.fix_active_set_fe0 = True
+            opts.do_polishing_step = True
+            opts.print_level = 0
+            solver = nosnoc.NosnocSolver(opts, model, ocp)
+            results = solver.solve()
+            nlp_iter = sum(it for it in results["nlp_iter"] if it is not None)
+            cpu_time = sum(t for t in results["cpu_time_nlp"] if t is not None)
+            if presolve:
+                n_w = solver.solver.report["n_w_reduced"]
+                n_g = solver.solver.report["n_g_reduced"]
+                dw = np.max(np.abs(results["w_sol"] - w_ref))
+            else:
+                n_w = len(solver.problem.w0)
+                n_g = len(solver.problem.lbg)
+                w_ref = results["w_sol"]
+                dw = 0.0
+            print(f"{name:<20} \t {presolve} \t\t {n_w} \t\t\t {n_g} \t\t\t {nlp_iter} \t\t "
+                  f"{1e3 * cpu_time / nlp_iter:.3f} \t\t\t {dw:.1e}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
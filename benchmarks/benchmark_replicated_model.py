@@ -0,0 +1,99 @@
+"""
+Build time and memory of create_replicated_model() compared to the same model written replica by
+replica, for n copies of the disc pair of examples/discs_exercise/disc_switch_places.py.
+
+The clock state of the time freezing reformulation is dropped from the template, since templates
+with t_var are not supported. Every configuration is run in a fresh process, such that the peak
+resident memory (max RSS) is not affected by previous runs. The number of instructions of the NLP
+constraint function measures the size of the expression graph.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_replicated_model
+"""
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+import casadi as ca
+
+import nosnoc
+from examples.discs_exercise.disc_switch_places import get_disc_ocp
+
+N_REPLICAS_VALUES = [12, 24, 48]
+
+
+def get_template_model():
+    model = get_disc_ocp(None, 0.3, 0.2, np.array([1, 0]), np.array([-1, 0]))[0]
+    # drop the clock state
+    return nosnoc.NosnocModel(x=model.x[:8], f_x=[model.f_x[0][:8]], alpha=model.alpha, c=model.c,
+                              x0=model.x0[:8], u=model.u, z=model.z, z0=model.z0, g_z=model.g_z,
+                              name='disc_pair')
+
+
+def get_plain_model(template, n_replicas):
+    """The replicated model with the template expressions substituted for every replica."""
+    x_list, u_list, z_list, alpha_list, f_x, c, g_z = [], [], [], [], [], [], []
+    for i in range(n_replicas):
+        x_i = ca.SX.sym(f'x_{i}', template.x.shape[0])
+        u_i = ca.SX.sym(f'u_{i}', template.u.shape[0])
+        z_i = ca.SX.sym(f'z_{i}', template.z.shape[0])
+        alpha_i = ca.SX.sym(f'alpha_{i}', template.alpha[0].shape[0])
+        f_x_i, c_i, g_z_i = ca.substitute(
+            [template.f_x[0], template.c[0], template.g_z],
+            [template.x, template.u, template.z, template.alpha[0]], [x_i, u_i, z_i, alpha_i])
+        x_list.append(x_i)
+        u_list.append(u_i)
+        z_list.append(z_i)
+        alpha_list.append(alpha_i)
+        f_x.append(f_x_i)
+        c.append(c_i)
+        g_z.append(g_z_i)
+    return nosnoc.NosnocModel(x=ca.vertcat(*x_list), f_x=f_x, alpha=alpha_list, c=c,
+                              x0=np.tile(template.x0, n_replicas), u=ca.vertcat(*u_list),
+                              z=ca.vertcat(*z_list), z0=np.tile(template.z0, n_replicas),
+                              g_z=ca.vertcat(*g_z), name=f'disc_pair_plain_x{n_replicas}')
+
+
+def get_default_options():
+    opts = nosnoc.NosnocOpts()
+    opts.pss_mode = nosnoc.PssMode.STEP
+    opts.N_stages = 1
+    opts.N_finite_elements = 2
+    opts.n_s = 1
+    opts.terminal_time = 0.1
+    opts.print_level = 0
+    return opts
+
+
+def build(replicated, n_replicas):
+    t = time.perf_counter()
+    template = get_template_model()
+    if replicated:
+        model = nosnoc.create_replicated_model(template, n_replicas)
+    else:
+        model = get_plain_model(template, n_replicas)
+    model_time = time.perf_counter() - t
+    t = time.perf_counter()
+    solver = nosnoc.NosnocSolver(get_default_options(), model)
+    solver_time = time.perf_counter() - t
+    prob = solver.problem
+    n_instructions = ca.Function('g_fun', [prob.w, prob.p], [prob.g]).n_instructions()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return model_time, solver_time, n_instructions, max_rss
+
+
+def main():
+    ctx = multiprocessing.get_context("spawn")
+    print("n_replicas \t model \t\t model build [s] \t solver build [s] \t g instructions \t max RSS [MB]")
+    for n_replicas in N_REPLICAS_VALUES:
+        for replicated in [False, True]:
+            with ctx.Pool(1) as pool:
+                model_time, solver_time, n_instructions, max_rss = pool.apply(
+                    build, (replicated, n_replicas))
+            print(f"{n_replicas} \t\t {'replicated' if replicated else 'plain     '} \t "
+                  f"{model_time:.3f} \t\t\t {solver_time:.3f} \t\t\t {n_instructions} \t\t {max_rss:.0f}")
+
+
+if __name__ == "__main__":
+    main()
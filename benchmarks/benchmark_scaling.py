@@ -0,0 +1,70 @@
+"""
+IPOPT iterations, CPU time and objective with and without opts.automatic_scaling on OCP examples
+with variables of different magnitudes.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_scaling
+"""
+import numpy as np
+
+import nosnoc
+from examples.motor_with_friction.motor_with_friction_ocp import (
+    get_motor_with_friction_ocp_description,
+    get_default_options as get_motor_options,
+)
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options as get_sliding_mode_options,
+    TERMINAL_TIME as SLIDING_MODE_TERMINAL_TIME,
+)
+from examples.cart_pole_with_friction.cart_pole_with_friction import get_cart_pole_model_and_ocp
+
+
+def get_motor_problem():
+    opts = get_motor_options()
+    opts.terminal_time = 0.08
+    model, ocp = get_motor_with_friction_ocp_description()
+    return opts, model, ocp
+
+
+def get_sliding_mode_problem():
+    opts = get_sliding_mode_options()
+    opts.terminal_time = SLIDING_MODE_TERMINAL_TIME
+    model, ocp = get_sliding_mode_ocp_description()
+    return opts, model, ocp
+
+
+def get_cart_pole_problem():
+    opts = nosnoc.NosnocOpts()
+    opts.n_s = 2
+    opts.N_stages = 20
+    opts.N_finite_elements = 2
+    opts.terminal_time = 5.0
+    model, ocp = get_cart_pole_model_and_ocp()
+    return opts, model, ocp
+
+
+PROBLEMS = {
+    "motor_with_friction": get_motor_problem,
+    "sliding_mode_ocp": get_sliding_mode_problem,
+    "cart_pole": get_cart_pole_problem,
+}
+
+
+def run_benchmark():
+    print("problem \t\t scaling \t nlp iter \t CPU time [s] \t cost \t\t status")
+    for name, get_problem in PROBLEMS.items():
+        for automatic_scaling in [False, True]:
+            opts, model, ocp = get_problem()
+            opts.automatic_scaling = automatic_scaling
+            opts.print_level = 0
+            solver = nosnoc.NosnocSolver(opts, model, ocp)
+            results = solver.solve()
+            nlp_iter = sum(it for it in results["nlp_iter"] if it is not None)
+            cpu_time = sum(results["cpu_time_nlp"])
+            print(f"{name:<20} \t {automatic_scaling} \t\t {nlp_iter} \t\t {cpu_time:.3f} \t\t "
+                  f"{results['cost_val']:.4e} \t {results['status'].name}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
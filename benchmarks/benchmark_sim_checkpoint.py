@@ -0,0 +1,58 @@
+"""
+Overhead of NosnocSimLooper checkpointing on the oscillator example.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_sim_checkpoint
+"""
+import tempfile
+import time
+
+import numpy as np
+
+import nosnoc
+from examples.oscillator.oscillator_example import get_oscillator_model, get_default_options, TSIM
+
+NSIM = 29
+CHECKPOINT_EVERY_VALUES = [None, 10, 1]
+N_REPEAT = 3
+
+
+def run_looper(checkpoint_every):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.terminal_time = TSIM / NSIM
+    model = get_oscillator_model()
+    solver = nosnoc.NosnocSolver(opts, model)
+
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        if checkpoint_every is None:
+            looper = nosnoc.NosnocSimLooper(solver, model.x0, NSIM, print_level=0)
+        else:
+            looper = nosnoc.NosnocSimLooper(solver, model.x0, NSIM, print_level=0,
+                                            checkpoint_dir=checkpoint_dir,
+                                            checkpoint_every=checkpoint_every)
+        t = time.perf_counter()
+        looper.run()
+        cpu_time = time.perf_counter() - t
+    return cpu_time
+
+
+def run_benchmark():
+    timings = {}
+    for checkpoint_every in CHECKPOINT_EVERY_VALUES:
+        timings[checkpoint_every] = np.min([run_looper(checkpoint_every) for _ in range(N_REPEAT)])
+
+    t_ref = timings[None]
+    print("checkpoint_every \t wall time [s] \t overhead [%] \t per checkpoint [ms]")
+    for checkpoint_every, cpu_time in timings.items():
+        if checkpoint_every is None:
+            print(f"none \t\t\t {cpu_time:.3f}")
+            continue
+        n_checkpoints = int(np.ceil(NSIM / checkpoint_every))
+        overhead = cpu_time - t_ref
+        print(f"{checkpoint_every} \t\t\t {cpu_time:.3f} \t\t {100 * overhead / t_ref:.1f} \t\t"
+              f" {1e3 * overhead / n_checkpoints:.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
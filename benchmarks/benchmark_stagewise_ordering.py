@@ -0,0 +1,83 @@
+"""
+Fill-in and factorization time of the KKT matrix without fill-reducing reordering and IPOPT CPU time,
+for the default and the stage-wise ordering (opts.stagewise_ordering) of variables and constraints.
+
+The KKT matrix [H + I, J^T; J, -delta I] is evaluated at the initial guess and factorized with SuperLU.
+For the stage-wise ordering, the rows and columns of the KKT matrix are interleaved per stage using
+stage_boundaries_w and stage_boundaries_g, i.e. (w_0, g_0, w_1, g_1, ...) as in structure exploiting solvers.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_stagewise_ordering
+"""
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg
+import casadi as ca
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options,
+    TERMINAL_TIME,
+)
+
+N_STAGES_VALUES = [10, 20, 40]
+DELTA = 1e-8
+
+
+def get_solver(N_stages: int, stagewise_ordering: bool):
+    opts = get_default_options()
+    opts.terminal_time = TERMINAL_TIME
+    opts.N_stages = N_stages
+    opts.stagewise_ordering = stagewise_ordering
+    opts.print_level = 0
+    model, ocp = get_sliding_mode_ocp_description()
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+def get_kkt_matrix(solver) -> sp.csc_matrix:
+    prob = solver.problem
+    solver.compute_lambda00()
+    solver.setup_p_val(solver.opts.sigma_0, solver.opts.sigma_0)
+    lam_g = ca.SX.sym('lam_g', prob.g.shape[0])
+    hess, _ = ca.hessian(prob.cost + ca.dot(lam_g, prob.g), prob.w)
+    kkt_fun = ca.Function('kkt_fun', [prob.w, prob.p, lam_g], [hess, ca.jacobian(prob.g, prob.w)])
+    H, J = kkt_fun(prob.w0, solver.p_val, np.ones(prob.g.shape[0]))
+    H = H.sparse() + sp.eye(H.shape[0])
+    J = J.sparse()
+    return sp.bmat([[H, J.T], [J, -DELTA * sp.eye(J.shape[0])]], format='csc')
+
+
+def get_interleaved_permutation(prob) -> np.ndarray:
+    n_w = prob.w.shape[0]
+    bw = np.concatenate(([0], prob.stage_boundaries_w[:-1], [n_w]))
+    bg = np.concatenate(([0], prob.stage_boundaries_g[:-1], [prob.g.shape[0]]))
+    perm = []
+    for k in range(len(bw) - 1):
+        perm += list(range(bw[k], bw[k + 1]))
+        perm += list(range(n_w + bg[k], n_w + bg[k + 1]))
+    return np.array(perm)
+
+
+def run_benchmark():
+    print("N_stages \t ordering \t nnz(KKT) \t nnz(L+U) \t factorization [ms] \t IPOPT CPU time [s]")
+    for N_stages in N_STAGES_VALUES:
+        for stagewise_ordering in [False, True]:
+            solver = get_solver(N_stages, stagewise_ordering)
+            K = get_kkt_matrix(solver)
+            if stagewise_ordering:
+                perm = get_interleaved_permutation(solver.problem)
+                K = K[perm, :][:, perm]
+            t = time.perf_counter()
+            lu = scipy.sparse.linalg.splu(K, permc_spec='NATURAL', diag_pivot_thresh=0.0)
+            t_fact = time.perf_counter() - t
+            results = solver.solve()
+            cpu_time = sum(results["cpu_time_nlp"])
+            print(f"{N_stages} \t\t {'stagewise' if stagewise_ordering else 'default'} \t {K.nnz} \t\t "
+                  f"{lu.L.nnz + lu.U.nnz} \t\t {1e3 * t_fact:.2f} \t\t\t {cpu_time:.3f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,68 @@
+"""
+Build time, NLP size and IPOPT iterations of the Step representation for a synthetic model with
+n_c switching functions and all 2^n_c regions, comparing dense and sparse S and different
+depths of the multi-affine term lifting (opts.n_depth_step_lifting).
+
+The dynamics are dx_i/dt = -sign(x_i) + 0.5, such that every state ends up in a sliding mode on x_i = 0.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_step_lifting
+"""
+import itertools
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import casadi as ca
+
+import nosnoc
+
+N_C_VALUES = [3, 5, 7]
+DEPTH_VALUES = [0, 2, 3]
+TSIM = 1.0
+
+
+def get_sign_model(n_c: int, sparse_S: bool = False):
+    x = ca.SX.sym('x', n_c)
+    S = np.array(list(itertools.product([1, -1], repeat=n_c)), dtype=float)
+    F = -S.T + 0.5
+    X0 = np.linspace(-0.4, 0.8, n_c)
+    if sparse_S:
+        S = sp.csr_matrix(S)
+    return nosnoc.NosnocModel(x=x, F=[F], c=[x], S=[S], x0=X0, name=f'sign_{n_c}')
+
+
+def get_default_options(n_depth: int):
+    opts = nosnoc.NosnocOpts()
+    opts.pss_mode = nosnoc.PssMode.STEP
+    opts.n_depth_step_lifting = n_depth
+    opts.N_finite_elements = 4
+    opts.n_s = 2
+    opts.terminal_time = TSIM
+    opts.comp_tol = 1e-6
+    opts.print_level = 0
+    return opts
+
+
+def run_benchmark():
+    print("n_c \t S \t depth \t n_w \t build time [s] \t nlp iter \t CPU time [s] \t |x_end|_inf")
+    for n_c in N_C_VALUES:
+        for sparse_S in [False, True]:
+            for n_depth in DEPTH_VALUES:
+                opts = get_default_options(n_depth)
+                t = time.perf_counter()
+                model = get_sign_model(n_c, sparse_S)
+                solver = nosnoc.NosnocSolver(opts, model)
+                build_time = time.perf_counter() - t
+
+                results = solver.solve()
+                nlp_iter = sum(it for it in results["nlp_iter"] if it is not None)
+                cpu_time = sum(results["cpu_time_nlp"])
+                x_end = results["x_traj"][-1]
+                print(f"{n_c} \t {'sparse' if sparse_S else 'dense'} \t {n_depth} \t "
+                      f"{len(solver.problem.w0)} \t {build_time:.3f} \t\t {nlp_iter} \t\t "
+                      f"{cpu_time:.3f} \t\t {np.max(np.abs(x_end)):.2e}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
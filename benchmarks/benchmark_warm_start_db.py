@@ -0,0 +1,65 @@
+"""
+IPOPT iteration savings of InitializationStrategy.WARM_START_DATABASE on the sliding mode OCP,
+solved for initial states from a recurring operating envelope around X0.
+
+Run from the repository root:
+    python -m benchmarks.benchmark_warm_start_db
+"""
+import time
+
+import numpy as np
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import get_default_options, get_sliding_mode_ocp_description, X0, TERMINAL_TIME
+
+N_TRAIN = 20
+N_TEST = 10
+PERTURBATION = 0.1
+STRATEGIES = [
+    nosnoc.InitializationStrategy.ALL_XCURRENT_W0_START,
+    nosnoc.InitializationStrategy.WARM_START_DATABASE,
+]
+
+
+def get_solver(initialization_strategy):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.terminal_time = TERMINAL_TIME
+    opts.comp_tol = 1e-6
+    opts.initialization_strategy = initialization_strategy
+    model, ocp = get_sliding_mode_ocp_description()
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+def sample_x0(rng, n):
+    return [X0 + PERTURBATION * rng.uniform(-1, 1, X0.shape) for _ in range(n)]
+
+
+def run_benchmark():
+    rng = np.random.default_rng(0)
+    x0_train = sample_x0(rng, N_TRAIN)
+    x0_test = sample_x0(rng, N_TEST)
+
+    print("strategy \t\t\t nlp iter (mean) \t homotopy iter (mean) \t CPU time [s]")
+    for strategy in STRATEGIES:
+        solver = get_solver(strategy)
+        for x0 in x0_train:
+            solver.set("x0", x0)
+            solver.solve()
+
+        nlp_iter = []
+        homotopy_iter = []
+        t = time.perf_counter()
+        for x0 in x0_test:
+            solver.set("x0", x0)
+            results = solver.solve()
+            iters = [it for it in results["nlp_iter"] if it is not None]
+            nlp_iter.append(sum(iters))
+            homotopy_iter.append(len(iters))
+        cpu_time = time.perf_counter() - t
+        print(f"{strategy.name:<30} \t {np.mean(nlp_iter):.1f} \t\t\t {np.mean(homotopy_iter):.1f}"
+              f" \t\t\t {cpu_time:.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
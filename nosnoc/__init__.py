@@ -1,11 +1,14 @@
 from .auto_model import NosnocAutoModel
 from .solver import NosnocSolver, get_results_from_primal_vector, construct_problem
 from .problem import NosnocProblem
-from .model import NosnocModel
+from .model import NosnocModel, create_replicated_model
 from .ocp import NosnocOcp
-from .nosnoc_opts import NosnocOpts
+from .nosnoc_opts import NosnocOpts, RECOMMENDED_HOMOTOPY_SCHEDULES
 from .nosnoc_types import MpccMode, IrkSchemes, StepEquilibrationMode, CrossComplementarityMode, IrkRepresentation, PssMode, IrkRepresentation, HomotopyUpdateRule, InitializationStrategy, ConstraintHandling, Status, SpeedOfTimeVariableMode
-from .helpers import NosnocSimLooper
+from .linear_solver_tuning import autotune_linear_solver, get_available_linear_solvers, LinearSolverTuningCache
+from .multilevel import NosnocMultilevelSolver, create_coarse_opts, prolongate_solution
+from .mesh_refinement import solve_with_mesh_refinement, estimate_stage_errors
+from .helpers import NosnocSimLooper, NosnocMpcLooper
 from .utils import casadi_length, casadi_vertcat_list, print_casadi_vector, flatten_layer, make_object_json_dumpable
 from .plot_utils import plot_timings, plot_iterates, latexify_plot
 from .rk_utils import rk4, generate_butcher_tableu_integral, generate_butcher_tableu
@@ -14,3 +14,4 @@ class NosnocDims:
     n_p_glob: int
     n_c_sys: list
     n_f_sys: list
+    n_beta: int = 0  #: number of lifting variables of the Step representation
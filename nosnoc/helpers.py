@@ -1,19 +1,32 @@
-from typing import Optional
+from typing import Optional, Iterator, Union, Callable
+import os
+import pickle
+import tempfile
+import time
 
 import numpy as np
 from .solver import NosnocSolver
-from .nosnoc_types import SpeedOfTimeVariableMode
+from .nosnoc_types import SpeedOfTimeVariableMode, Status, InitializationStrategy
+
+
+CHECKPOINT_FILENAME = "nosnoc_sim_looper_checkpoint.pickle"
 
 
 class NosnocSimLooper:
 
+    # state needed to continue a simulation from a checkpoint,
+    # the accumulated results are restored by replaying the checkpointed steps.
+    _checkpoint_state_attributes = ["sim_step", "xcurrent", "t_current"]
+
     def __init__(self,
                  solver: NosnocSolver,
                  x0: np.ndarray,
                  Nsim: int,
                  p_values: Optional[np.ndarray] = None,
                  w_init: Optional[list] = None,
-                 print_level: Optional[int] = None
+                 print_level: Optional[int] = None,
+                 checkpoint_dir: Optional[str] = None,
+                 checkpoint_every: int = 1
                 ):
         """
         :param solver: NosnocSolver to be called in a loop
@@ -21,6 +34,8 @@ class NosnocSimLooper:
         :param Nsim: int: number of simulation steps
         :param p_values: Optional np.ndarray of shape (Nsim, n_p_glob), parameter values p_glob are updated at each simulation step accordingly.
         :param w_init: Optional: a list of np.ndarray with w values to initialize the solver at each step.
+        :param checkpoint_dir: Optional: local directory in which the progress of run() is checkpointed, see load_checkpoint().
+        :param checkpoint_every: int: number of simulation steps between two checkpoints, the steps in between are buffered in memory.
         """
         # check that NosnocSolver solves a pure simulation problem.
         if not solver.problem.is_sim_problem():
@@ -37,7 +52,12 @@ class NosnocSimLooper:
         self.solver: NosnocSolver = solver
         self.Nsim = Nsim
 
+        # state needed to continue the simulation
         self.xcurrent = x0
+        self.t_current = 0.0
+        self.sim_step = 0
+
+        # accumulated results, only filled by run()
         self.X_sim = [x0]
         self.time_steps = np.array([])
         self.theta_sim = []
@@ -58,9 +78,33 @@ class NosnocSimLooper:
 
         self.cpu_nlp = np.zeros((Nsim, solver.opts.max_iter_homotopy + (1 if solver.opts.do_polishing_step else 0)))
 
-    def run(self, stop_on_failure=False) -> None:
-        """Run the simulation loop."""
-        for i in range(self.Nsim):
+        # checkpointing
+        if checkpoint_every < 1:
+            raise ValueError(f"checkpoint_every should be >= 1, got {checkpoint_every}")
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        # steps collected by run() that are not yet written to the checkpoint
+        self._checkpoint_pending = []
+        # whether the checkpoint file belongs to this simulation, otherwise it is overwritten on the first save.
+        self._checkpoint_started = False
+        if checkpoint_dir is not None:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def iter_steps(self) -> Iterator[dict]:
+        """
+        Generator over the remaining simulation steps.
+
+        Yields the results of each step as soon as it is solved.
+        The looper itself only keeps the state needed to continue the simulation,
+        i.e. the current state, time and step index, such that memory usage is independent of Nsim.
+        Breaking out of the loop and calling iter_steps() again continues where the simulation stopped.
+        No checkpoints are written, since a checkpoint has to contain the accumulated results,
+        use run() for checkpointed simulations.
+
+        :return: Iterator over dicts with the results of a single simulation step.
+        """
+        while self.sim_step < self.Nsim:
+            i = self.sim_step
             # set values
             self.solver.set("x0", self.xcurrent)
             if self.w_init is not None:
@@ -70,30 +114,160 @@ class NosnocSimLooper:
             # solve
             results = self.solver.solve()
 
-            # add previous time to switch times
-            if results["switch_times"].size > 0:
-                switch_times_sim = results["switch_times"] + np.sum(self.time_steps)
-                self.switch_times += switch_times_sim.tolist()
-
-            # collect
-            self.X_sim += results["x_list"]
-            self.xcurrent = self.X_sim[-1]
-            self.cpu_nlp[i, :] = results["cpu_time_nlp"]
-            self.time_steps = np.concatenate((self.time_steps, results["time_steps"]))
-            self.theta_sim.append(results["theta_list"])
-            self.lambda_sim.append(results["lambda_list"])
-            self.alpha_sim.append(results["alpha_list"])
-            self.z_sim.append(results["z_list"])
-            self.w_sim += [results["w_sol"]]
-            self.w_all += [results["w_all"]]
-            self.cost_vals.append(results["cost_val"])
-            self.status.append(results["status"])
+            step = {
+                "sim_step": i,
+                "t_start": self.t_current,
+                "x_list": results["x_list"],
+                "time_steps": results["time_steps"],
+                # add previous time to switch times
+                "switch_times": results["switch_times"] + self.t_current,
+                "cpu_time_nlp": results["cpu_time_nlp"],
+                "theta_list": results["theta_list"],
+                "lambda_list": results["lambda_list"],
+                "alpha_list": results["alpha_list"],
+                "z_list": results["z_list"],
+                "w_sol": results["w_sol"],
+                "w_all": results["w_all"],
+                "cost_val": results["cost_val"],
+                "status": results["status"],
+            }
             if self.solver.opts.speed_of_time_variables != SpeedOfTimeVariableMode.NONE:
-                self.sot.append(results["sot"])
+                step["sot"] = results["sot"]
+
+            # update state
+            self.xcurrent = results["x_list"][-1]
+            self.t_current += np.sum(results["time_steps"])
+            self.sim_step += 1
+
             if self.print_level > 0:
                 print(f"Sim step {i + 1}/{self.Nsim}\t status: {results['status']}")
 
-            if (stop_on_failure and results["status"] == "Infeasible_Problem_Detected"):
+            yield step
+
+    @property
+    def checkpoint_file(self) -> Optional[str]:
+        if self.checkpoint_dir is None:
+            return None
+        return os.path.join(self.checkpoint_dir, CHECKPOINT_FILENAME)
+
+    def save_checkpoint(self) -> None:
+        """
+        Write the simulation progress to checkpoint_dir.
+
+        The checkpoint is an append-only log: a header identifying the problem,
+        followed by one record per save with the steps collected by run() since the previous save,
+        the current state and the warm start w0 and parameter values of the solver.
+        Thus, the cost of a save is independent of the number of steps simulated so far.
+        """
+        if self.checkpoint_dir is None:
+            raise ValueError("save_checkpoint requires a checkpoint_dir.")
+        record = {key: getattr(self, key) for key in self._checkpoint_state_attributes}
+        record["steps"] = self._checkpoint_pending
+        record["w0"] = self.solver.problem.w0
+        record["p_val_ctrl_stages"] = self.solver.problem.model.p_val_ctrl_stages
+
+        if self._checkpoint_started:
+            # an interrupted append leaves an incomplete last record, which is discarded by load_checkpoint().
+            with open(self.checkpoint_file, "ab") as f:
+                pickle.dump(record, f)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            header = {"Nsim": self.Nsim, "fingerprint": self.solver.problem.get_fingerprint()}
+            # write to temporary file first, such that an interruption never leaves a corrupt checkpoint.
+            fd, tmp_file = tempfile.mkstemp(dir=self.checkpoint_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(header, f)
+                    pickle.dump(record, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.checkpoint_file)
+            except BaseException:
+                if os.path.exists(tmp_file):
+                    os.remove(tmp_file)
+                raise
+            self._checkpoint_started = True
+        self._checkpoint_pending = []
+
+    def load_checkpoint(self) -> bool:
+        """
+        Restore the simulation progress from checkpoint_dir, if a checkpoint exists.
+        Calling run() or iter_steps() afterwards continues with the step following the checkpoint.
+
+        :return: True if a checkpoint was loaded, False otherwise.
+        """
+        if self.checkpoint_file is None or not os.path.exists(self.checkpoint_file):
+            return False
+        if self.sim_step != 0:
+            raise ValueError("load_checkpoint has to be called before the simulation is started.")
+        records = []
+        with open(self.checkpoint_file, "rb") as f:
+            header = pickle.load(f)
+            if header["Nsim"] != self.Nsim:
+                raise ValueError(f"Checkpoint was created with Nsim = {header['Nsim']}, got {self.Nsim}.")
+            if header["fingerprint"] != self.solver.problem.get_fingerprint():
+                raise ValueError("Checkpoint was created for a different problem.")
+            end_valid = f.tell()
+            while True:
+                try:
+                    records.append(pickle.load(f))
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                end_valid = f.tell()
+        # remove an incomplete last record, such that further records are appended to a valid log.
+        if os.path.getsize(self.checkpoint_file) > end_valid:
+            with open(self.checkpoint_file, "r+b") as f:
+                f.truncate(end_valid)
+        self._checkpoint_started = True
+        if not records:
+            return False
+
+        for record in records:
+            for step in record["steps"]:
+                self._collect_step(step)
+        record = records[-1]
+        for key in self._checkpoint_state_attributes:
+            setattr(self, key, record[key])
+        self.solver.problem.w0 = record["w0"]
+        self.solver.problem.model.p_val_ctrl_stages = record["p_val_ctrl_stages"]
+        if self.print_level > 0:
+            print(f"Loaded checkpoint at sim step {self.sim_step}/{self.Nsim}")
+        return True
+
+    def _collect_step(self, step: dict) -> None:
+        i = step["sim_step"]
+        self.switch_times += step["switch_times"].tolist()
+        self.X_sim += step["x_list"]
+        self.cpu_nlp[i, :] = step["cpu_time_nlp"]
+        self.time_steps = np.concatenate((self.time_steps, step["time_steps"]))
+        self.theta_sim.append(step["theta_list"])
+        self.lambda_sim.append(step["lambda_list"])
+        self.alpha_sim.append(step["alpha_list"])
+        self.z_sim.append(step["z_list"])
+        self.w_sim += [step["w_sol"]]
+        self.w_all += [step["w_all"]]
+        self.cost_vals.append(step["cost_val"])
+        self.status.append(step["status"])
+        if "sot" in step:
+            self.sot.append(step["sot"])
+
+    def run(self, stop_on_failure=False) -> None:
+        """
+        Run the simulation loop.
+        If a checkpoint_dir is given, a checkpoint is written every checkpoint_every steps.
+        """
+        for step in self.iter_steps():
+            # collect
+            self._collect_step(step)
+            failed = stop_on_failure and step["status"] == Status.INFEASIBLE
+
+            if self.checkpoint_dir is not None:
+                self._checkpoint_pending.append(step)
+                if failed or self.sim_step % self.checkpoint_every == 0 or self.sim_step == self.Nsim:
+                    self.save_checkpoint()
+
+            if failed:
                 return False
 
         return True
@@ -117,3 +291,195 @@ class NosnocSimLooper:
             "switch_times": self.switch_times,
         }
         return results
+
+
+class NosnocMpcLooper:
+
+    def __init__(self,
+                 controller: NosnocSolver,
+                 plant: Union[NosnocSolver, Callable],
+                 x0: np.ndarray,
+                 Nsim: int,
+                 shift_warm_start: bool = True,
+                 deadline: Optional[float] = None,
+                 preparation_callback: Optional[Callable] = None,
+                 print_level: Optional[int] = None
+                ):
+        """
+        Closed-loop MPC simulation.
+
+        At every sample, the feedback phase sets the measured state as x0 of the controller,
+        solves the OCP and applies the first control to the plant.
+        The preparation phase in between samples shifts the warm start and calls the preparation_callback.
+
+        :param controller: NosnocSolver of an OCP used as MPC controller
+        :param plant: plant simulator, either
+            - a NosnocSolver of a pure simulation problem, in which p_global are the controls (n_p_glob == n_u), or
+            - a callable (x, u) -> x_next, e.g. a smooth integrator.
+            The plant should simulate one sample time, i.e. terminal_time / N_stages of the controller.
+        :param x0: np.ndarray: initial state
+        :param Nsim: int: number of MPC samples
+        :param shift_warm_start: if True, the controller is initialized with its previous solution shifted by one control stage.
+            Requires InitializationStrategy.EXTERNAL and a uniform Nfe_list.
+        :param deadline: wall time in seconds available for the feedback phase, defaults to the sample time.
+        :param preparation_callback: Optional callable(looper) called in the preparation phase, e.g. to update parameters.
+        """
+        problem = controller.problem
+        opts = controller.opts
+        if problem.model.dims.n_u == 0:
+            raise ValueError("NosnocMpcLooper requires a controller with controls, n_u > 0.")
+
+        self.sample_time = opts.terminal_time / opts.N_stages
+        if isinstance(plant, NosnocSolver):
+            if not plant.problem.is_sim_problem():
+                raise ValueError("NosnocMpcLooper: plant NosnocSolver should be a pure simulation problem.")
+            if plant.problem.model.dims.n_p_glob != problem.model.dims.n_u:
+                raise ValueError("NosnocMpcLooper: the controls are applied to the plant via p_global, "
+                                 f"expected n_p_glob = {problem.model.dims.n_u}, got {plant.problem.model.dims.n_p_glob}.")
+            if not np.isclose(plant.opts.terminal_time, self.sample_time):
+                raise ValueError(f"NosnocMpcLooper: plant terminal_time {plant.opts.terminal_time} "
+                                 f"should match the sample time {self.sample_time} of the controller.")
+        elif not callable(plant):
+            raise TypeError("plant should be a NosnocSolver or a callable (x, u) -> x_next.")
+
+        if shift_warm_start:
+            if opts.initialization_strategy != InitializationStrategy.EXTERNAL:
+                raise ValueError("shift_warm_start requires InitializationStrategy.EXTERNAL for the controller.")
+            if len(set(opts.Nfe_list)) != 1:
+                raise NotImplementedError("shift_warm_start is only implemented for a uniform Nfe_list.")
+            self.ind_w_stages = [problem.get_stage_indices(i) for i in range(opts.N_stages)]
+
+        self.controller: NosnocSolver = controller
+        self.plant = plant
+        self.Nsim = Nsim
+        self.shift_warm_start = shift_warm_start
+        self.deadline = self.sample_time if deadline is None else deadline
+        self.preparation_callback = preparation_callback
+        if print_level is not None:
+            self.print_level = print_level
+        else:
+            self.print_level = opts.print_level
+
+        # state needed to continue the simulation
+        self.xcurrent = x0
+        self.sim_step = 0
+        self.w_prev = None
+
+        # accumulated results, only filled by run()
+        self.X_sim = [x0]
+        self.U_sim = []
+        self.cost_vals = []
+        self.status = []
+        self.latency = []
+        self.preparation_time = []
+        self.nlp_iter = []
+
+    def shift(self, w_opt: np.ndarray) -> np.ndarray:
+        """Shift a controller solution by one control stage, the last stage is kept."""
+        w_shifted = w_opt.copy()
+        for i in range(len(self.ind_w_stages) - 1):
+            w_shifted[self.ind_w_stages[i]] = w_opt[self.ind_w_stages[i + 1]]
+        return w_shifted
+
+    def _preparation_phase(self) -> None:
+        if self.shift_warm_start:
+            problem = self.controller.problem
+            if self.w_prev is None:
+                # first sample: initialize all states with the current state
+                for ind in problem.ind_x:
+                    problem.w0[np.array(ind)] = self.xcurrent
+            else:
+                problem.w0 = self.shift(self.w_prev)
+        if self.preparation_callback is not None:
+            self.preparation_callback(self)
+
+    def _simulate_plant(self, u: np.ndarray) -> np.ndarray:
+        if isinstance(self.plant, NosnocSolver):
+            self.plant.set("x0", self.xcurrent)
+            self.plant.set("p_global", u)
+            results = self.plant.solve()
+            return results["x_list"][-1]
+        return np.array(self.plant(self.xcurrent, u), dtype=float).flatten()
+
+    def iter_steps(self) -> Iterator[dict]:
+        """
+        Generator over the remaining MPC samples, yields the results of each sample when the plant step is done.
+        """
+        while self.sim_step < self.Nsim:
+            i = self.sim_step
+
+            t = time.perf_counter()
+            self._preparation_phase()
+            preparation_time = time.perf_counter() - t
+
+            # feedback phase
+            t = time.perf_counter()
+            self.controller.set("x0", self.xcurrent)
+            results = self.controller.solve()
+            u0 = results["u_list"][0]
+            latency = time.perf_counter() - t
+            self.w_prev = results["w_sol"]
+
+            # plant
+            x_next = self._simulate_plant(u0)
+
+            step = {
+                "sim_step": i,
+                "x": self.xcurrent,
+                "u": u0,
+                "x_next": x_next,
+                "latency": latency,
+                "preparation_time": preparation_time,
+                "deadline_miss": latency > self.deadline,
+                "nlp_iter": sum(it for it in results["nlp_iter"] if it is not None),
+                "cost_val": results["cost_val"],
+                "status": results["status"],
+            }
+
+            # update state
+            self.xcurrent = x_next
+            self.sim_step += 1
+
+            if self.print_level > 0:
+                print(f"MPC step {i + 1}/{self.Nsim}\t latency: {1e3 * latency:.2f} ms\t status: {results['status']}")
+
+            yield step
+
+    def run(self) -> None:
+        """Run the closed-loop simulation."""
+        for step in self.iter_steps():
+            self.X_sim.append(step["x_next"])
+            self.U_sim.append(step["u"])
+            self.cost_vals.append(step["cost_val"])
+            self.status.append(step["status"])
+            self.latency.append(step["latency"])
+            self.preparation_time.append(step["preparation_time"])
+            self.nlp_iter.append(step["nlp_iter"])
+
+    def get_latency_stats(self, percentiles=(50, 90, 99)) -> dict:
+        """
+        Statistics of the feedback latency over all samples collected by run().
+        """
+        latency = np.array(self.latency)
+        if latency.size == 0:
+            raise ValueError("No latencies recorded, call run() first.")
+        stats = {f"p{q}": np.percentile(latency, q) for q in percentiles}
+        stats["max"] = np.max(latency)
+        stats["mean"] = np.mean(latency)
+        stats["deadline"] = self.deadline
+        stats["deadline_misses"] = int(np.sum(latency > self.deadline))
+        return stats
+
+    def get_results(self) -> dict:
+        results = {
+            "X_sim": np.array(self.X_sim),
+            "U_sim": np.array(self.U_sim),
+            "t_grid": self.sample_time * np.arange(len(self.X_sim)),
+            "cost_vals": self.cost_vals,
+            "status": self.status,
+            "latency": np.array(self.latency),
+            "preparation_time": np.array(self.preparation_time),
+            "nlp_iter": self.nlp_iter,
+            "latency_stats": self.get_latency_stats(),
+        }
+        return results
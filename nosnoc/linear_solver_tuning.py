@@ -0,0 +1,185 @@
+from typing import Optional, List
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from nosnoc.nosnoc_types import Status
+
+#: linear solvers IPOPT can be built with, availability is checked at runtime.
+LINEAR_SOLVERS = ['mumps', 'ma27', 'ma57', 'ma77', 'ma86', 'ma97', 'pardiso', 'spral']
+
+#: additional options tried per linear solver, on top of the default settings.
+LINEAR_SOLVER_VARIANTS = {
+    'mumps': [{'mumps_pivtol': 1e-4}, {'mumps_pivot_order': 0}],
+    'ma27': [{'ma27_pivtol': 1e-4}],
+    'ma57': [{'ma57_pivtol': 1e-4}, {'ma57_pivot_order': 0}],
+    'ma86': [{'ma86_order': 'metis'}],
+    'ma97': [{'ma97_order': 'metis'}],
+    'spral': [{'spral_order': 'matching'}],
+}
+
+
+_LINEAR_SOLVER_CHECK = """
+import sys
+import casadi as ca
+x = ca.SX.sym('x')
+solver = ca.nlpsol('linear_solver_check', 'ipopt', {'x': x, 'f': (x - 1)**2},
+                   {'print_time': 0, 'ipopt': {'print_level': 0, 'sb': 'yes', 'linear_solver': sys.argv[1]}})
+solver(x0=0.0)
+sys.exit(0 if solver.stats()['success'] else 1)
+"""
+
+
+def get_available_linear_solvers(candidates: Optional[List[str]] = None) -> List[str]:
+    """
+    Returns the linear solvers of candidates which are available in the IPOPT build used by casadi.
+
+    Every linear solver is checked in a separate process, since failing to load the HSL library
+    repeatedly can crash IPOPT.
+    """
+    if candidates is None:
+        candidates = LINEAR_SOLVERS
+    available = []
+    for linear_solver in candidates:
+        check = subprocess.run([sys.executable, '-c', _LINEAR_SOLVER_CHECK, linear_solver],
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+        if check.returncode == 0:
+            available.append(linear_solver)
+    return available
+
+
+def get_linear_solver_configurations(linear_solvers: Optional[List[str]] = None) -> List[dict]:
+    """
+    Returns the IPOPT option sets tried by autotune_linear_solver():
+    every linear solver with both barrier parameter strategies and the variants in LINEAR_SOLVER_VARIANTS.
+    """
+    if linear_solvers is None:
+        linear_solvers = get_available_linear_solvers()
+    configurations = []
+    for linear_solver in linear_solvers:
+        for mu_strategy in ['adaptive', 'monotone']:
+            configurations.append({'linear_solver': linear_solver, 'mu_strategy': mu_strategy})
+        for variant in LINEAR_SOLVER_VARIANTS.get(linear_solver, []):
+            configurations.append({'linear_solver': linear_solver, **variant})
+    return configurations
+
+
+class LinearSolverTuningCache:
+    """
+    On-disk storage of tuned IPOPT options, keyed by the problem fingerprint, see NosnocProblem.get_fingerprint().
+    """
+
+    def __init__(self, file: str):
+        self.file = file
+        self.entries: dict = dict()
+        if os.path.exists(file):
+            with open(file, "r") as f:
+                self.entries = json.load(f)
+
+    def get(self, fingerprint: str) -> Optional[dict]:
+        """Returns the tuned IPOPT options for the problem or None."""
+        if fingerprint not in self.entries:
+            return None
+        return dict(self.entries[fingerprint]["ipopt_opts"])
+
+    def put(self, fingerprint: str, ipopt_opts: dict, cpu_time: float) -> None:
+        self.entries[fingerprint] = {"ipopt_opts": ipopt_opts, "cpu_time": cpu_time}
+        self.save()
+
+    def save(self) -> None:
+        """Atomically write the entries to file."""
+        directory = os.path.dirname(os.path.abspath(self.file))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_file, self.file)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+
+
+def autotune_linear_solver(solver,
+                           configurations: Optional[List[dict]] = None,
+                           n_repeat: int = 1,
+                           file: Optional[str] = None,
+                           verbose: bool = False) -> dict:
+    """
+    Solve the problem of solver with every IPOPT configuration and keep the fastest successful one.
+
+    The solver is left with the fastest configuration. If file is given, the configuration is stored there
+    and used by every NosnocSolver for the same problem with opts.linear_solver_tuning_file = file.
+
+    :param solver: NosnocSolver
+    :param configurations: IPOPT option sets, default: get_linear_solver_configurations()
+    :param n_repeat: number of solves per configuration, the minimum NLP CPU time is used.
+    :param file: Optional: file to store the tuned options.
+    :param verbose: print the timing of every configuration.
+    :return: dict with "ipopt_opts", "cpu_time" of the fastest configuration and "timings" of all configurations.
+    """
+    if n_repeat < 1:
+        raise ValueError(f"n_repeat should be >= 1, got {n_repeat}")
+    if configurations is None:
+        configurations = get_linear_solver_configurations()
+
+    prob = solver.problem
+    w0 = prob.w0.copy()
+    # cached solutions, switching sequences and warm starts from previous solves would hide the
+    # solver timings
+    solution_cache = solver.solution_cache
+    switching_sequence = solver.switching_sequence
+    warm_start_db = solver.warm_start_db
+    tuned_ipopt_opts = solver.tuned_ipopt_opts
+    solver.solution_cache = None
+
+    best_opts = None
+    best_time = np.inf
+    timings = []
+    try:
+        for ipopt_opts in configurations:
+            cpu_time = np.inf
+            try:
+                solver.create_nlp_solver(ipopt_opts)
+                solver.tuned_ipopt_opts = ipopt_opts
+                for _ in range(n_repeat):
+                    prob.w0 = w0.copy()
+                    solver.switching_sequence = None
+                    solver.fixed_sequence_solver = None
+                    solver.warm_start_db = None
+                    results = solver.solve()
+                    if results["status"] != Status.SUCCESS:
+                        cpu_time = np.inf
+                        break
+                    cpu_time = min(cpu_time,
+                                   float(sum(t for t in results["cpu_time_nlp"] if t is not None)))
+            except RuntimeError:
+                # invalid option or linear solver not available
+                cpu_time = np.inf
+            timings.append((ipopt_opts, cpu_time))
+            if verbose:
+                print(f"{ipopt_opts}: {cpu_time:.4f} s")
+            if cpu_time < best_time:
+                best_opts, best_time = ipopt_opts, cpu_time
+    finally:
+        solver.solution_cache = solution_cache
+        solver.switching_sequence = switching_sequence
+        solver.warm_start_db = warm_start_db
+        solver.tuned_ipopt_opts = tuned_ipopt_opts
+        # created with the IPOPT options of the last configuration
+        solver.fixed_sequence_solver = None
+        prob.w0 = w0
+
+    if best_opts is None:
+        raise Exception("autotune_linear_solver: no configuration solved the problem successfully.")
+    solver.create_nlp_solver(best_opts)
+    solver.tuned_ipopt_opts = best_opts
+    if file is not None:
+        LinearSolverTuningCache(file).put(prob.get_fingerprint(), best_opts, best_time)
+    return {"ipopt_opts": best_opts, "cpu_time": best_time, "timings": timings}
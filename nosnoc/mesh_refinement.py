@@ -0,0 +1,140 @@
+from typing import Optional, List
+from copy import deepcopy
+import time
+
+import numpy as np
+
+from nosnoc.model import NosnocModel
+from nosnoc.nosnoc_opts import NosnocOpts
+from nosnoc.nosnoc_types import InitializationStrategy, PssMode
+from nosnoc.ocp import NosnocOcp
+from nosnoc.solver import NosnocSolver
+from nosnoc.multilevel import prolongate_solution
+
+
+def get_active_modes(opts: NosnocOpts, results: dict) -> List[tuple]:
+    """Returns the active mode of every finite element, computed from theta or alpha at its end."""
+    if opts.pss_mode == PssMode.STEP:
+        return [tuple(np.round(alpha).astype(int)) for alpha in results["alpha_list"]]
+    return [
+        tuple(int(np.argmax(theta_sys)) for theta_sys in theta) for theta in results["theta_list"]
+    ]
+
+
+def estimate_stage_errors(solver: NosnocSolver, results: dict) -> dict:
+    """
+    Error indicators of a solved problem per control stage.
+
+    :param solver: NosnocSolver that computed results
+    :param results: results of solver.solve()
+    :return: dict with
+        "defect": the maximum local error estimate of the finite elements in each stage,
+            see NosnocProblem.create_defect_fun(),
+        "n_switches": the number of changes of the active mode in each stage, including the change
+            between the last finite element of the previous stage and the first one of this stage.
+    """
+    opts = solver.opts
+    defect_fe = solver.problem.create_defect_fun()(results["w_sol"], solver.p_val).full().flatten()
+    modes = get_active_modes(opts, results)
+
+    defect = np.zeros(opts.N_stages)
+    n_switches = np.zeros(opts.N_stages, dtype=int)
+    i = 0
+    for ctrl_idx, Nfe in enumerate(opts.Nfe_list):
+        defect[ctrl_idx] = np.max(defect_fe[i:i + Nfe])
+        n_switches[ctrl_idx] = sum(modes[k] != modes[k - 1] for k in range(max(i, 1), i + Nfe))
+        i += Nfe
+    return {"defect": defect, "n_switches": n_switches}
+
+
+def solve_with_mesh_refinement(opts: NosnocOpts,
+                               model: NosnocModel,
+                               ocp: Optional[NosnocOcp] = None,
+                               tol: float = 1e-4,
+                               max_refinements: int = 5,
+                               refinement_factor: int = 2,
+                               max_Nfe: int = 64,
+                               uniform: bool = False,
+                               print_level: int = 0) -> dict:
+    """
+    Solve the problem repeatedly on refined finite element meshes,
+    until the estimated local errors are below tol.
+
+    After every solve, the local errors are estimated per control stage,
+    see estimate_stage_errors().
+    A control stage is refined, i.e. its number of finite elements is multiplied by
+    refinement_factor, if its defect exceeds tol or, with FESD, if every finite element boundary
+    in it is needed for a switch.
+    The refined problem is warm started from the previous solution, see prolongate_solution().
+
+    :param opts: NosnocOpts, opts.Nfe_list or opts.N_finite_elements define the initial mesh,
+        opts is not modified.
+    :param model: NosnocModel
+    :param ocp: Optional: NosnocOcp
+    :param tol: target for the local error estimate of all control stages.
+    :param max_refinements: maximum number of refinements.
+    :param refinement_factor: factor for the number of finite elements of refined control stages.
+    :param max_Nfe: maximum number of finite elements per control stage.
+    :param uniform: refine all control stages, if one of them exceeds tol, used for comparison.
+    :param print_level: print the error estimates of every iteration if > 0.
+    :return: results of the final solve with the additional fields
+        "Nfe_list": the final mesh,
+        "converged": True if all error estimates are below tol,
+        "cpu_time_total": the sum of the problem creation and solution times of all iterations,
+        "mesh_refinement": a list with "Nfe_list", "defect", "n_switches", "cpu_time"
+            of every iteration.
+    """
+    if refinement_factor < 2:
+        raise ValueError(f"refinement_factor should be >= 2, got {refinement_factor}")
+    if max_refinements < 0:
+        raise ValueError(f"max_refinements should be >= 0, got {max_refinements}")
+
+    opts = deepcopy(opts)
+    opts.preprocess()
+    Nfe_list = list(opts.Nfe_list)
+
+    history = []
+    solver_prev = None
+    results_prev = None
+    converged = False
+    for refinement in range(max_refinements + 1):
+        t = time.process_time()
+        opts_k = deepcopy(opts)
+        opts_k.Nfe_list = list(Nfe_list)
+        if solver_prev is not None:
+            opts_k.initialization_strategy = InitializationStrategy.EXTERNAL
+        solver = NosnocSolver(opts_k, model, ocp)
+        if solver_prev is not None:
+            prolongate_solution(solver.problem, solver_prev.problem, results_prev)
+        results = solver.solve()
+        errors = estimate_stage_errors(solver, results)
+        cpu_time = time.process_time() - t
+        history.append({"Nfe_list": list(Nfe_list), "cpu_time": cpu_time, **errors})
+        if print_level > 0:
+            print(f"mesh refinement {refinement}: Nfe_list = {Nfe_list}, "
+                  f"max defect = {np.max(errors['defect']):.2e}, cpu time = {cpu_time:.3f} s")
+
+        refine = errors["defect"] > tol
+        if opts.use_fesd:
+            refine |= errors["n_switches"] >= np.array(Nfe_list)
+        if not np.any(refine):
+            converged = True
+            break
+        if refinement == max_refinements:
+            break
+        if uniform:
+            refine[:] = True
+        Nfe_list_new = [
+            min(Nfe * refinement_factor, max_Nfe) if r else Nfe for Nfe, r in zip(Nfe_list, refine)
+        ]
+        if Nfe_list_new == Nfe_list:
+            # all stages that need refinement are at max_Nfe
+            break
+        Nfe_list = Nfe_list_new
+        solver_prev, results_prev = solver, results
+
+    results["Nfe_list"] = Nfe_list
+    results["converged"] = converged
+    results["cpu_time_total"] = sum(entry["cpu_time"] for entry in history)
+    results["mesh_refinement"] = history
+    return results
@@ -1,12 +1,14 @@
-from typing import Optional, List
+from typing import Callable, Optional, List, Union
 
 import numpy as np
 import casadi as ca
+import scipy.sparse as sp
+from scipy.optimize import linprog
 
 from nosnoc.nosnoc_opts import NosnocOpts
 from nosnoc.dims import NosnocDims
 from nosnoc.nosnoc_types import PssMode
-from nosnoc.utils import casadi_length, casadi_vertcat_list
+from nosnoc.utils import casadi_length, casadi_vertcat_list, casadi_prod_list
 
 
 class NosnocModel:
@@ -29,7 +31,8 @@ class NosnocModel:
     :param F: set of state equations for the different regions
     :param c: set of region boundaries
     :param S: determination of the boundaries region connecting
-        different state equations with each boundary zone
+        different state equations with each boundary zone,
+        a list of np.ndarray or scipy.sparse matrices
     :param g_Stewart: List of stewart functions to define the regions (instead of S & c)
     :param u: controls
     :param z: user defined algebraic state variables
@@ -84,7 +87,7 @@ class NosnocModel:
         self.f_x: List[ca.SX] = f_x
         self.g_z: ca.SX = g_z
         self.c: List[ca.SX] = c
-        self.S: List[np.ndarray] = S
+        self.S: List[Union[np.ndarray, sp.spmatrix]] = S
         self.g_Stewart = g_Stewart
 
         if not (bool(F is not None) ^ bool((f_x is not None) and (alpha is not None))):
@@ -118,6 +121,9 @@ class NosnocModel:
         return out
 
     def preprocess_model(self, opts: NosnocOpts):
+        if opts.decompose_subsystems and self.F is not None and not self.g_Stewart:
+            self.decompose_subsystems(verbose=bool(opts.print_level))
+
         # detect dimensions
         n_x = casadi_length(self.x)
         n_u = casadi_length(self.u)
@@ -225,7 +231,7 @@ class NosnocModel:
             if self.g_Stewart:
                 g_Stewart_list = self.g_Stewart
             else:
-                g_Stewart_list = [-self.S[i] @ self.c[i] for i in range(n_sys)]
+                g_Stewart_list = [-ca.DM(sp.csc_matrix(self.S[i])) @ self.c[i] for i in range(n_sys)]
 
             g_Stewart = casadi_vertcat_list(g_Stewart_list)
 
@@ -235,25 +241,35 @@ class NosnocModel:
             alpha = self.alpha
         if self.theta is not None:
             theta = self.theta
+        eliminate_lambda = opts.pss_mode == PssMode.STEWART and opts.eliminate_lambda
+        if eliminate_lambda:
+            if ca.depends_on(g_Stewart, self.z):
+                raise NotImplementedError("eliminate_lambda is not supported if g_Stewart depends on z.")
+            # lambda is no variable, but an expression
+            lam = [g_Stewart_list[ii] + mu[ii] for ii in range(n_sys)]
+            self.lambda_stewart_fun = ca.Function('lambda_stewart_fun',
+                                                  [self.x, casadi_vertcat_list(mu), self.p],
+                                                  [casadi_vertcat_list(lam)])
 
         # setup upsilon
         upsilon = []
+        beta = []
+        self.beta0 = np.array([])
+        g_lift = ca.SX.zeros((0, 1))
         if opts.pss_mode == PssMode.STEP and self.F is not None:
             for ii in range(self.dims.n_sys):
-                upsilon_temp = []
-                S_temp = self.S[ii]
-                for j in range(len(S_temp)):
-                    upsilon_ij = 1
-                    for k in range(len(S_temp[0, :])):
-                        # create multiafine term
-                        if S_temp[j, k] != 0:
-                            upsilon_ij *= (0.5 * (1 - S_temp[j, k]) +
-                                           S_temp[j, k] * alpha[ii][k])
-                    upsilon_temp = ca.vertcat(upsilon_temp, upsilon_ij)
-                upsilon = ca.horzcat(upsilon, upsilon_temp)
+                if opts.n_depth_step_lifting > 0:
+                    upsilon_ii, beta_ii, g_lift_ii, beta0_ii = create_lifted_upsilon(
+                        self.S[ii], alpha[ii], opts.n_depth_step_lifting, name=f'beta_{ii+1}')
+                    beta.append(beta_ii)
+                    g_lift = ca.vertcat(g_lift, g_lift_ii)
+                    self.beta0 = np.concatenate((self.beta0, beta0_ii))
+                else:
+                    upsilon_ii = create_upsilon(self.S[ii], alpha[ii])
+                upsilon.append(upsilon_ii)
+        self.dims.n_beta = casadi_length(casadi_vertcat_list(beta)) if beta else 0
 
         # start empty
-        g_lift = ca.SX.zeros((0, 1))
         g_switching = ca.SX.zeros((0, 1))
         g_convex = ca.SX.zeros((0, 1))  # equation for the convex multiplers 1 = e' \theta
         lambda00_expr = ca.SX.zeros(0, 0)
@@ -261,11 +277,12 @@ class NosnocModel:
 
         # Note: this is the order of z used by FiniteElement
         z = ca.vertcat(casadi_vertcat_list(theta),
-                       casadi_vertcat_list(lam),
+                       casadi_vertcat_list(lam) if not eliminate_lambda else ca.SX.zeros(0, 1),
                        casadi_vertcat_list(mu),
                        casadi_vertcat_list(alpha),
                        casadi_vertcat_list(lambda_n),
                        casadi_vertcat_list(lambda_p),
+                       casadi_vertcat_list(beta),
                        self.z)
         # Reformulate the Filippov ODE into a DCS
         if self.F is None:
@@ -277,9 +294,10 @@ class NosnocModel:
         if opts.pss_mode == PssMode.STEWART:
             for ii in range(n_sys):
                 f_x = f_x + self.F[ii] @ theta[ii]
-                g_switching = ca.vertcat(
-                    g_switching,
-                    g_Stewart_list[ii] - lam[ii] + mu[ii])
+                if not eliminate_lambda:
+                    g_switching = ca.vertcat(
+                        g_switching,
+                        g_Stewart_list[ii] - lam[ii] + mu[ii])
                 g_convex = ca.vertcat(g_convex, ca.sum1(theta[ii]) - 1)
                 std_compl_res += ca.fabs(lam[ii].T @ theta[ii])
                 lambda00_expr = ca.vertcat(lambda00_expr,
@@ -287,7 +305,7 @@ class NosnocModel:
         elif opts.pss_mode == PssMode.STEP:
             for ii in range(n_sys):
                 if self.F is not None:
-                    f_x = f_x + self.F[ii] @ upsilon[:, ii]
+                    f_x = f_x + self.F[ii] @ upsilon[ii]
                     alpha_ii = alpha[ii]
                 else:
                     alpha_ii = self.alpha[ii]
@@ -321,7 +339,7 @@ class NosnocModel:
 
         self.lambda00_fun = ca.Function('lambda00_fun', [self.x, self.z, self.p], [lambda00_expr])
 
-        self.std_compl_res_fun = ca.Function('std_compl_res_fun', [z, self.p], [std_compl_res])
+        self.std_compl_res_fun = ca.Function('std_compl_res_fun', [self.x, z, self.p], [std_compl_res])
         if opts.pss_mode == PssMode.STEWART:
             mu00_stewart = casadi_vertcat_list([ca.mmin(g_Stewart_list[ii]) for ii in range(n_sys)])
             self.mu00_stewart_fun = ca.Function('mu00_stewart_fun', [self.x, self.z, self.p], [mu00_stewart])
@@ -359,6 +377,66 @@ class NosnocModel:
             mu = []
         return theta, lam, mu, alpha, lambda_n, lambda_p
 
+    def decompose_subsystems(self, verbose: bool = False) -> dict:
+        """
+        Split every subsystem (F, c, S) into the finest set of independent subsystems,
+        such that the Filippov set is the Cartesian product of the subsystem Filippov sets.
+
+        Updates F, c and S in place and returns a report on the reduction of the number of regions,
+        which is also stored in self.decomposition_report.
+        """
+        F_new, c_new, S_new = [], [], []
+        for F_i, c_i, S_i in zip(self.F, self.c, self.S):
+            F_split, c_split, S_split = decompose_subsystem(F_i, c_i, S_i)
+            F_new += F_split
+            c_new += c_split
+            S_new += S_split
+
+        n_f_before = [F_i.shape[1] for F_i in self.F]
+        n_f_after = [F_i.shape[1] for F_i in F_new]
+        n_c = sum(casadi_length(c_i) for c_i in self.c)
+        report = {
+            'n_sys': (len(self.F), len(F_new)),
+            'n_f': (sum(n_f_before), sum(n_f_after)),
+            'n_c': (n_c, sum(casadi_length(c_i) for c_i in c_new)),
+            # theta, lambda, mu per RK stage in the Stewart representation
+            'n_z_stewart': (2 * sum(n_f_before) + len(self.F), 2 * sum(n_f_after) + len(F_new)),
+            # theta-lambda complementarity pairs per RK stage
+            'n_comp_stewart': (sum(n_f_before), sum(n_f_after)),
+        }
+        self.F, self.c, self.S = F_new, c_new, S_new
+        self.decomposition_report = report
+
+        if verbose:
+            print("subsystem decomposition: (before -> after)")
+            for key, (before, after) in report.items():
+                print(f"{key}: \t{before} -> {after}")
+        return report
+
+    def prune_empty_regions(self,
+                            lbx: Optional[np.ndarray] = None,
+                            ubx: Optional[np.ndarray] = None,
+                            verbose: bool = False) -> List[list]:
+        """
+        Remove the rows of S and columns of F of regions that are empty within the state bounds lbx <= x <= ubx.
+        Only possible for models given via F, c and S.
+
+        :return: indices of the removed regions for each subsystem
+        """
+        if self.F is None or self.g_Stewart:
+            raise ValueError("prune_empty_regions is only possible for models given via F, c and S.")
+        ind_empty_list = []
+        for i, (F_i, c_i, S_i) in enumerate(zip(self.F, self.c, self.S)):
+            ind_empty = get_empty_regions(self.x, c_i, S_i, lbx, ubx)
+            ind_keep = [j for j in range(S_i.shape[0]) if j not in ind_empty]
+            if ind_empty:
+                self.F[i] = F_i[:, ind_keep]
+                self.S[i] = sp.csr_matrix(S_i)[ind_keep, :] if sp.issparse(S_i) else S_i[ind_keep, :]
+            ind_empty_list.append(ind_empty)
+            if verbose:
+                print(f"subsystem {i}: removed {len(ind_empty)} of {len(ind_empty) + len(ind_keep)} regions.")
+        return ind_empty_list
+
     def add_smooth_step_representation(self, smoothing_parameter: float = 1e1):
         """
         smoothing_parameter: larger -> smoother, smaller -> more exact
@@ -376,7 +454,8 @@ class NosnocModel:
                                       [(ca.tanh(1 / smoothing_parameter * y) + 1) / 2])
 
         lambda_smooth = []
-        g_Stewart_list = [-self.S[i] @ self.c[i] for i in range(dims.n_sys)]
+        S_dense = [sp.csr_matrix(S_i).toarray() for S_i in self.S]
+        g_Stewart_list = [-S_dense[i] @ self.c[i] for i in range(dims.n_sys)]
 
         theta_list = [ca.SX.zeros(nf) for nf in dims.n_f_sys]
         mu_smooth_list = []
@@ -394,11 +473,11 @@ class NosnocModel:
                                        g_Stewart_list[s] - smooth_min_fun(g_Stewart_list[s]))
 
             for i in range(dims.n_f_sys[s]):
-                n_Ri = sum(np.abs(self.S[s][i, :]))
+                n_Ri = sum(np.abs(S_dense[s][i, :]))
                 theta_list[s][i] = 2**(n_c - n_Ri)
                 for j in range(n_c):
-                    theta_list[s][i] *= ((1 - self.S[s][i, j]) / 2 +
-                                         self.S[s][i, j] * alpha_expr_s[j])
+                    theta_list[s][i] *= ((1 - S_dense[s][i, j]) / 2 +
+                                         S_dense[s][i, j] * alpha_expr_s[j])
             f_x_smooth += self.F[s] @ theta_list[s]
 
         theta_smooth = casadi_vertcat_list(theta_list)
@@ -417,3 +496,295 @@ class NosnocModel:
         else:
             z0 = self.z0
         return self.lambda00_fun(x0, z0, p0).full().flatten()
+
+
+def create_replicated_model(template: NosnocModel,
+                            n_replicas: int,
+                            x0: Optional[np.ndarray] = None,
+                            f_coupling: Optional[Callable[[ca.SX, ca.SX], ca.SX]] = None,
+                            name: Optional[str] = None) -> NosnocModel:
+    """
+    Create a model consisting of n_replicas copies of a template model with one switching subsystem,
+    e.g. multiple identical bodies, plus optional smooth coupling terms.
+
+    This is a model construction helper: the NLP is built from SX, which inlines the mapped
+    template functions, such that build time and expression size are the same as for the model
+    written replica by replica, see benchmarks/benchmark_replicated_model.py.
+    Each replica becomes a separate subsystem (n_sys = n_replicas), such that the number of regions
+    grows linearly in the number of replicas.
+    The states, controls, algebraic variables and alphas of the replicas are stacked replica by replica,
+    time varying and global parameters are shared.
+
+    :param template: model with one subsystem, given via F, c, S or f_x, alpha, c
+    :param n_replicas: number of copies
+    :param x0: initial state of the replicated model, default: template.x0 for all replicas
+    :param f_coupling: function (X, U) -> smooth dynamics added to all replicas,
+        where X (n_x x n_replicas) and U (n_u x n_replicas) contain the states and controls of a replica in each column
+    :param name: name of the replicated model
+    """
+    if template.g_Stewart or template.t_var is not None or template.theta is not None:
+        raise NotImplementedError("create_replicated_model does not support g_Stewart, t_var and theta.")
+    n_sys = len(template.F) if template.F is not None else len(template.f_x)
+    if n_sys != 1:
+        raise ValueError("template model should have exactly one subsystem.")
+
+    n_x = casadi_length(template.x)
+    n_u = casadi_length(template.u)
+    n_z = casadi_length(template.z)
+    n_c = casadi_length(template.c[0])
+    X = ca.SX.sym('x', n_x, n_replicas)
+    U = ca.SX.sym('u', n_u, n_replicas)
+    Z = ca.SX.sym('z', n_z, n_replicas)
+    p = ca.vertcat(template.p_time_var, template.p_global)
+    general_inclusion = template.F is None
+    if general_inclusion:
+        n_f = 1
+        A = ca.SX.sym('alpha', n_c, n_replicas)
+        alpha_t = template.alpha[0]
+        f_t = template.f_x[0]
+    else:
+        n_f = template.F[0].shape[1]
+        A = ca.SX.sym('alpha_dummy', 0, n_replicas)
+        alpha_t = ca.SX.sym('alpha_dummy', 0, 1)
+        f_t = template.F[0]
+
+    template_fun = ca.Function(f'{template.name}_template', [template.x, template.u, template.z, alpha_t, p],
+                               [f_t, template.c[0], template.g_z])
+    f_all, c_all, g_z_all = template_fun.map(n_replicas)(X, U, Z, A, p)
+    if f_coupling is not None:
+        f_smooth = ca.reshape(f_coupling(X, U), n_x * n_replicas, 1)
+    else:
+        f_smooth = ca.SX.zeros(n_x * n_replicas, 1)
+
+    f_list = []
+    for i in range(n_replicas):
+        if general_inclusion:
+            # f_x of the subsystems are stacked
+            f_i = f_all[:, i] + f_smooth[i * n_x:(i + 1) * n_x]
+        else:
+            # F of the subsystems are summed
+            f_i = ca.SX.zeros(n_x * n_replicas, n_f)
+            f_i[i * n_x:(i + 1) * n_x, :] = f_all[:, i * n_f:(i + 1) * n_f]
+            if i == 0:
+                f_i += ca.repmat(f_smooth, 1, n_f)
+        f_list.append(f_i)
+    c = [c_all[:, i] for i in range(n_replicas)]
+
+    if x0 is None:
+        x0 = np.tile(template.x0, n_replicas)
+    kwargs = dict()
+    if n_z > 0:
+        kwargs.update(z=ca.vec(Z), g_z=ca.vec(g_z_all),
+                      z0=np.tile(template.z0, n_replicas) if template.z0 is not None else None,
+                      lbz=np.tile(template.lbz, n_replicas) if template.lbz is not None else None,
+                      ubz=np.tile(template.ubz, n_replicas) if template.ubz is not None else None)
+    if general_inclusion:
+        kwargs.update(f_x=f_list, alpha=[A[:, i] for i in range(n_replicas)])
+    else:
+        kwargs.update(F=f_list, S=n_replicas * [template.S[0]])
+    return NosnocModel(x=ca.vec(X), x0=x0, c=c, u=ca.vec(U),
+                       p_time_var=template.p_time_var, p_global=template.p_global,
+                       p_time_var_val=template.p_time_var_val, p_global_val=template.p_global_val,
+                       v_global=template.v_global,
+                       name=name if name is not None else f'{template.name}_x{n_replicas}',
+                       **kwargs)
+
+
+def _step_factor(s_jk: float, alpha_k: ca.SX) -> ca.SX:
+    """Factor of the multi-affine term for sign s_jk of switching function k in region j."""
+    return 0.5 * (1 - s_jk) + s_jk * alpha_k
+
+
+def create_upsilon(S: Union[np.ndarray, sp.spmatrix], alpha: ca.SX) -> ca.SX:
+    """
+    Create the multi-affine terms upsilon of the Step representation,
+    upsilon_j = prod_{k: S_jk != 0} (0.5 * (1 - S_jk) + S_jk * alpha_k).
+
+    The product is built column wise using vector operations, only nonzeros of S are visited.
+    """
+    S = sp.csc_matrix(S)
+    n_f, n_c = S.shape
+    upsilon = ca.SX.ones(n_f, 1)
+    for k in range(n_c):
+        rows = S.indices[S.indptr[k]:S.indptr[k + 1]]
+        if len(rows) == 0:
+            continue
+        factor = ca.SX.ones(n_f, 1)
+        factor[rows.tolist()] = _step_factor(ca.DM(S.data[S.indptr[k]:S.indptr[k + 1]]), alpha[k])
+        upsilon = upsilon * factor
+    return upsilon
+
+
+def create_lifted_upsilon(S: Union[np.ndarray, sp.spmatrix], alpha: ca.SX, n_depth: int, name: str = 'beta'):
+    """
+    Create the multi-affine terms upsilon of the Step representation, where products of more than
+    n_depth factors are lifted: the first n_depth factors are replaced by an auxiliary algebraic variable beta
+    with the lifting equation beta - prod(factors) = 0, until at most n_depth factors are left.
+    Lifting variables are shared between regions with the same leading factors.
+
+    :return: upsilon, beta, g_lift, beta0, where beta0 is the value of beta at alpha = 0.5.
+    """
+    if n_depth < 2:
+        raise ValueError(f"n_depth_step_lifting should be 0 (no lifting) or >= 2, got {n_depth}")
+    S = sp.csr_matrix(S)
+    n_f = S.shape[0]
+    lifted = dict()
+    beta = []
+    g_lift = []
+    beta0 = []
+    upsilon = ca.SX.zeros(n_f, 1)
+    for j in range(n_f):
+        cols = S.indices[S.indptr[j]:S.indptr[j + 1]]
+        vals = S.data[S.indptr[j]:S.indptr[j + 1]]
+        # terms: (key, expression, number of factors)
+        terms = [((k, s_jk), _step_factor(s_jk, alpha[k]), 1) for k, s_jk in zip(cols, vals)]
+        while len(terms) > n_depth:
+            key = tuple(term[0] for term in terms[:n_depth])
+            if key not in lifted:
+                beta_new = ca.SX.sym(f'{name}_{len(beta)+1}')
+                product = casadi_prod_list([term[1] for term in terms[:n_depth]])
+                n_factors = sum(term[2] for term in terms[:n_depth])
+                beta.append(beta_new)
+                g_lift.append(beta_new - product)
+                beta0.append(0.5**n_factors)
+                lifted[key] = (beta_new, n_factors)
+            beta_new, n_factors = lifted[key]
+            terms = [(key, beta_new, n_factors)] + terms[n_depth:]
+        upsilon[j] = casadi_prod_list([term[1] for term in terms]) if terms else 1
+    return upsilon, casadi_vertcat_list(beta), casadi_vertcat_list(g_lift), np.array(beta0)
+
+
+def get_switching_dependencies(F: ca.SX, S: np.ndarray) -> List[set]:
+    """
+    For each row of F (state derivative), the set of switching functions it depends on.
+
+    Row r depends on switching function k if F[r, j] differs for two regions j, j' whose sign vectors
+    only differ in entry k. The structural sparsity of F @ theta can not reveal this, as the
+    dependency on k only cancels in the values of F.
+    """
+    n_x = F.shape[0]
+    n_f, n_c = S.shape
+    region_of_sign = {tuple(S[j, :]): j for j in range(n_f)}
+    dependencies = [set() for _ in range(n_x)]
+    for j in range(n_f):
+        for k in range(n_c):
+            sign_flipped = S[j, :].copy()
+            sign_flipped[k] *= -1
+            j_flipped = region_of_sign.get(tuple(sign_flipped))
+            if j_flipped is None or j_flipped < j:
+                continue
+            F_diff = ca.simplify(ca.SX(F[:, j]) - ca.SX(F[:, j_flipped]))
+            for r in range(n_x):
+                if not F_diff[r].is_zero():
+                    dependencies[r].add(k)
+    return dependencies
+
+
+def decompose_subsystem(F: ca.SX, c: ca.SX, S: Union[np.ndarray, sp.spmatrix]):
+    """
+    Split a subsystem (F, c, S) into the finest set of independent subsystems.
+
+    Switching functions are grouped, if the dynamics of a common state depend on them,
+    switching functions no state depends on are dropped.
+    The decomposition is only applied if the regions are all 2^n_c sign combinations,
+    i.e. S is a Cartesian product. Otherwise, the subsystem is returned unchanged.
+
+    :return: lists F, c, S of the subsystems
+    """
+    S_dense = sp.csr_matrix(S).toarray()
+    n_x = F.shape[0]
+    n_f, n_c = S_dense.shape
+    if (n_c < 2 or n_f != 2**n_c or np.any(S_dense == 0) or
+            len({tuple(row) for row in S_dense}) != n_f):
+        return [F], [c], [S]
+
+    dependencies = get_switching_dependencies(F, S_dense)
+
+    # group switching functions affecting common states (union find)
+    parent = list(range(n_c))
+
+    def find(k):
+        while parent[k] != k:
+            parent[k] = parent[parent[k]]
+            k = parent[k]
+        return k
+
+    for dep in dependencies:
+        dep = sorted(dep)
+        for k in dep[1:]:
+            parent[find(k)] = find(dep[0])
+    groups = {}
+    for k in sorted(set().union(*dependencies)):
+        groups.setdefault(find(k), []).append(k)
+    if not groups or (len(groups) == 1 and sum(len(g) for g in groups.values()) == n_c):
+        return [F], [c], [S]
+
+    F_split, c_split, S_split = [], [], []
+    for i_group, (root, group) in enumerate(groups.items()):
+        # states depending on no switching function are assigned to the first subsystem
+        rows = [r for r, dep in enumerate(dependencies)
+                if (dep and find(min(dep)) == root) or (not dep and i_group == 0)]
+        # regions of the group in order of first appearance in S
+        signs = list(dict.fromkeys(tuple(row[group]) for row in S_dense))
+        F_group = ca.SX.zeros(n_x, len(signs))
+        for l, sign in enumerate(signs):
+            j = next(j for j in range(n_f) if tuple(S_dense[j, group]) == sign)
+            for r in rows:
+                F_group[r, l] = F[r, j]
+        F_split.append(F_group)
+        c_split.append(c[group])
+        S_split.append(np.array(signs))
+    return F_split, c_split, S_split
+
+
+def get_empty_regions(x: ca.SX,
+                      c: ca.SX,
+                      S: Union[np.ndarray, sp.spmatrix],
+                      lbx: Optional[np.ndarray] = None,
+                      ubx: Optional[np.ndarray] = None,
+                      tol: float = 1e-9) -> list:
+    """
+    Detect the regions R_j = {x | S_jk * c_k(x) > 0 for all k with S_jk != 0} which are empty within lbx <= x <= ubx.
+
+    For each region an LP maximizing the margin t, with S_jk * c_k(x) >= t, is solved,
+    the region is empty if this LP is infeasible or t <= tol.
+    Switching functions that are not affine in x only are left out,
+    such that a region is never removed wrongly.
+
+    :return: indices of the empty regions
+    """
+    S = sp.csr_matrix(S)
+    n_x = casadi_length(x)
+    n_f = S.shape[0]
+    lbx = -np.inf * np.ones(n_x) if lbx is None else lbx
+    ubx = np.inf * np.ones(n_x) if ubx is None else ubx
+    bounds = [(None if np.isinf(lb) else lb, None if np.isinf(ub) else ub) for lb, ub in zip(lbx, ubx)]
+    bounds.append((None, 1.0))
+
+    # affine switching functions: c_k(x) = A_k x + b_k
+    ind_affine = []
+    for k in range(casadi_length(c)):
+        if ca.Function('c_k', [x], [c[k]], {'allow_free': True}).has_free():
+            continue
+        if not ca.depends_on(ca.jacobian(c[k], x), x):
+            ind_affine.append(k)
+    c_fun = ca.Function('c_fun', [x], [c[ind_affine]])
+    jac_c_fun = ca.Function('jac_c_fun', [x], [ca.jacobian(c[ind_affine], x)])
+    b = c_fun(np.zeros(n_x)).full().flatten()
+    A = jac_c_fun(np.zeros(n_x)).full()
+
+    ind_empty = []
+    cost = np.zeros(n_x + 1)
+    cost[-1] = -1.0
+    for j in range(n_f):
+        signs = S[j, ind_affine].toarray().flatten()
+        rows = np.nonzero(signs)[0]
+        if len(rows) == 0:
+            continue
+        # -s_k * (A_k x + b_k) + t <= 0
+        A_ub = np.hstack((-signs[rows, None] * A[rows, :], np.ones((len(rows), 1))))
+        b_ub = signs[rows] * b[rows]
+        lp = linprog(cost, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method='highs')
+        if lp.status == 2 or (lp.status == 0 and -lp.fun <= tol):
+            ind_empty.append(j)
+    return ind_empty
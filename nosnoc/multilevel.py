@@ -0,0 +1,269 @@
+from typing import Optional, List
+from copy import deepcopy
+import time
+
+import numpy as np
+
+from nosnoc.model import NosnocModel
+from nosnoc.nosnoc_opts import NosnocOpts
+from nosnoc.nosnoc_types import InitializationStrategy
+from nosnoc.ocp import NosnocOcp
+from nosnoc.problem import NosnocProblem
+from nosnoc.solver import NosnocSolver
+from nosnoc.utils import flatten
+
+# variables of a finite element, which are prolongated per Runge-Kutta stage
+_FE_STAGE_INDICES = [
+    "ind_v", "ind_theta", "ind_lam", "ind_mu", "ind_alpha", "ind_lambda_n", "ind_lambda_p",
+    "ind_beta", "ind_z"
+]
+
+
+def _get_stage_times(opts: NosnocOpts, n_entries: int) -> np.ndarray:
+    """Normalized times of the entries of a per Runge-Kutta stage index list of a finite element."""
+    # irk_time_points includes 0 for IrkRepresentation.INTEGRAL
+    tau = opts.irk_time_points[-opts.n_s:]
+    if n_entries < opts.n_s:
+        # only the end of the finite element
+        return np.ones(n_entries)
+    return np.concatenate((tau, np.ones(n_entries - opts.n_s)))
+
+
+def _get_fine_grid(t_start: float, t_end: float, Nfe: int, t_grid_coarse: np.ndarray) -> np.ndarray:
+    """
+    Finite element grid of a control stage of the fine problem: the coarse finite elements within
+    [t_start, t_end] are subdivided equally if possible, otherwise the grid is equidistant.
+    """
+    tol = 1e-9 * (t_end - t_start)
+    inner = t_grid_coarse[(t_grid_coarse > t_start + tol) & (t_grid_coarse < t_end - tol)]
+    nodes = np.concatenate(([t_start], inner, [t_end]))
+    n_segments = len(nodes) - 1
+    if Nfe % n_segments != 0:
+        return np.linspace(t_start, t_end, Nfe + 1)
+    n_sub = Nfe // n_segments
+    grid = [np.linspace(nodes[i], nodes[i + 1], n_sub + 1)[:-1] for i in range(n_segments)]
+    return np.concatenate(grid + [[t_end]])
+
+
+def prolongate_solution(prob: NosnocProblem, prob_coarse: NosnocProblem,
+                        results_coarse: dict) -> None:
+    """
+    Initialize prob.w0 from the solution of prob_coarse, which may have fewer control stages,
+    finite elements or Runge-Kutta stages, but the same model and terminal time.
+
+    - step sizes: the coarse finite elements are subdivided, if the number of finite elements
+      of a fine control stage is a multiple of the number of coarse ones in it,
+      otherwise the fine finite elements are equidistant,
+    - states: the collocation polynomials of the coarse finite elements are evaluated,
+    - all other variables of a finite element are taken from the coarse Runge-Kutta stage
+      containing the fine one, the controls from the coarse control stage containing the middle
+      of the fine one.
+    """
+    opts = prob.opts
+    opts_coarse = prob_coarse.opts
+    w_coarse = results_coarse["w_sol"]
+    t_grid_coarse = np.array(results_coarse["t_grid"])
+    x_traj_coarse = np.array(results_coarse["x_traj"])
+
+    # coarse finite elements in order
+    fe_coarse = [(ctrl_idx, fe_idx)
+                 for ctrl_idx, Nfe in enumerate(opts_coarse.Nfe_list)
+                 for fe_idx in range(Nfe)]
+
+    def find_fe_coarse(t: float) -> int:
+        # finite element ending at t, if t is on the grid
+        k = np.searchsorted(t_grid_coarse, t, side='left') - 1
+        return min(max(k, 0), len(fe_coarse) - 1)
+
+    def eval_x_coarse(t: float) -> np.ndarray:
+        k = find_fe_coarse(t)
+        ctrl_idx, fe_idx = fe_coarse[k]
+        t0, t1 = t_grid_coarse[k], t_grid_coarse[k + 1]
+        tau = (t - t0) / (t1 - t0) if t1 > t0 else 1.0
+        ind_x = prob_coarse.ind_x[ctrl_idx][fe_idx]
+        if len(ind_x) < opts_coarse.n_s:
+            # no stage values, linear interpolation
+            return (1 - tau) * x_traj_coarse[k] + tau * x_traj_coarse[k + 1]
+        # collocation polynomial
+        tau_nodes = np.concatenate(([0.0], _get_stage_times(opts_coarse, opts_coarse.n_s)))
+        X = [x_traj_coarse[k]] + [w_coarse[ind] for ind in ind_x[:opts_coarse.n_s]]
+        x = np.zeros(len(X[0]))
+        for i, x_i in enumerate(X):
+            basis = np.prod([(tau - tau_nodes[r]) / (tau_nodes[i] - tau_nodes[r])
+                             for r in range(len(tau_nodes)) if r != i])
+            x += basis * x_i
+        return x
+
+    if opts.N_stages == opts_coarse.N_stages:
+        t_grid_u = results_coarse["t_grid_u"]
+    else:
+        t_grid_u = np.linspace(0, opts.terminal_time, opts.N_stages + 1)
+
+    fe_idx_all = 0
+    for ctrl_idx, Nfe in enumerate(opts.Nfe_list):
+        grid = _get_fine_grid(t_grid_u[ctrl_idx], t_grid_u[ctrl_idx + 1], Nfe, t_grid_coarse)
+        for fe_idx in range(Nfe):
+            t_start, h = grid[fe_idx], grid[fe_idx + 1] - grid[fe_idx]
+            if opts.use_fesd:
+                ind_h = prob.ind_h[fe_idx_all]
+                prob.w0[ind_h] = np.clip(h, prob.lbw[ind_h], prob.ubw[ind_h])
+            fe_idx_all += 1
+
+            # states
+            ind_x = prob.ind_x[ctrl_idx][fe_idx]
+            for ind, tau in zip(ind_x, _get_stage_times(opts, len(ind_x))):
+                prob.w0[ind] = eval_x_coarse(t_start + tau * h)
+
+            # algebraic variables
+            for attr in _FE_STAGE_INDICES:
+                ind_fe = getattr(prob, attr)[ctrl_idx][fe_idx]
+                for ind, tau in zip(ind_fe, _get_stage_times(opts, len(ind_fe))):
+                    t = t_start + tau * h
+                    k = find_fe_coarse(t)
+                    t0, t1 = t_grid_coarse[k], t_grid_coarse[k + 1]
+                    tau_coarse = (t - t0) / (t1 - t0) if t1 > t0 else 1.0
+                    ctrl_c, fe_c = fe_coarse[k]
+                    ind_fe_c = getattr(prob_coarse, attr)[ctrl_c][fe_c]
+                    tau_c = _get_stage_times(opts_coarse, len(ind_fe_c))
+                    r = min(np.searchsorted(tau_c, tau_coarse - 1e-9), len(ind_fe_c) - 1)
+                    ind, ind_c = flatten(ind), flatten(ind_fe_c[r])
+                    if len(ind) and len(ind) == len(ind_c):
+                        prob.w0[ind] = w_coarse[ind_c]
+
+    # controls and speed of time variables per control stage
+    for attr in ["ind_u", "ind_sot"]:
+        ind_list, ind_list_c = getattr(prob, attr), getattr(prob_coarse, attr)
+        if len(ind_list) == opts.N_stages and len(ind_list_c) == opts_coarse.N_stages:
+            for ctrl_idx, ind in enumerate(ind_list):
+                t_mid = (t_grid_u[ctrl_idx] + t_grid_u[ctrl_idx + 1]) / 2
+                ctrl_c = int(np.clip(np.searchsorted(results_coarse["t_grid_u"], t_mid) - 1, 0,
+                                     opts_coarse.N_stages - 1))
+                prob.w0[ind] = w_coarse[ind_list_c[ctrl_c]]
+        elif len(flatten(ind_list)) == len(flatten(ind_list_c)) > 0:
+            prob.w0[flatten(ind_list)] = w_coarse[flatten(ind_list_c)]
+    for attr in ["ind_v_global", "ind_elastic"]:
+        ind = flatten(getattr(prob, attr))
+        if len(ind):
+            prob.w0[ind] = w_coarse[flatten(getattr(prob_coarse, attr))]
+
+
+def create_coarse_opts(opts: NosnocOpts,
+                       N_stages: Optional[int] = None,
+                       N_finite_elements: Optional[int] = None,
+                       n_s: Optional[int] = None) -> NosnocOpts:
+    """
+    Returns a copy of opts with the given number of control stages, finite elements per control
+    stage and Runge-Kutta stages. Values that are None are kept.
+    """
+    opts = deepcopy(opts)
+    if N_stages is not None or N_finite_elements is not None:
+        opts.Nfe_list = []
+    if N_stages is not None:
+        opts.N_stages = N_stages
+    if N_finite_elements is not None:
+        opts.N_finite_elements = N_finite_elements
+    if n_s is not None:
+        opts.n_s = n_s
+    return opts
+
+
+class NosnocMultilevelSolver:
+    """
+    Solves a problem on a sequence of levels, from coarse to fine, where every level is initialized
+    with the prolongated solution of the previous one, see prolongate_solution().
+    The solvers of all levels are created once, such that solve() can be called repeatedly.
+    """
+
+    def __init__(self,
+                 opts_levels: List[NosnocOpts],
+                 model: NosnocModel,
+                 ocp: Optional[NosnocOcp] = None,
+                 sigma_0_fine: Optional[float] = None):
+        """
+        :param opts_levels: NosnocOpts of the levels, from coarse to fine, e.g. from
+            create_coarse_opts(). They should only differ in the discretization.
+            The initialization_strategy of all but the first level is set to EXTERNAL.
+        :param model: NosnocModel, copied for every level
+        :param ocp: Optional: NosnocOcp, copied for every level
+        :param sigma_0_fine: Optional: sigma_0 of all but the first level. By default, every level
+            runs the full homotopy, which moves the iterates away from the prolongated solution.
+            A small value saves homotopy iterations, but may lead to a different local optimum.
+        """
+        if len(opts_levels) == 0:
+            raise ValueError("opts_levels should contain at least one NosnocOpts.")
+        terminal_times = [opts.terminal_time for opts in opts_levels]
+        if not np.allclose(terminal_times, terminal_times[0]):
+            raise ValueError(f"all levels should have the same terminal_time, got {terminal_times}")
+
+        self.p_time_var_val = model.p_time_var_val
+        self.solvers: List[NosnocSolver] = []
+        for level, opts in enumerate(opts_levels):
+            opts = deepcopy(opts)
+            if level > 0:
+                opts.initialization_strategy = InitializationStrategy.EXTERNAL
+                if sigma_0_fine is not None:
+                    opts.sigma_0 = sigma_0_fine
+            model_level = deepcopy(model)
+            if self.p_time_var_val is not None:
+                model_level.p_time_var_val = self._get_p_time_var_level(self.p_time_var_val,
+                                                                        opts.N_stages)
+            self.solvers.append(NosnocSolver(opts, model_level, deepcopy(ocp)))
+
+    @staticmethod
+    def _get_p_time_var_level(p_time_var_val: np.ndarray, N_stages: int) -> np.ndarray:
+        # value of the stage containing the middle of each control stage of the level
+        n_fine = p_time_var_val.shape[0]
+        idx = ((np.arange(N_stages) + 0.5) * n_fine / N_stages).astype(int)
+        return p_time_var_val[idx, :]
+
+    def set(self, field: str, value: np.ndarray) -> None:
+        """
+        Set values on all levels.
+
+        :param field: in ["x0", "p_global", "p_time_var"], p_time_var of shape
+            (N_stages, n_p_time_var) of the finest level.
+        :param value: np.ndarray: numerical value of appropriate size
+        """
+        if field in ["x0", "p_global"]:
+            for solver in self.solvers:
+                solver.set(field, value)
+        elif field == "p_time_var":
+            for solver in self.solvers:
+                solver.set(field, self._get_p_time_var_level(value, solver.opts.N_stages))
+        else:
+            raise NotImplementedError(
+                f"set for field {field} is not supported by NosnocMultilevelSolver")
+
+    def solve(self) -> dict:
+        """
+        Solves all levels, from coarse to fine.
+
+        :return: results of the finest level with the additional fields
+            "multilevel": a list with "N_stages", "Nfe_list", "n_s", "cpu_time" (of prolongation and
+            solve), "nlp_iter" (total IPOPT iterations), "n_homotopy_iter" and "status" per level,
+            "cpu_time_total": the sum of the level CPU times.
+        """
+        levels = []
+        solver_prev = None
+        results = None
+        for solver in self.solvers:
+            t = time.process_time()
+            if solver_prev is not None:
+                prolongate_solution(solver.problem, solver_prev.problem, results)
+            results = solver.solve()
+            cpu_time = time.process_time() - t
+            nlp_iter = [n for n in results["nlp_iter"] if n is not None]
+            levels.append({
+                "N_stages": solver.opts.N_stages,
+                "Nfe_list": list(solver.opts.Nfe_list),
+                "n_s": solver.opts.n_s,
+                "cpu_time": cpu_time,
+                "nlp_iter": int(np.sum(nlp_iter)),
+                "n_homotopy_iter": len(nlp_iter),
+                "status": results["status"],
+            })
+            solver_prev = solver
+
+        results["multilevel"] = levels
+        results["cpu_time_total"] = sum(level["cpu_time"] for level in levels)
+        return results
@@ -1,5 +1,6 @@
 from typing import Union, Optional
 from dataclasses import dataclass, field
+import warnings
 
 import numpy as np
 
@@ -14,6 +15,18 @@ def _assign(dictionary, keys, value):
         dictionary[key] = value
 
 
+#: homotopy schedules (sigma_0, homotopy_update_slope) that differ from the defaults,
+#: see NosnocOpts.set_recommended_homotopy_schedule()
+RECOMMENDED_HOMOTOPY_SCHEDULES = {
+    # start with a small penalty 1/sigma_0
+    MpccMode.L1_PENALTY: (1e2, 0.1),
+    # the relaxations bound min(w_1, w_2) by sigma, start close to complementarity and decrease fast
+    MpccMode.KANZOW_SCHWARTZ: (1e-1, 1e-2),
+    # no schedule for MpccMode.STEFFENSEN_ULBRICH: none of the tested schedules
+    # avoided local infeasibility of IPOPT, see MpccMode.
+}
+
+
 @dataclass
 class NosnocOpts:
 
@@ -34,6 +47,21 @@ class NosnocOpts:
     cross_comp_mode: CrossComplementarityMode = CrossComplementarityMode.SUM_LAMBDAS_COMPLEMENT_WITH_EVERY_THETA
     mpcc_mode: MpccMode = MpccMode.SCHOLTES_INEQ
     constraint_handling: ConstraintHandling = ConstraintHandling.EXACT
+    #: LEAST_SQUARES: use a Gauss-Newton Hessian of the least squares term in IPOPT
+    gauss_newton_hessian: bool = False
+    #: scale variables and constraints of the NLP based on the initial guess, bounds and constraint
+    #: Jacobian, transparent to the user, see NosnocProblem.compute_scaling.
+    automatic_scaling: bool = False
+    #: substitute fixed variables and eliminate singleton equality constraints before every NLP solve,
+    #: see PresolvedNlpSolver.
+    presolve: bool = False
+    #: evaluate the constraints of structurally identical finite elements with one mapped casadi.Function,
+    #: see NosnocProblem.create_mapped_g. Note: in all measurements so far (single core), the derivatives
+    #: of the mapped MX graph were 10-30x slower than the default SX ones, and the NLP solve slower
+    #: overall, see benchmarks/benchmark_map_finite_elements.py.
+    map_finite_elements: bool = False
+    parallelization: str = 'serial'  #: casadi map parallelization: 'serial', 'openmp' or 'thread'
+    n_threads: int = 1  #: maximum number of threads used by the mapped functions
 
     pss_mode: PssMode = PssMode.STEWART  # possible options: Stewart and Step
 
@@ -41,6 +69,19 @@ class NosnocOpts:
     gamma_h: float = 1.0
 
     smoothing_parameter: float = 1e1  #: used for smoothed Step representation
+    #: depth of multi-affine terms in the Step representation, that are lifted into auxiliary
+    #: algebraic variables, 0 -> no lifting.
+    n_depth_step_lifting: int = 0
+    #: split F, c, S into the finest set of independent subsystems (n_sys) in preprocessing,
+    #: see FESD: "Remark on Cartesian products of Filippov systems"
+    decompose_subsystems: bool = False
+    #: remove regions of the Stewart representation that are empty within the state bounds,
+    #: detected via LPs on the affine switching functions.
+    prune_empty_regions: bool = False
+    #: STEWART: substitute lambda = g_Stewart(x) + mu, instead of using lambda as variables.
+    eliminate_lambda: bool = False
+    #: order variables and constraints of the NLP per control stage, see NosnocProblem.stage_boundaries_w
+    stagewise_ordering: bool = False
     # used in InitializationStrategy.RK4_smoothed
     fix_active_set_fe0: bool = False
 
@@ -54,6 +95,17 @@ class NosnocOpts:
     homotopy_update_slope: float = 0.1
     homotopy_update_exponent: float = 1.5
     homotopy_update_rule: HomotopyUpdateRule = HomotopyUpdateRule.LINEAR
+    #: start every homotopy iteration but the first from a first-order prediction of the solution at the
+    #: new sigma, based on the tangent dw/dsigma of the previous solution, see
+    #: NosnocSolver.compute_homotopy_tangent(). The prediction is only used if it reduces the
+    #: constraint violation compared to the previous solution.
+    homotopy_predictor: bool = False
+    #: start the homotopy at the smallest sigma of the schedule that is not smaller than the
+    #: complementarity residual of the initial guess, e.g. with InitializationStrategy.EXTERNAL or
+    #: ALL_XCURRENT_WOPT_PREV. If iterations are skipped in this way, i.e. the solve is warm started,
+    #: skip ahead in the same way after every homotopy iteration, cold starts run the full schedule.
+    #: The number of skipped iterations is returned in results["homotopy_iter_skipped"].
+    homotopy_warm_start: bool = False
 
     # step equilibration
     step_equilibration: StepEquilibrationMode = StepEquilibrationMode.HEURISTIC_DELTA
@@ -67,6 +119,12 @@ class NosnocOpts:
     # polishing step
     do_polishing_step: bool = False
 
+    #: after a successful solve, fix the active modes of all finite elements and solve subsequent
+    #: problems as one smooth NLP without complementarity constraints, until the sign check of the
+    #: switching functions fails, see NosnocProblem.get_switching_sequence()
+    fixed_switching_sequence: bool = False
+    fixed_switching_sequence_tol: float = 1e-3  #: threshold of the mode detection and sign check
+
     # OCP only
     N_stages: int = 1
     equidistant_control_grid: bool = True  # NOTE: tested in test_ocp
@@ -106,6 +164,8 @@ class NosnocOpts:
     opts_casadi_nlp["record_time"] = True
     # opts_casadi_nlp['ipopt']['linear_solver'] = 'ma27'
     # opts_casadi_nlp['ipopt']['linear_solver'] = 'ma57'
+    #: file with IPOPT options tuned by autotune_linear_solver(), applied if the problem fingerprint matches.
+    linear_solver_tuning_file: Optional[str] = None
 
     time_freezing: bool = False
     time_freezing_tolerance: float = 1e-3
@@ -117,6 +177,19 @@ class NosnocOpts:
 
     rootfinder_for_initial_z: bool = False
 
+    # solution cache for repeated solves, see NosnocSolutionCache
+    use_solution_cache: bool = False
+    solution_cache_tol: float = 0.0  #: quantization of parameter values in cache key, 0.0 -> exact
+    solution_cache_max_entries: int = 100
+    solution_cache_max_bytes: int = 100 * 2**20
+    solution_cache_file: Optional[str] = None  #: if given, cache is persisted to this file
+    #: minimum time in seconds between two writes of solution_cache_file, see NosnocSolutionCache.flush
+    solution_cache_save_interval: float = 10.0
+
+    # used in InitializationStrategy.WARM_START_DATABASE
+    warm_start_db_max_size: int = 1000  #: maximum number of stored solutions
+    warm_start_db_k: int = 3  #: number of nearest solutions that are blended
+
     # Usabillity:
     nlp_max_iter = property(
         fget=lambda s: s.opts_casadi_nlp["ipopt"]["max_iter"],
@@ -130,6 +203,11 @@ class NosnocOpts:
             out += f"{k} : {v}\n"
         return out
 
+    def set_recommended_homotopy_schedule(self) -> None:
+        """Set sigma_0 and homotopy_update_slope to the values recommended for self.mpcc_mode."""
+        self.sigma_0, self.homotopy_update_slope = RECOMMENDED_HOMOTOPY_SCHEDULES.get(
+            self.mpcc_mode, (NosnocOpts.sigma_0, NosnocOpts.homotopy_update_slope))
+
     def preprocess(self):
         # IPOPT tol should be smaller than outer tol, but not too much
         # Note IPOPT option list: https://coin-or.github.io/Ipopt/OPTIONS.html
@@ -186,6 +264,43 @@ class NosnocOpts:
             Warning(
                 "UNSUPPORTED option combination: StepEquilibrationMode.DIRECT* and constraint_handling != ConstraintHandling.LEAST_SQUARES"
             )
+        if self.gauss_newton_hessian and self.constraint_handling != ConstraintHandling.LEAST_SQUARES:
+            raise ValueError("gauss_newton_hessian is only supported with ConstraintHandling.LEAST_SQUARES.")
+        if self.gauss_newton_hessian and self.automatic_scaling:
+            raise NotImplementedError("automatic_scaling is not implemented with gauss_newton_hessian.")
+        if self.presolve and (self.automatic_scaling or self.gauss_newton_hessian):
+            raise NotImplementedError("presolve is not implemented with automatic_scaling or gauss_newton_hessian.")
+        if self.map_finite_elements and (self.presolve or self.automatic_scaling or self.gauss_newton_hessian):
+            raise NotImplementedError(
+                "map_finite_elements is not implemented with presolve, automatic_scaling or gauss_newton_hessian.")
+        if (self.mpcc_mode
+                in [MpccMode.L1_PENALTY, MpccMode.KANZOW_SCHWARTZ, MpccMode.STEFFENSEN_ULBRICH]
+                and self.step_equilibration == StepEquilibrationMode.DIRECT_COMPLEMENTARITY):
+            raise NotImplementedError(
+                f"{self.mpcc_mode} requires nonnegative complementarity pairs, "
+                "it is not implemented with StepEquilibrationMode.DIRECT_COMPLEMENTARITY.")
+        if self.mpcc_mode == MpccMode.STEFFENSEN_ULBRICH:
+            warnings.warn("MpccMode.STEFFENSEN_ULBRICH is experimental, IPOPT often fails on its relaxed "
+                          "feasible set. Use MpccMode.SCHOLTES_INEQ or MpccMode.KANZOW_SCHWARTZ instead.")
+        if self.fixed_switching_sequence:
+            if self.pss_mode == PssMode.STEWART and self.eliminate_lambda:
+                raise NotImplementedError("fixed_switching_sequence is not implemented with eliminate_lambda.")
+            if (self.constraint_handling != ConstraintHandling.EXACT or self.mpcc_mode in [
+                    MpccMode.ELASTIC_EQ, MpccMode.ELASTIC_INEQ, MpccMode.ELASTIC_TWO_SIDED, MpccMode.BOOLEAN
+            ]):
+                raise NotImplementedError(
+                    "fixed_switching_sequence is only implemented with ConstraintHandling.EXACT "
+                    "and non-elastic, non-boolean mpcc_mode.")
+            if self.presolve or self.automatic_scaling or self.map_finite_elements:
+                raise NotImplementedError(
+                    "fixed_switching_sequence is not implemented with presolve, automatic_scaling or "
+                    "map_finite_elements.")
+        if self.parallelization not in ['serial', 'openmp', 'thread']:
+            raise ValueError(f"parallelization should be 'serial', 'openmp' or 'thread', got {self.parallelization}")
+        if self.n_threads < 1:
+            raise ValueError(f"n_threads should be >= 1, got {self.n_threads}")
+        if self.n_depth_step_lifting < 0 or self.n_depth_step_lifting == 1:
+            raise ValueError("n_depth_step_lifting should be 0 (no lifting) or >= 2.")
         return
 
     ## Options in matlab..
@@ -211,7 +326,6 @@ class NosnocOpts:
     # time_freezing_quadrature_state = 0 # make a nonsmooth quadrature state to integrate only if physical time is running
 
     ## Some Nosnoc options that are not relevant here (yet)
-    # n_depth_step_lifting = 2; # it is not recomended to change this (increase nonlinearity and harms convergenc), depth is number of multilinar terms to wich a lifting variables is equated to.
 
     # # Default opts for the barrier tuned penalty/slack variables for mpcc modes 8 do 10.
     # rho_penalty = 1e1;
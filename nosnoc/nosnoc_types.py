@@ -19,6 +19,23 @@ class MpccMode(Enum):
     `ELASTIC_EQ`:   w_1^T w_2 - s_elastic * np.ones((n, 1)) == 0
     `ELASTIC_TWO_SIDED`: w_1^T w_2 - s_elastic * np.ones((n, 1)) <= 0
                          w_1^T w_2 + s_elastic * np.ones((n, 1)) >= 0
+
+    `L1_PENALTY`: 1/sigma * sum(w_1^T w_2) is added to the cost, no constraints.
+    This is an exact penalty for nonnegative w_1, w_2, i.e. the homotopy loop, which is a penalty loop
+    in this case, terminates with a complementarity residual below opts.comp_tol at a finite penalty.
+
+    `KANZOW_SCHWARTZ`: phi_KS(w_1, w_2) <= 0 with
+        phi_KS(a, b) = (a - sigma) * (b - sigma)                    if a + b >= 2 * sigma
+                       -((a - sigma)**2 + (b - sigma)**2) / 2       otherwise
+    `STEFFENSEN_ULBRICH`: w_1 + w_2 - phi_SU(w_1 - w_2) <= 0 with
+        phi_SU(z) = |z|                                             if |z| >= sigma
+                    sigma * (2/pi * sin(z/sigma * pi/2 + 3pi/2) + 1)  otherwise
+    Both relaxations bound min(w_1, w_2) by sigma instead of w_1 * w_2 and keep the feasible set
+    of the MPCC for all sigma > 0.
+    Note: STEFFENSEN_ULBRICH is experimental. Away from the origin, its relaxed set equals the MPCC
+    feasible set, i.e. it has no interior there. IPOPT often ends in local infeasibility, and
+    on the oscillator and irma examples wrong trajectories were obtained,
+    see benchmarks/benchmark_mpcc_relaxations.py.
     """
     SCHOLTES_INEQ = auto()
     SCHOLTES_EQ = auto()
@@ -28,7 +45,9 @@ class MpccMode(Enum):
     ELASTIC_EQ = auto()
     ELASTIC_TWO_SIDED = auto()
     BOOLEAN = auto()
-    # KANZOW_SCHWARTZ = auto()
+    L1_PENALTY = auto()
+    KANZOW_SCHWARTZ = auto()
+    STEFFENSEN_ULBRICH = auto()
     # NOSNOC: 'scholtes_ineq' (3), 'scholtes_eq' (2)
     # NOTE: tested in simple_sim_tests
 
@@ -44,6 +63,7 @@ class InitializationStrategy(Enum):
     ALL_XCURRENT_WOPT_PREV = auto()
     EXTERNAL = auto()  # let user do from outside
     RK4_SMOOTHENED = auto()  # experimental
+    WARM_START_DATABASE = auto()  # blend of nearest stored solutions, see NosnocWarmStartDatabase
     # Other ideas
     # OLD_SOLUTION = auto()
     # lp_initialization
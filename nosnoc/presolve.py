@@ -0,0 +1,197 @@
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+import scipy.sparse as sp
+import casadi as ca
+
+from nosnoc.utils import casadi_length
+
+#: maximum number of reduced NLP solvers kept in memory
+PRESOLVE_MAX_SOLVERS = 10
+
+
+class PresolvedNlpSolver:
+    """
+    Wrapper around a casadi nlpsol with the same call interface, which presolves the NLP before every call:
+
+    - variables with lbx == ubx are substituted by their value,
+    - equality constraints that are affine in their only free variable are solved for it, which is then
+      substituted as well, repeated until no more constraints can be eliminated,
+    - constraints that only depend on substituted variables are removed.
+
+    A reduced nlpsol is created and cached for every pattern of substituted variables and removed constraints.
+    If the reduced NLP has more equality constraints than variables, which IPOPT rejects, or a removed constraint
+    is violated by the substituted values, the full NLP is solved.
+    The solution, constraint values and multipliers of the full NLP are recovered from the reduced solution,
+    the multipliers of eliminated constraints and fixed variables via the stationarity condition of the full NLP.
+    """
+
+    def __init__(self, name: str, w: ca.SX, p: ca.SX, f: ca.SX, g: ca.SX, opts_casadi_nlp: dict,
+                 tol: float = 1e-10):
+        self.name = name
+        self.opts_casadi_nlp = opts_casadi_nlp
+        self.tol = tol
+        self.n_w = casadi_length(w)
+        self.n_g = casadi_length(g)
+        self.n_p = casadi_length(p)
+
+        jac_g = ca.jacobian(g, w)
+        self.f_g_fun = ca.Function('f_g_fun', [w, p], [f, g])
+        self.jac_g_fun = ca.Function('jac_g_fun', [w, p], [jac_g])
+        self.grad_f_fun = ca.Function('grad_f_fun', [w, p], [ca.gradient(f, w)])
+
+        # structure of the constraint Jacobian, with the nonzeros in CSR order
+        rows, cols = jac_g.sparsity().get_triplet()
+        rows = np.array(rows, dtype=int)
+        cols = np.array(cols, dtype=int)
+        self.jac_pattern = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(self.n_g, self.n_w))
+        # nonzero k of the Jacobian is affine in its column variable, if it does not depend on it.
+        jac_nz = ca.vertcat(*jac_g.nonzeros()) if len(rows) else ca.SX(0, 1)
+        nz_rows, nz_cols = ca.jacobian_sparsity(jac_nz, w).get_triplet()
+        nonlinear = set(k for k, j in zip(nz_rows, nz_cols) if j == cols[k])
+        self.affine = sp.csr_matrix(
+            (np.array([k not in nonlinear for k in range(len(rows))], dtype=float), (rows, cols)),
+            shape=(self.n_g, self.n_w))
+
+        self.solvers: OrderedDict = OrderedDict()
+        self.last_solver = None
+        self.report: dict = dict()
+
+    def _presolve(self, x0, lbg, ubg, lbx, ubx, p):
+        fixed = lbx == ubx
+        w_val = x0.copy()
+        w_val[fixed] = lbx[fixed]
+        removed = np.zeros(self.n_g, dtype=bool)
+        eliminated = []
+        ind_eq = lbg == ubg
+        while True:
+            n_free = self.jac_pattern @ (~fixed).astype(float)
+            removed |= (n_free == 0)
+            candidates = np.where((n_free == 1) & ind_eq & ~removed)[0]
+            if len(candidates) == 0:
+                break
+            jac_g = self.jac_g_fun(w_val, p).sparse().tocsr()
+            g_val = self.f_g_fun(w_val, p)[1].full().flatten()
+            changed = False
+            for i in candidates:
+                row_cols = self.jac_pattern.indices[self.jac_pattern.indptr[i]:self.jac_pattern.indptr[i + 1]]
+                j = row_cols[~fixed[row_cols]]
+                if len(j) != 1:
+                    # fixed by another constraint in this pass
+                    continue
+                j = j[0]
+                a = jac_g[i, j]
+                if not self.affine[i, j] or abs(a) < self.tol:
+                    continue
+                value = w_val[j] + (lbg[i] - g_val[i]) / a
+                if value < lbx[j] - self.tol or value > ubx[j] + self.tol:
+                    continue
+                fixed[j] = True
+                w_val[j] = value
+                removed[i] = True
+                eliminated.append((i, j))
+                changed = True
+            if not changed:
+                break
+        return fixed, removed, eliminated, w_val
+
+    def _get_reduced_solver(self, fixed: np.ndarray, removed: np.ndarray):
+        key = hashlib.sha1(fixed.tobytes() + removed.tobytes()).hexdigest()
+        if key in self.solvers:
+            self.solvers.move_to_end(key)
+            return self.solvers[key]
+        ind_free = np.where(~fixed)[0]
+        ind_fixed = np.where(fixed)[0]
+        ind_keep = np.where(~removed)[0]
+
+        w_free = ca.SX.sym('w_free', len(ind_free))
+        w_fixed = ca.SX.sym('w_fixed', len(ind_fixed))
+        p = ca.SX.sym('p', self.n_p)
+        order = np.concatenate((ind_free, ind_fixed))
+        inv_order = np.empty_like(order)
+        inv_order[order] = np.arange(len(order))
+        w_full = ca.vertcat(w_free, w_fixed)[inv_order.tolist()]
+        f, g = self.f_g_fun(w_full, p)
+        nlp = {'x': w_free, 'p': ca.vertcat(p, w_fixed), 'f': f, 'g': g[ind_keep.tolist()]}
+        solver = ca.nlpsol(self.name, 'ipopt', nlp, self.opts_casadi_nlp)
+
+        self.solvers[key] = (solver, ind_free, ind_fixed, ind_keep)
+        if len(self.solvers) > PRESOLVE_MAX_SOLVERS:
+            self.solvers.popitem(last=False)
+        return self.solvers[key]
+
+    def __call__(self, x0, lbg, ubg, lbx, ubx, p) -> dict:
+        x0 = np.array(x0, dtype=float).flatten()
+        lbx = np.array(lbx, dtype=float).flatten()
+        ubx = np.array(ubx, dtype=float).flatten()
+        lbg = np.array(lbg, dtype=float).flatten()
+        ubg = np.array(ubg, dtype=float).flatten()
+        p = np.array(p, dtype=float).flatten()
+
+        fixed, removed, eliminated, w_val = self._presolve(x0, lbg, ubg, lbx, ubx, p)
+        overconstrained = np.sum(~removed & (lbg == ubg)) > np.sum(~fixed)
+        # removed constraints, which were not used for an elimination, are not seen by IPOPT
+        ind_check = removed.copy()
+        ind_check[[i for i, _ in eliminated]] = False
+        g_val = self.f_g_fun(w_val, p)[1].full().flatten()
+        violated = bool(np.any((g_val[ind_check] < lbg[ind_check] - self.tol) |
+                               (g_val[ind_check] > ubg[ind_check] + self.tol)))
+        if overconstrained or violated:
+            # IPOPT rejects the reduced NLP or it would ignore violated constraints,
+            # solve the full one, in which IPOPT treats fixed variables itself.
+            fixed = np.zeros(self.n_w, dtype=bool)
+            removed = np.zeros(self.n_g, dtype=bool)
+            eliminated = []
+            w_val = x0.copy()
+        solver, ind_free, ind_fixed, ind_keep = self._get_reduced_solver(fixed, removed)
+        self.last_solver = solver
+        self.report = {
+            "n_w": self.n_w,
+            "n_w_reduced": len(ind_free),
+            "n_g": self.n_g,
+            "n_g_reduced": len(ind_keep),
+            "n_eliminated": len(eliminated),
+            "n_fixed": len(ind_fixed) - len(eliminated),
+            "n_solvers": len(self.solvers),
+            "overconstrained": overconstrained,
+            "violated": violated,
+        }
+
+        sol = solver(x0=x0[ind_free],
+                     lbx=lbx[ind_free],
+                     ubx=ubx[ind_free],
+                     lbg=lbg[ind_keep],
+                     ubg=ubg[ind_keep],
+                     p=np.concatenate((p, w_val[ind_fixed])))
+
+        # recover solution of the full NLP
+        w = w_val.copy()
+        w[ind_free] = sol['x'].full().flatten()
+        lam_g = np.zeros(self.n_g)
+        lam_g[ind_keep] = sol['lam_g'].full().flatten()
+        lam_x = np.zeros(self.n_w)
+        lam_x[ind_free] = sol['lam_x'].full().flatten()
+        if len(ind_fixed):
+            # stationarity: grad_f + J^T lam_g + lam_x = 0
+            jac_g = self.jac_g_fun(w, p).sparse().tocsc()
+            grad_f = self.grad_f_fun(w, p).full().flatten()
+            for i, j in reversed(eliminated):
+                lam_g[i] = -(grad_f[j] + jac_g[:, j].T @ lam_g)[0] / jac_g[i, j]
+            ind_fixed_bounds = np.setdiff1d(ind_fixed, [j for _, j in eliminated])
+            lam_x[ind_fixed_bounds] = -(grad_f + jac_g.T @ lam_g)[ind_fixed_bounds]
+        g = self.f_g_fun(w, p)[1]
+
+        return {
+            'x': ca.DM(w),
+            'f': sol['f'],
+            'g': g,
+            'lam_x': ca.DM(lam_x),
+            'lam_g': ca.DM(lam_g),
+            'lam_p': sol['lam_p'][:self.n_p]
+        }
+
+    def stats(self) -> dict:
+        stats = self.last_solver.stats()
+        stats['presolve'] = self.report
+        return stats
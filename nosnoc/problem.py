@@ -1,6 +1,7 @@
 from typing import Optional, List
 from abc import ABC, abstractmethod
 from copy import copy
+import hashlib
 
 import numpy as np
 import casadi as ca
@@ -11,6 +12,33 @@ from nosnoc.nosnoc_types import MpccMode, CrossComplementarityMode, StepEquilibr
 from nosnoc.ocp import NosnocOcp
 from nosnoc.utils import casadi_length, casadi_vertcat_list, casadi_sum_list, flatten, increment_indices, create_empty_list_matrix
 
+# bounds on the automatic scaling factors
+SCALING_EPS = 1e-8
+SCALING_MIN = 1e-2
+SCALING_MAX = 1e2
+
+
+def _get_index_blocks(ind) -> list:
+    """Returns the innermost lists of integers of a nested index list."""
+    if len(ind) == 0:
+        return []
+    if all(isinstance(i, (int, np.integer)) for i in ind):
+        return [list(ind)]
+    blocks = []
+    for sub in ind:
+        if isinstance(sub, (int, np.integer)):
+            blocks.append([sub])
+        else:
+            blocks += _get_index_blocks(sub)
+    return blocks
+
+
+def _remap_indices(ind, new_index: np.ndarray):
+    """Returns the nested index list ind with every index i replaced by new_index[i]."""
+    if isinstance(ind, (int, np.integer)):
+        return int(new_index[ind])
+    return [_remap_indices(i, new_index) for i in ind]
+
 
 class NosnocFormulationObject(ABC):
 
@@ -104,42 +132,47 @@ class NosnocFormulationObject(ABC):
 
         n = casadi_length(y)
 
+        if opts.mpcc_mode == MpccMode.L1_PENALTY:
+            self.cost += ca.sum1(casadi_sum_list(x) * y) / sigma
+            return
+
         if opts.mpcc_mode in [MpccMode.SCHOLTES_EQ, MpccMode.SCHOLTES_INEQ]:
-            # g_comp = ca.diag(y) @ casadi_sum_list([x_i for x_i in x]) - sigma # this works too but is a bit slower.
-            g_comp = ca.diag(casadi_sum_list([x_i for x_i in x])) @ y - sigma
-            # NOTE: this line should be equivalent but yield different results
-            # g_comp = casadi_sum_list([ca.diag(x_i) @ y for x_i in x]) - sigma
+            # NOTE: casadi_sum_list([x_i * y for x_i in x]) should be equivalent but yields different results
+            g_comp = casadi_sum_list(x) * y - sigma
         elif opts.mpcc_mode in [MpccMode.ELASTIC_EQ, MpccMode.ELASTIC_INEQ]:
-            g = ca.diag(casadi_sum_list([x_i for x_i in x])) @ y
+            g = casadi_sum_list(x) * y
             g_comp = g - s_elastic * np.ones((n, 1))
         elif opts.mpcc_mode == MpccMode.ELASTIC_TWO_SIDED:
-            g = ca.diag(casadi_sum_list([x_i for x_i in x])) @ y
+            g = casadi_sum_list(x) * y
             g_comp = ca.vertcat(
                 g - s_elastic * np.ones((n, 1)),
                 g + s_elastic * np.ones((n, 1))
             )
+        elif opts.mpcc_mode == MpccMode.KANZOW_SCHWARTZ:
+            a = casadi_sum_list(x) - sigma
+            b = y - sigma
+            g_comp = ca.if_else(a + b >= 0, a * b, -(a**2 + b**2) / 2)
+        elif opts.mpcc_mode == MpccMode.STEFFENSEN_ULBRICH:
+            a = casadi_sum_list(x)
+            z = a - y
+            theta = 2 / np.pi * ca.sin(z / sigma * np.pi / 2 + 3 * np.pi / 2) + 1
+            phi = ca.if_else(ca.fabs(z) >= sigma, ca.fabs(z), sigma * theta)
+            g_comp = a + y - phi
         elif opts.mpcc_mode == MpccMode.FISCHER_BURMEISTER:
-            g_comp = ca.SX.zeros(n, 1)
-            for j in range(n):
-                for x_i in x:
-                    g_comp[j] += x_i[j] + y[j] - ca.sqrt(x_i[j]**2 + y[j]**2 + sigma**2)
+            g_comp = casadi_sum_list([x_i + y - ca.sqrt(x_i**2 + y**2 + sigma**2) for x_i in x])
         elif opts.mpcc_mode == MpccMode.FISCHER_BURMEISTER_IP_AUG:
             if len(x) != 1:
                 raise Exception("not supported")
-            g_comp = ca.SX.zeros(4 * n, 1)
+            x_0 = x[0]
             # classic FB
-            for j in range(n):
-                for x_i in x:
-                    g_comp[j] += x_i[j] + y[j] - ca.sqrt(x_i[j]**2 + y[j]**2 + sigma**2)
-            # augment 1
-            for j in range(n):
-                for x_i in x:
-                    g_comp[j + n] = opts.fb_ip_aug1_weight * (x_i[j] - sigma) * ca.sqrt(tau)
-                g_comp[j + 2 * n] = opts.fb_ip_aug1_weight * (y[j] - sigma) * ca.sqrt(tau)
-            # augment 2
-            for j in range(n):
-                for x_i in x:
-                    g_comp[j + 3 * n] = opts.fb_ip_aug2_weight * (g_comp[j]) * ca.sqrt(1 + (x_i[j] - y[j])**2)
+            g_fb = x_0 + y - ca.sqrt(x_0**2 + y**2 + sigma**2)
+            g_comp = ca.vertcat(
+                g_fb,
+                # augment 1
+                opts.fb_ip_aug1_weight * (x_0 - sigma) * ca.sqrt(tau),
+                opts.fb_ip_aug1_weight * (y - sigma) * ca.sqrt(tau),
+                # augment 2
+                opts.fb_ip_aug2_weight * g_fb * ca.sqrt(1 + (x_0 - y)**2))
         elif opts.mpcc_mode == MpccMode.BOOLEAN:
             bigM = 1e5
             n_z = y.numel()
@@ -155,7 +188,10 @@ class NosnocFormulationObject(ABC):
             )
 
         n_comp = casadi_length(g_comp)
-        if opts.mpcc_mode in [MpccMode.SCHOLTES_INEQ, MpccMode.ELASTIC_INEQ]:
+        if opts.mpcc_mode in [
+                MpccMode.SCHOLTES_INEQ, MpccMode.ELASTIC_INEQ, MpccMode.KANZOW_SCHWARTZ,
+                MpccMode.STEFFENSEN_ULBRICH
+        ]:
             lb_comp = -np.inf * np.ones((n_comp,))
             ub_comp = np.zeros((n_comp,))
         elif opts.mpcc_mode in [
@@ -264,6 +300,7 @@ class FiniteElement(FiniteElementBase):
         self.ind_alpha = create_empty_list_matrix((n_s, dims.n_sys))
         self.ind_lambda_n = create_empty_list_matrix((n_s + end_allowance, dims.n_sys))
         self.ind_lambda_p = create_empty_list_matrix((n_s + end_allowance, dims.n_sys))
+        self.ind_beta = create_empty_list_matrix((n_s,))
         self.ind_z = create_empty_list_matrix((n_s,))
         self.ind_h = []
 
@@ -281,7 +318,8 @@ class FiniteElement(FiniteElementBase):
         else:
             self.h = h0
 
-        if opts.mpcc_mode in [MpccMode.SCHOLTES_EQ, MpccMode.SCHOLTES_INEQ, MpccMode.ELASTIC_INEQ, MpccMode.ELASTIC_EQ]:
+        if opts.mpcc_mode in [MpccMode.SCHOLTES_EQ, MpccMode.SCHOLTES_INEQ, MpccMode.ELASTIC_INEQ, MpccMode.ELASTIC_EQ,
+                              MpccMode.L1_PENALTY, MpccMode.KANZOW_SCHWARTZ, MpccMode.STEFFENSEN_ULBRICH]:
             lb_dual = 0.0
         else:
             lb_dual = -np.inf
@@ -311,14 +349,15 @@ class FiniteElement(FiniteElementBase):
                         initial_theta,
                         ii, ij)
                 # add lambdas
-                for ij in range(dims.n_sys):
-                    initial_lambda = (opts.sigma_0/dims.n_f_sys[ij]) * np.ones(dims.n_f_sys[ij])
-                    self.add_variable(
-                        ca.SX.sym(f'lambda_{ctrl_idx}_{fe_idx}_{ii+1}_{ij+1}', dims.n_f_sys[ij]),
-                        self.ind_lam, lb_dual * np.ones(dims.n_f_sys[ij]),
-                        np.inf * np.ones(dims.n_f_sys[ij]),
-                        initial_lambda,
-                        ii, ij)
+                if not opts.eliminate_lambda:
+                    for ij in range(dims.n_sys):
+                        initial_lambda = (opts.sigma_0/dims.n_f_sys[ij]) * np.ones(dims.n_f_sys[ij])
+                        self.add_variable(
+                            ca.SX.sym(f'lambda_{ctrl_idx}_{fe_idx}_{ii+1}_{ij+1}', dims.n_f_sys[ij]),
+                            self.ind_lam, lb_dual * np.ones(dims.n_f_sys[ij]),
+                            np.inf * np.ones(dims.n_f_sys[ij]),
+                            initial_lambda,
+                            ii, ij)
                 # add mu
                 for ij in range(dims.n_sys):
                     self.add_variable(ca.SX.sym(f'mu_{ctrl_idx}_{fe_idx}_{ii+1}_{ij+1}', 1),
@@ -346,6 +385,12 @@ class FiniteElement(FiniteElementBase):
                                   dims.n_c_sys[ij]), self.ind_lambda_p,
                         lb_dual * np.ones(dims.n_c_sys[ij]), np.inf * np.ones(dims.n_c_sys[ij]),
                         .5 * np.ones(dims.n_c_sys[ij]), ii, ij)
+                # add lifting variables of multi-affine terms
+                if dims.n_beta > 0:
+                    self.add_variable(
+                        ca.SX.sym(f'beta_{ctrl_idx}_{fe_idx}_{ii+1}', dims.n_beta), self.ind_beta,
+                        -np.inf * np.ones(dims.n_beta), np.inf * np.ones(dims.n_beta),
+                        model.beta0, ii)
             # user algebraic variables
             self.add_variable(
                 ca.SX.sym(f'z_{ctrl_idx}_{fe_idx}_{ii+1}', dims.n_z), self.ind_z,
@@ -356,13 +401,14 @@ class FiniteElement(FiniteElementBase):
         if create_right_boundary_point:
             if opts.pss_mode == PssMode.STEWART:
                 # add lambdas
-                for ij in range(dims.n_sys):
-                    initial_lambda = (opts.sigma_0/dims.n_f_sys[ij]) * np.ones(dims.n_f_sys[ij])
-                    self.add_variable(
-                        ca.SX.sym(f'lambda_{ctrl_idx}_{fe_idx}_end_{ij+1}', dims.n_f_sys[ij]),
-                        self.ind_lam, lb_dual * np.ones(dims.n_f_sys[ij]),
-                        np.inf * np.ones(dims.n_f_sys[ij]),
-                        initial_lambda, opts.n_s, ij)
+                if not opts.eliminate_lambda:
+                    for ij in range(dims.n_sys):
+                        initial_lambda = (opts.sigma_0/dims.n_f_sys[ij]) * np.ones(dims.n_f_sys[ij])
+                        self.add_variable(
+                            ca.SX.sym(f'lambda_{ctrl_idx}_{fe_idx}_end_{ij+1}', dims.n_f_sys[ij]),
+                            self.ind_lam, lb_dual * np.ones(dims.n_f_sys[ij]),
+                            np.inf * np.ones(dims.n_f_sys[ij]),
+                            initial_lambda, opts.n_s, ij)
                 # add mu
                 for ij in range(dims.n_sys):
                     self.add_variable(ca.SX.sym(f'mu_{ctrl_idx}_{fe_idx}_end_{ij+1}', 1),
@@ -390,6 +436,38 @@ class FiniteElement(FiniteElementBase):
             self.add_variable(ca.SX.sym(f'X_end_{ctrl_idx}_{fe_idx+1}', dims.n_x), self.ind_x,
                               ocp.lbx, ocp.ubx, model.x0, -1)
 
+        self.lb_dual = lb_dual
+        self._lambda_stewart = None
+
+    def eliminate_lambda(self) -> bool:
+        return self.opts.pss_mode == PssMode.STEWART and self.opts.eliminate_lambda
+
+    def get_lambda_stewart(self) -> list:
+        """
+        returns the expressions lambda = g_Stewart(x) + mu for each stage and subsystem,
+        used instead of lambda variables if opts.eliminate_lambda.
+        """
+        if self._lambda_stewart is None:
+            n_f_sys = self.model.dims.n_f_sys
+            X_fe = self.X_fe()
+            self._lambda_stewart = []
+            for stage in range(len(self.ind_lam)):
+                x = X_fe[stage] if stage < self.opts.n_s else self.w[self.ind_x[-1]]
+                mu = self.w[flatten(self.ind_mu[stage])]
+                lam = self.model.lambda_stewart_fun(x, mu, self.p)
+                self._lambda_stewart.append(
+                    ca.vertsplit(lam, np.cumsum([0] + n_f_sys).tolist()))
+        return self._lambda_stewart
+
+    def Lambda(self, stage=slice(None), sys=slice(None)):
+        if not self.eliminate_lambda():
+            return super().Lambda(stage, sys)
+        lambdas = self.get_lambda_stewart()
+        stages = lambdas[stage] if isinstance(stage, slice) else [lambdas[stage]]
+        return casadi_vertcat_list([
+            casadi_vertcat_list(lam[sys] if isinstance(sys, slice) else [lam[sys]]) for lam in stages
+        ])
+
     def add_step_size_variable(self, symbolic: ca.SX, lb: float, ub: float, initial: float):
         self.ind_h = [casadi_length(self.w)]
         self.w = ca.vertcat(self.w, symbolic)
@@ -403,7 +481,7 @@ class FiniteElement(FiniteElementBase):
         idx = np.concatenate((flatten(self.ind_theta[stage]), flatten(self.ind_lam[stage]),
                               flatten(self.ind_mu[stage]), flatten(self.ind_alpha[stage]),
                               flatten(self.ind_lambda_n[stage]), flatten(self.ind_lambda_p[stage]),
-                              self.ind_z[stage]))
+                              self.ind_beta[stage], self.ind_z[stage]))
         return self.w[idx]
 
     def Theta(self, stage=slice(None), sys=slice(None)) -> ca.SX:
@@ -450,6 +528,9 @@ class FiniteElement(FiniteElementBase):
     def forward_simulation(self, ocp: NosnocOcp, Uk: ca.SX, sot: ca.SX) -> None:
         opts = self.opts
         model = self.model
+        # kept for get_collocation_defect()
+        self.Uk = Uk
+        self.sot = sot
 
         # setup X_fe: list of x values on fe, initialize X_end
         X_fe = self.X_fe()
@@ -504,6 +585,13 @@ class FiniteElement(FiniteElementBase):
                 gqj = ocp.g_path_fun(X_fe[j], Uk, self.p, model.v_global)
                 self.add_constraint(gqj, ocp.lbg, ocp.ubg)
 
+        # lambda = g_Stewart(x) + mu, lower bounds as for the lambda variables
+        if self.eliminate_lambda() and not np.isinf(self.lb_dual):
+            for stage in range(len(self.ind_lam)):
+                lam = self.Lambda(stage=stage)
+                n_lam = casadi_length(lam)
+                self.add_constraint(lam, lb=self.lb_dual * np.ones(n_lam), ub=np.inf * np.ones(n_lam))
+
         # g_z_all constraint for boundary point and continuity of algebraic variables.
         if not opts.right_boundary_point_explicit and opts.use_fesd:
             self.add_constraint(
@@ -530,6 +618,46 @@ class FiniteElement(FiniteElementBase):
                 comp_vec = ca.vertcat(comp_vec, theta*lam)
         return comp_vec
 
+    def get_collocation_defect(self) -> ca.SX:
+        """
+        Local error estimate of the finite element: the defect h * dx/dt - h * f(x, z) of the
+        collocation polynomial in the midpoints between the collocation points, using the
+        algebraic variables of the following collocation point.
+        Without FESD, the jump h * (f(x, z) - f(x, z_prev)) between the active modes at the start
+        of the finite element is appended, which is nonzero if a switch happened in the previous
+        finite element.
+        Only available after forward_simulation().
+        """
+        opts = self.opts
+        model = self.model
+        x_prev = self.prev_fe.w[self.prev_fe.ind_x[-1]]
+        # irk_time_points includes 0 for IrkRepresentation.INTEGRAL
+        tau = np.concatenate((np.zeros(1), opts.irk_time_points[-opts.n_s:]))
+        X = [x_prev] + self.X_fe()[:opts.n_s]
+
+        defect = []
+        for j in range(opts.n_s):
+            tau_mid = (tau[j] + tau[j + 1]) / 2
+            x_mid = 0
+            dx_mid = 0
+            for k in range(opts.n_s + 1):
+                basis = np.poly1d([1.0])
+                for r in range(opts.n_s + 1):
+                    if r != k:
+                        basis *= np.poly1d([1.0, -tau[r]]) / (tau[k] - tau[r])
+                x_mid += basis(tau_mid) * X[k]
+                dx_mid += basis.deriv()(tau_mid) * X[k]
+            f_mid = self.sot * model.f_x_fun(x_mid, self.rk_stage_z(j), self.Uk, self.p,
+                                             model.v_global)
+            defect.append(dx_mid - self.h * f_mid)
+
+        if not opts.use_fesd and isinstance(self.prev_fe, FiniteElement):
+            f_x = model.f_x_fun(x_prev, self.rk_stage_z(-1), self.Uk, self.p, model.v_global)
+            f_x_prev = model.f_x_fun(x_prev, self.prev_fe.rk_stage_z(-1), self.Uk, self.p,
+                                     model.v_global)
+            defect.append(self.h * self.sot * (f_x - f_x_prev))
+        return ca.vertcat(*defect)
+
     def create_complementarity_constraints(self, sigma_p: ca.SX, tau: ca.SX, Uk: ca.SX, s_elastic: ca.SX) -> None:
         opts = self.opts
         X_fe = self.X_fe()
@@ -668,6 +796,7 @@ class NosnocProblem(NosnocFormulationObject):
         self._add_primal_vector(fe.w, fe.lbw, fe.ubw, fe.w0)
 
         # update all indices
+        self.ind_w_fe[ctrl_idx].append(list(range(w_len, casadi_length(self.w))))
         self.ind_h.extend(increment_indices(fe.ind_h, w_len))
         self.ind_x[ctrl_idx].append(increment_indices(fe.ind_x, w_len))
         self.ind_x_cont[ctrl_idx].append(increment_indices(fe.ind_x[-1], w_len))
@@ -678,6 +807,7 @@ class NosnocProblem(NosnocFormulationObject):
         self.ind_alpha[ctrl_idx].append(increment_indices(fe.ind_alpha, w_len))
         self.ind_lambda_n[ctrl_idx].append(increment_indices(fe.ind_lambda_n, w_len))
         self.ind_lambda_p[ctrl_idx].append(increment_indices(fe.ind_lambda_p, w_len))
+        self.ind_beta[ctrl_idx].append(increment_indices(fe.ind_beta, w_len))
         self.ind_z[ctrl_idx].append(increment_indices(fe.ind_z, w_len))
         self.ind_bool[ctrl_idx].append(increment_indices(fe.ind_bool, w_len))
 
@@ -700,6 +830,7 @@ class NosnocProblem(NosnocFormulationObject):
         g_len = casadi_length(self.g)
         self.add_constraint(fe.g, fe.lbg, fe.ubg)
         # constraint indices
+        self.ind_g_fe[ctrl_idx].append(list(range(g_len, casadi_length(self.g))))
         self.ind_comp[ctrl_idx].append(increment_indices(fe.ind_comp, g_len))
         return
 
@@ -729,6 +860,7 @@ class NosnocProblem(NosnocFormulationObject):
         self.stages: list[list[FiniteElement]] = []
 
         # Index vectors of optimization variables
+        self.ind_w_fe = create_empty_list_matrix((opts.N_stages,))  # all variables of a finite element
         self.ind_x = create_empty_list_matrix((opts.N_stages,))
         self.ind_x_cont = create_empty_list_matrix((opts.N_stages,))
         self.ind_v = create_empty_list_matrix((opts.N_stages,))
@@ -738,6 +870,7 @@ class NosnocProblem(NosnocFormulationObject):
         self.ind_alpha = create_empty_list_matrix((opts.N_stages,))
         self.ind_lambda_n = create_empty_list_matrix((opts.N_stages,))
         self.ind_lambda_p = create_empty_list_matrix((opts.N_stages,))
+        self.ind_beta = create_empty_list_matrix((opts.N_stages,))
         self.ind_bool = create_empty_list_matrix((opts.N_stages,))
         self.ind_z = create_empty_list_matrix((opts.N_stages,))
         self.ind_elastic = []
@@ -749,6 +882,7 @@ class NosnocProblem(NosnocFormulationObject):
 
         # Index vectors within constraints g
         self.ind_comp = create_empty_list_matrix((opts.N_stages,))
+        self.ind_g_fe = create_empty_list_matrix((opts.N_stages,))  # all constraints of a finite element
 
         # setup parameters, lambda00 is added later:
         sigma_p = ca.SX.sym('sigma_p')  # homotopy parameter
@@ -841,6 +975,12 @@ class NosnocProblem(NosnocFormulationObject):
         # Collect all w
         self._collect_finite_elements()
 
+        self.n_mapped_groups = 0  # number of mapped finite element functions, see create_mapped_g
+        self.stage_boundaries_w: Optional[np.ndarray] = None
+        self.stage_boundaries_g: Optional[np.ndarray] = None
+        if opts.stagewise_ordering:
+            self._reorder_stagewise()
+
         # CasADi Functions
         self.cost_fun = ca.Function('cost_fun', [self.w, self.p], [self.cost])
         self.comp_res = ca.Function('comp_res', [self.w, self.p], [J_comp])
@@ -852,16 +992,109 @@ class NosnocProblem(NosnocFormulationObject):
         # LEAST_SQUARES reformulation
         if opts.constraint_handling == ConstraintHandling.LEAST_SQUARES:
             self.g_lsq = copy(self.g)
-            for ii in range(casadi_length(self.g)):
-                if self.lbg[ii] != 0.0:
-                    raise Exception(
-                        f"least_squares constraint handling only supported if all lbg, ubg == 0.0, got {self.lbg[ii]=}, {self.ubg[ii]=}, {self.g[ii]=}"
-                    )
-                self.cost += self.g[ii]**2
+            ind_nonzero = np.where((self.lbg != 0.0) | (self.ubg != 0.0))[0]
+            if len(ind_nonzero):
+                ii = ind_nonzero[0]
+                raise Exception(
+                    f"least_squares constraint handling only supported if all lbg, ubg == 0.0, got {self.lbg[ii]=}, {self.ubg[ii]=}, {self.g[ii]=}"
+                )
+            self.cost_without_lsq = self.cost
+            self.cost += ca.sumsqr(self.g_lsq)
             self.g = ca.SX([])
             self.lbg = np.array([])
             self.ubg = np.array([])
 
+    def create_defect_fun(self) -> ca.Function:
+        """
+        Local error estimates of all finite elements, see FiniteElement.get_collocation_defect().
+
+        :return: casadi.Function (w, p) -> infinity norm of the defect per finite element,
+            ordered by control stage and finite element, i.e. of length sum(Nfe_list).
+        """
+        defect = [ca.mmax(ca.fabs(fe.get_collocation_defect())) for fe in flatten(self.stages)]
+        return ca.Function('defect_fun', [self.w, self.p], [ca.vertcat(*defect)])
+
+    def create_gauss_newton_hessian(self) -> ca.Function:
+        """
+        Gauss-Newton Hessian approximation of the Lagrangian for ConstraintHandling.LEAST_SQUARES,
+        the exact Hessian of the sum of squared residuals is replaced by 2 J^T J.
+
+        :return: casadi.Function with the signature expected by the nlpsol option hess_lag
+        """
+        if self.opts.constraint_handling != ConstraintHandling.LEAST_SQUARES:
+            raise ValueError("Gauss-Newton Hessian is only available for ConstraintHandling.LEAST_SQUARES")
+        lam_f = ca.SX.sym('lam_f')
+        lam_g = ca.SX.sym('lam_g', casadi_length(self.g))
+        J_lsq = ca.jacobian(self.g_lsq, self.w)
+        hess_rest, _ = ca.hessian(lam_f * self.cost_without_lsq + ca.dot(lam_g, self.g), self.w)
+        hess = lam_f * 2 * ca.mtimes(J_lsq.T, J_lsq) + hess_rest
+        return ca.Function('hess_lag', [self.w, self.p, lam_f, lam_g], [ca.triu(hess)],
+                           ['x', 'p', 'lam_f', 'lam_g'], ['hess_gamma_x_x'])
+
+    def compute_scaling(self, p_val: np.ndarray, lambda00: np.ndarray) -> tuple:
+        """
+        Scaling factors of the variables w and constraints g, such that w = w_scale * w_scaled and
+        g = g_scale * g_scaled.
+
+        Variables are scaled per component of each variable type, e.g. x[i] on all finite elements
+        share one factor, based on the magnitude of the initial guess, or the bounds if the initial
+        guess is zero. Multipliers additionally use lambda00.
+        Constraints are scaled by the infinity norm of the corresponding row of the Jacobian
+        of the scaled problem, evaluated at the initial guess.
+
+        :param p_val: parameter values used to evaluate the constraint Jacobian
+        :param lambda00: initial multipliers
+        :return: w_scale, g_scale
+        """
+        w_scale = np.ones(casadi_length(self.w))
+        w0_abs = np.abs(self.w0)
+        bound_abs = np.maximum(np.where(np.isfinite(self.lbw), np.abs(self.lbw), 0.0),
+                               np.where(np.isfinite(self.ubw), np.abs(self.ubw), 0.0))
+
+        def nominal(ind, extra=0.0):
+            ind = np.array(ind, dtype=int)
+            val = max(np.max(w0_abs[ind]), extra)
+            if val < SCALING_EPS:
+                val = np.max(bound_abs[ind])
+            if val < SCALING_EPS:
+                val = 1.0
+            return np.clip(val, SCALING_MIN, SCALING_MAX)
+
+        # component wise groups
+        for ind_list in [self.ind_x, self.ind_v, self.ind_u, self.ind_v_global, self.ind_z,
+                         self.ind_beta, self.ind_theta, self.ind_alpha]:
+            groups = {}
+            for block in _get_index_blocks(ind_list):
+                for k, i in enumerate(block):
+                    groups.setdefault((k, len(block)), []).append(i)
+            for ind in groups.values():
+                w_scale[ind] = nominal(ind)
+        # multipliers
+        lambda00_abs = np.max(np.abs(lambda00)) if len(lambda00) else 0.0
+        for ind_list in [self.ind_lam, self.ind_mu, self.ind_lambda_n, self.ind_lambda_p]:
+            ind = flatten(_get_index_blocks(ind_list))
+            if len(ind):
+                w_scale[ind] = nominal(ind, lambda00_abs)
+        # scalar variable types
+        for ind_list in [self.ind_h, self.ind_sot, self.ind_elastic, self.ind_bool]:
+            ind = flatten(_get_index_blocks(ind_list))
+            if len(ind):
+                w_scale[ind] = nominal(ind)
+
+        n_g = casadi_length(self.g)
+        if n_g == 0:
+            return w_scale, np.ones((0,))
+        jac_g_fun = ca.Function('jac_g_fun', [self.w, self.p], [ca.jacobian(self.g, self.w)])
+        jac_g = jac_g_fun(self.w0, p_val).sparse().tocsr()
+        jac_g = jac_g.multiply(w_scale.reshape(1, -1)).tocsr()
+        row_norm = np.zeros(n_g)
+        for i in range(n_g):
+            row = jac_g.data[jac_g.indptr[i]:jac_g.indptr[i + 1]]
+            if len(row):
+                row_norm[i] = np.max(np.abs(row))
+        g_scale = np.clip(row_norm, 1.0, SCALING_MAX)
+        return w_scale, g_scale
+
     def print(self):
         errors = 0
         # constraints
@@ -887,6 +1120,203 @@ class NosnocProblem(NosnocFormulationObject):
         print(f"\ncost:\n{self.cost}")
         print(f"\nerrors: {errors}")
 
+    def get_switching_sequence(self, w: np.ndarray, tol: float) -> dict:
+        """
+        Extract the active modes of every finite element from a solution w and the variable values
+        that fix them, such that all complementarity constraints of the finite elements hold.
+
+        STEWART: mode i is active on a finite element, if theta_i > tol at one of its stages,
+            lambda_i is fixed to 0 for active modes, theta_i for inactive ones.
+        STEP: alpha_i is fixed to 1 or 0, if it is within tol of this value on the whole finite
+            element, and lambda_n_i or lambda_p_i respectively to 0. Otherwise, alpha_i is free
+            (sliding mode) and both lambda_n_i and lambda_p_i are fixed to 0.
+        The last lambda values of a finite element are also fixed for modes active on the next one.
+
+        :param w: solution of the problem
+        :param tol: threshold on theta and alpha and on the free lambda values for the sign check
+        :return: dict with "ind_fixed", "val_fixed": indices and values of fixed variables,
+            "ind_sign": indices of the free lambda values, which are larger than tol in w.
+            They are the distances of the switching functions to their switching surface,
+            a value close to 0 indicates that the active mode might change.
+        """
+        opts = self.opts
+        if opts.pss_mode == PssMode.STEWART:
+            if opts.eliminate_lambda:
+                raise NotImplementedError(
+                    "get_switching_sequence is not implemented with eliminate_lambda.")
+            ind_active, ind_partner = self.ind_theta, [self.ind_lam]
+        else:
+            ind_active, ind_partner = self.ind_alpha, [self.ind_lambda_n, self.ind_lambda_p]
+
+        # active modes per finite element, Stewart: 1 for active modes
+        # Step: 1 for alpha_i = 1, 0 for alpha_i = 0, -1 for sliding modes
+        modes = []
+        for ctrl_idx, Nfe in enumerate(opts.Nfe_list):
+            for fe_idx in range(Nfe):
+                val = np.array([w[flatten(ind)] for ind in ind_active[ctrl_idx][fe_idx]])
+                if opts.pss_mode == PssMode.STEWART:
+                    modes.append(np.any(val > tol, axis=0).astype(int))
+                else:
+                    mode = -np.ones(val.shape[1], dtype=int)
+                    mode[np.all(val > 1 - tol, axis=0)] = 1
+                    mode[np.all(val < tol, axis=0)] = 0
+                    modes.append(mode)
+
+        ind_fixed, val_fixed, ind_sign = [], [], []
+        k = 0
+        for ctrl_idx, Nfe in enumerate(opts.Nfe_list):
+            for fe_idx in range(Nfe):
+                mode = modes[k]
+                mode_next = modes[min(k + 1, len(modes) - 1)]
+                k += 1
+                # theta or alpha
+                for ind in ind_active[ctrl_idx][fe_idx]:
+                    ind = np.array(flatten(ind))
+                    if opts.pss_mode == PssMode.STEWART:
+                        ind_fixed += ind[mode == 0].tolist()
+                        val_fixed += np.sum(mode == 0) * [0.0]
+                    else:
+                        ind_fixed += ind[mode >= 0].tolist()
+                        val_fixed += mode[mode >= 0].astype(float).tolist()
+                # lambda, lambda_n, lambda_p
+                for i_partner, ind_lam_type in enumerate(ind_partner):
+                    ind_lam_fe = ind_lam_type[ctrl_idx][fe_idx]
+                    for stage, ind in enumerate(ind_lam_fe):
+                        ind = np.array(flatten(ind))
+                        if opts.pss_mode == PssMode.STEWART:
+                            fixed = mode == 1
+                            if stage == len(ind_lam_fe) - 1:
+                                fixed = fixed | (mode_next == 1)
+                        else:
+                            # lambda_n: alpha != 0, lambda_p: alpha != 1
+                            fixed = mode != i_partner
+                            if stage == len(ind_lam_fe) - 1:
+                                fixed = fixed | (mode_next != i_partner)
+                        ind_fixed += ind[fixed].tolist()
+                        val_fixed += np.sum(fixed) * [0.0]
+                        ind_free = ind[~fixed]
+                        ind_sign += ind_free[w[ind_free] > tol].tolist()
+
+        return {
+            "ind_fixed": np.array(ind_fixed, dtype=int),
+            "val_fixed": np.array(val_fixed),
+            "ind_sign": np.array(ind_sign, dtype=int),
+        }
+
+    def get_stage_indices(self, ctrl_idx: int) -> list:
+        """Returns the indices of all variables in w that belong to control stage ctrl_idx."""
+        ind_stage = copy(self.ind_u[ctrl_idx])
+        if self.opts.speed_of_time_variables == SpeedOfTimeVariableMode.LOCAL:
+            ind_stage += self.ind_sot[ctrl_idx]
+        ind_stage += flatten(self.ind_w_fe[ctrl_idx])
+        return ind_stage
+
+    def create_mapped_g(self, w: ca.MX, p: ca.MX) -> ca.MX:
+        """
+        Constraint vector g as MX expression, in which the constraints of structurally identical finite elements
+        are evaluated by one casadi.Function mapped over these elements, using opts.parallelization
+        with at most opts.n_threads threads. The remaining constraints are evaluated by a single function.
+
+        :param w: MX symbol with the dimension of self.w
+        :param p: MX symbol with the dimension of self.p
+        :return: MX expression equivalent to self.g
+        """
+        opts = self.opts
+        n_g = casadi_length(self.g)
+        rows_w, cols_w = ca.jacobian_sparsity(self.g, self.w).get_triplet()
+        rows_p, cols_p = ca.jacobian_sparsity(self.g, self.p).get_triplet()
+        dep_w = [[] for _ in range(n_g)]
+        dep_p = [[] for _ in range(n_g)]
+        for i, j in zip(rows_w, cols_w):
+            dep_w[i].append(j)
+        for i, j in zip(rows_p, cols_p):
+            dep_p[i].append(j)
+
+        # group finite elements by their constraint function
+        groups = {}
+        for ind_g in _get_index_blocks(self.ind_g_fe):
+            ind_w = sorted(set(flatten([dep_w[i] for i in ind_g])))
+            ind_p = sorted(set(flatten([dep_p[i] for i in ind_g])))
+            w_fe = ca.SX.sym('w', len(ind_w))
+            p_fe = ca.SX.sym('p', len(ind_p))
+            g_fe = ca.substitute(self.g[ind_g], ca.vertcat(self.w[ind_w], self.p[ind_p]),
+                                 ca.vertcat(w_fe, p_fe))
+            try:
+                g_fe_fun = ca.Function('g_fe', [w_fe, p_fe], [g_fe])
+            except RuntimeError:
+                # depends on variables not detected by the sparsity pattern, evaluated with the remaining constraints
+                continue
+            key = g_fe_fun.serialize()
+            if key not in groups:
+                groups[key] = (g_fe_fun, [])
+            groups[key][1].append((ind_g, ind_w, ind_p))
+
+        g_parts = []
+        ind_g_order = []
+        for g_fe_fun, elements in groups.values():
+            g_map_fun = g_fe_fun.map(len(elements), opts.parallelization, opts.n_threads)
+            w_map = ca.horzcat(*[w[ind_w] for _, ind_w, _ in elements])
+            p_map = ca.horzcat(*[p[ind_p] for _, _, ind_p in elements])
+            g_parts.append(ca.vec(g_map_fun(w_map, p_map)))
+            ind_g_order += flatten([ind_g for ind_g, _, _ in elements])
+        ind_g_rest = sorted(set(range(n_g)) - set(ind_g_order))
+        if len(ind_g_rest):
+            g_rest_fun = ca.Function('g_rest', [self.w, self.p], [self.g[ind_g_rest]])
+            g_parts.append(g_rest_fun(w, p))
+            ind_g_order += ind_g_rest
+        self.n_mapped_groups = len(groups)
+        return ca.vertcat(*g_parts)[np.argsort(ind_g_order).tolist()]
+
+    def _reorder_stagewise(self) -> None:
+        """
+        Reorder w and g strictly per control stage and update all index vectors.
+
+        Variables not belonging to a control stage, e.g. v_global or s_elastic, are placed first.
+        Every constraint is assigned to the last control stage of the variables it depends on.
+        The variables of stage k are w[stage_boundaries_w[k]:stage_boundaries_w[k+1]],
+        the ones before stage_boundaries_w[0] are global, stage_boundaries_g is defined accordingly.
+        """
+        n_stages = self.opts.N_stages
+        stage_w = -np.ones(casadi_length(self.w), dtype=int)
+        for ctrl_idx in range(n_stages):
+            stage_w[self.get_stage_indices(ctrl_idx)] = ctrl_idx
+        stage_g = -np.ones(casadi_length(self.g), dtype=int)
+        rows, cols = ca.jacobian_sparsity(self.g, self.w).get_triplet()
+        np.maximum.at(stage_g, np.array(rows, dtype=int), stage_w[np.array(cols, dtype=int)])
+
+        perm_w = np.argsort(stage_w, kind='stable')
+        perm_g = np.argsort(stage_g, kind='stable')
+        new_index_w = np.empty_like(perm_w)
+        new_index_w[perm_w] = np.arange(len(perm_w))
+        new_index_g = np.empty_like(perm_g)
+        new_index_g[perm_g] = np.arange(len(perm_g))
+
+        self.w = self.w[perm_w.tolist()]
+        self.lbw = self.lbw[perm_w]
+        self.ubw = self.ubw[perm_w]
+        self.w0 = self.w0[perm_w]
+        self.g = self.g[perm_g.tolist()]
+        self.lbg = self.lbg[perm_g]
+        self.ubg = self.ubg[perm_g]
+
+        for key, value in self.__dict__.items():
+            if key.startswith('ind_') and key not in ['ind_comp', 'ind_g_fe']:
+                setattr(self, key, _remap_indices(value, new_index_w))
+        self.ind_comp = _remap_indices(self.ind_comp, new_index_g)
+        self.ind_g_fe = _remap_indices(self.ind_g_fe, new_index_g)
+
+        self.stage_boundaries_w = np.searchsorted(stage_w[perm_w], np.arange(n_stages + 1))
+        self.stage_boundaries_g = np.searchsorted(stage_g[perm_g], np.arange(n_stages + 1))
+
+    def get_fingerprint(self) -> str:
+        """Hash identifying the NLP, i.e. its functions and the bounds on w and g."""
+        h = hashlib.sha1()
+        h.update(self.cost_fun.serialize().encode())
+        h.update(self.g_fun.serialize().encode())
+        for val in [self.lbw, self.ubw, self.lbg, self.ubg]:
+            h.update(np.asarray(val, dtype=float).tobytes())
+        return h.hexdigest()
+
     def is_sim_problem(self):
         if self.model.dims.n_u != 0:
             return False
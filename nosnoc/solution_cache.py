@@ -0,0 +1,173 @@
+from typing import Optional
+from collections import OrderedDict
+from copy import deepcopy
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+
+
+class NosnocSolutionCache:
+    """
+    LRU cache for results of NosnocSolver.solve().
+
+    Entries are keyed by a hash of the quantized NLP parameter vector and the initial guess policy.
+    The least recently used entries are evicted if either max_entries or max_bytes is exceeded.
+    If a file is given, the cache is loaded from and written to it, as long as the problem fingerprint matches.
+    New entries are written at most every save_interval seconds, call flush() to write the remaining ones.
+    """
+
+    def __init__(self,
+                 fingerprint: str,
+                 tol: float = 0.0,
+                 max_entries: int = 100,
+                 max_bytes: int = 100 * 2**20,
+                 file: Optional[str] = None,
+                 save_interval: float = 10.0):
+        """
+        :param fingerprint: identifies the problem, cache files of other problems are ignored.
+        :param tol: quantization step of the parameter values, 0.0 means exact matching.
+        :param max_entries: maximum number of stored solutions.
+        :param max_bytes: maximum total size of stored solutions in bytes.
+        :param file: Optional: file used for persistence.
+        :param save_interval: minimum time in seconds between two writes of file by put().
+        """
+        if tol < 0.0:
+            raise ValueError(f"solution cache tol should be >= 0, got {tol}")
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("solution cache max_entries and max_bytes should be positive.")
+        self.fingerprint = fingerprint
+        self.tol = tol
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.file = file
+        self.save_interval = save_interval
+        # whether entries were added since the last save and the time of the last save
+        self.dirty = False
+        self.t_last_save = -np.inf
+
+        self.entries: OrderedDict = OrderedDict()
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if file is not None and os.path.exists(file):
+            self.load(file)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get_key(self, p_val: np.ndarray, policy: str, w0: Optional[np.ndarray] = None) -> str:
+        """
+        Hash of the quantized parameter vector, the initial guess policy and optionally the initial guess.
+        """
+        h = hashlib.sha1(policy.encode())
+        for val in [p_val, w0]:
+            if val is None:
+                continue
+            val = np.asarray(val, dtype=float)
+            if self.tol > 0.0:
+                val = np.round(val / self.tol).astype(np.int64)
+            else:
+                # avoid distinguishing -0.0 and 0.0
+                val = val + 0.0
+            h.update(val.tobytes())
+        return h.hexdigest()
+
+    def get(self, key: str):
+        """Returns the cached entry or None, updates the statistics."""
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return deepcopy(self.entries[key][0])
+
+    def put(self, key: str, entry) -> None:
+        """Store an entry, evicting the least recently used ones if needed."""
+        n_bytes = len(pickle.dumps(entry))
+        if n_bytes > self.max_bytes:
+            return
+        if key in self.entries:
+            self.n_bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (deepcopy(entry), n_bytes)
+        self.n_bytes += n_bytes
+        self._evict()
+        self.dirty = True
+        if self.file is not None and time.monotonic() - self.t_last_save >= self.save_interval:
+            self.save(self.file)
+
+    def flush(self) -> None:
+        """Write the entries to file, if entries were added since the last save."""
+        if self.file is not None and self.dirty:
+            self.save(self.file)
+
+    def set_fingerprint(self, fingerprint: str) -> None:
+        """Update the fingerprint, e.g. after the solver options changed, entries of the old one are dropped."""
+        if fingerprint == self.fingerprint:
+            return
+        self.fingerprint = fingerprint
+        self.clear()
+        self.dirty = False
+        if self.file is not None and os.path.exists(self.file):
+            self.load(self.file)
+
+    def _evict(self) -> None:
+        while len(self.entries) > self.max_entries or self.n_bytes > self.max_bytes:
+            _, (_, n_bytes_evicted) = self.entries.popitem(last=False)
+            self.n_bytes -= n_bytes_evicted
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.n_bytes = 0
+
+    def get_stats(self) -> dict:
+        n_requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / n_requests if n_requests > 0 else 0.0,
+            "evictions": self.evictions,
+            "n_entries": len(self.entries),
+            "n_bytes": self.n_bytes,
+        }
+
+    def save(self, file: str) -> None:
+        """Atomically write the cache entries to file."""
+        data = {"fingerprint": self.fingerprint, "tol": self.tol, "entries": self.entries}
+        directory = os.path.dirname(os.path.abspath(file))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f)
+            os.replace(tmp_file, file)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+        if file == self.file:
+            self.dirty = False
+            self.t_last_save = time.monotonic()
+
+    def load(self, file: str) -> bool:
+        """
+        Load entries from file, if it was created for the same problem and tolerance.
+
+        :return: True if entries were loaded.
+        """
+        with open(file, "rb") as f:
+            data = pickle.load(f)
+        if data["fingerprint"] != self.fingerprint or data["tol"] != self.tol:
+            return False
+        self.clear()
+        for key, (entry, n_bytes) in data["entries"].items():
+            self.entries[key] = (entry, n_bytes)
+            self.n_bytes += n_bytes
+        self._evict()
+        return True
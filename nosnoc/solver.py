@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
 from typing import Optional
+import hashlib
+import json
 
 import casadi as ca
 import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg
 import time
 
 from nosnoc.model import NosnocModel
@@ -11,12 +15,20 @@ from nosnoc.nosnoc_types import InitializationStrategy, PssMode, HomotopyUpdateR
 from nosnoc.ocp import NosnocOcp
 from nosnoc.problem import NosnocProblem
 from nosnoc.rk_utils import rk4_on_timegrid
-from nosnoc.utils import flatten_layer, flatten, get_cont_algebraic_indices, flatten_outer_layers, check_ipopt_success
+from nosnoc.solution_cache import NosnocSolutionCache
+from nosnoc.linear_solver_tuning import LinearSolverTuningCache
+from nosnoc.presolve import PresolvedNlpSolver
+from nosnoc.warm_start_db import NosnocWarmStartDatabase
+from nosnoc.utils import casadi_length, flatten_layer, flatten, get_cont_algebraic_indices, flatten_outer_layers, check_ipopt_success
 
 
 def construct_problem(opts: NosnocOpts, model: NosnocModel, ocp: Optional[NosnocOcp] = None) -> NosnocProblem:
     # preprocess inputs
     opts.preprocess()
+    if opts.prune_empty_regions and opts.pss_mode == PssMode.STEWART:
+        lbx = ocp.lbx if ocp is not None else None
+        ubx = ocp.ubx if ocp is not None else None
+        model.prune_empty_regions(lbx, ubx, verbose=bool(opts.print_level))
     model.preprocess_model(opts)
 
     if opts.initialization_strategy == InitializationStrategy.RK4_SMOOTHENED:
@@ -25,6 +37,37 @@ def construct_problem(opts: NosnocOpts, model: NosnocModel, ocp: Optional[Nosnoc
     return NosnocProblem(opts, model, ocp)
 
 
+class ScaledNlpSolver:
+    """
+    Wrapper around a casadi nlpsol that solves the NLP in the scaled variables w / w_scale with
+    constraints g / g_scale, with inputs and outputs in the original, unscaled quantities.
+    """
+
+    def __init__(self, solver: ca.Function, w_scale: np.ndarray, g_scale: np.ndarray):
+        self.solver = solver
+        self.w_scale = ca.DM(w_scale)
+        self.g_scale = ca.DM(g_scale)
+
+    def __call__(self, x0, lbg, ubg, lbx, ubx, p) -> dict:
+        sol = self.solver(x0=ca.DM(x0) / self.w_scale,
+                          lbg=ca.DM(lbg) / self.g_scale,
+                          ubg=ca.DM(ubg) / self.g_scale,
+                          lbx=ca.DM(lbx) / self.w_scale,
+                          ubx=ca.DM(ubx) / self.w_scale,
+                          p=p)
+        return {
+            'x': sol['x'] * self.w_scale,
+            'f': sol['f'],
+            'g': sol['g'] * self.g_scale,
+            'lam_x': sol['lam_x'] / self.w_scale,
+            'lam_g': sol['lam_g'] / self.g_scale,
+            'lam_p': sol['lam_p']
+        }
+
+    def stats(self) -> dict:
+        return self.solver.stats()
+
+
 class NosnocSolverBase(ABC):
 
     @abstractmethod
@@ -37,6 +80,7 @@ class NosnocSolverBase(ABC):
         self.ocp = ocp
         self.opts = opts
         self.problem = construct_problem(opts, model, ocp)
+        self.warm_start_db: Optional[NosnocWarmStartDatabase] = None
 
     def set(self, field: str, value: np.ndarray) -> None:
         """
@@ -121,6 +165,17 @@ class NosnocSolverBase(ABC):
                 prob.w0[np.array(ind)] = x0
         elif opts.initialization_strategy == InitializationStrategy.EXTERNAL:
             pass
+        elif opts.initialization_strategy == InitializationStrategy.WARM_START_DATABASE:
+            if self.warm_start_db is None:
+                self.warm_start_db = NosnocWarmStartDatabase(max_size=opts.warm_start_db_max_size,
+                                                             k=opts.warm_start_db_k)
+            warm_start = self.warm_start_db.query(self.get_warm_start_features())
+            if warm_start is None:
+                # same as ALL_XCURRENT_W0_START
+                for ind in prob.ind_x:
+                    prob.w0[np.array(ind)] = x0
+            else:
+                prob.w0 = warm_start["w"]
         # This is experimental
         elif opts.initialization_strategy == InitializationStrategy.RK4_SMOOTHENED:
             # print(f"updating w0 with RK4 smoothened")
@@ -158,7 +213,8 @@ class NosnocSolverBase(ABC):
                         ind_theta_s = range(sum(self.model.dims.n_f_sys[:s]),
                                             sum(self.model.dims.n_f_sys[:s + 1]))
                         prob.w0[prob.ind_theta[0][i][k][s]] = theta_ki[ind_theta_s].full().flatten()
-                        prob.w0[prob.ind_lam[0][i][k][s]] = lam_ki[ind_theta_s].full().flatten()
+                        if prob.ind_lam[0][i][k][s]:
+                            prob.w0[prob.ind_lam[0][i][k][s]] = lam_ki[ind_theta_s].full().flatten()
                         prob.w0[prob.ind_mu[0][i][k][s]] = mu_ki[s].full().flatten()
                         # TODO: ind_v
                     db_updated_indices += prob.ind_theta[0][i][k][s] + prob.ind_lam[0][i][k][
@@ -176,6 +232,11 @@ class NosnocSolverBase(ABC):
             # print(f"{missing_indices=}")
         return
 
+    def get_warm_start_features(self) -> np.ndarray:
+        """Feature vector used to index solutions in the warm start database: x0 and all parameter values."""
+        model = self.problem.model
+        return np.concatenate((model.x0, model.p_val_ctrl_stages.flatten()))
+
     def _print_iter_stats(self, sigma_k, complementarity_residual, nlp_res, cost_val, cpu_time_nlp,
                           nlp_iter, status):
         print(f'{sigma_k:.1e} \t {complementarity_residual:.2e} \t {nlp_res:.2e}' +
@@ -196,11 +257,26 @@ class NosnocSolverBase(ABC):
         return
 
     def setup_p_val(self, sigma, tau) -> None:
+        self.p_val = self._get_p_val(sigma, tau)
+        return
+
+    def _get_p_val(self, sigma, tau) -> np.ndarray:
         model: NosnocModel = self.problem.model
-        self.p_val = np.concatenate(
+        return np.concatenate(
                 (model.p_val_ctrl_stages.flatten(),
                  np.array([sigma, tau]), self.lambda00, model.x0))
-        return
+
+    def _split_p_val(self, p_val: np.ndarray) -> tuple:
+        """
+        Inverse of setup_p_val.
+
+        :return: x0 and p_val_ctrl_stages contained in p_val.
+        """
+        model: NosnocModel = self.problem.model
+        n_p_ctrl_stages = model.p_val_ctrl_stages.size
+        x0 = p_val[-model.dims.n_x:]
+        p_val_ctrl_stages = p_val[:n_p_ctrl_stages].reshape(model.p_val_ctrl_stages.shape)
+        return x0, p_val_ctrl_stages
 
 
     def polish_solution(self, casadi_ipopt_solver, w_guess):
@@ -212,7 +288,7 @@ class NosnocSolverBase(ABC):
         ind_set = flatten(prob.ind_lam + prob.ind_lambda_n + prob.ind_lambda_p + prob.ind_alpha +
                           prob.ind_theta + prob.ind_mu)
         ind_dont_set = flatten(prob.ind_h + prob.ind_u + prob.ind_x + prob.ind_v_global +
-                               prob.ind_v + prob.ind_z + prob.ind_elastic)
+                               prob.ind_v + prob.ind_beta + prob.ind_z + prob.ind_elastic)
         # sanity check
         ind_all = ind_set + ind_dont_set
         for iw in range(len(w_guess)):
@@ -250,6 +326,7 @@ class NosnocSolverBase(ABC):
             t = time.time()
             sol = casadi_ipopt_solver(x0=w_guess, lbg=prob.lbg, ubg=prob.ubg, lbx=lbw, ubx=ubw, p=self.p_val)
             cpu_time_nlp = time.time() - t
+            self._store_nlp_solution(sol, lbw, ubw)
 
             # print and process solution
             solver_stats = casadi_ipopt_solver.stats()
@@ -268,6 +345,244 @@ class NosnocSolverBase(ABC):
 
         return w_opt, cpu_time_nlp, nlp_iter, status
 
+    def _store_nlp_solution(self, sol: dict, lbw: np.ndarray, ubw: np.ndarray) -> None:
+        """Store primal-dual solution and bounds of the last NLP, used for sensitivities."""
+        self.nlp_solution = {
+            "w": sol['x'].full().flatten(),
+            "lam_g": sol['lam_g'].full().flatten(),
+            "lam_x": sol['lam_x'].full().flatten(),
+            "lbw": np.array(lbw),
+            "ubw": np.array(ubw),
+            "p": self.p_val.copy(),
+        }
+        self.sensitivities = None
+
+    def _create_sensitivity_functions(self) -> None:
+        prob = self.problem
+        model = prob.model
+        lam_g = ca.SX.sym('lam_g', casadi_length(prob.g))
+        lagrangian = prob.cost + ca.dot(lam_g, prob.g)
+        grad_w_lag = ca.gradient(lagrangian, prob.w)
+        self.kkt_sensitivity_fun = ca.Function('kkt_sensitivity_fun', [prob.w, prob.p, lam_g], [
+            ca.jacobian(grad_w_lag, prob.w),
+            ca.jacobian(grad_w_lag, prob.p),
+            ca.jacobian(prob.g, prob.w),
+            ca.jacobian(prob.g, prob.p),
+            ca.gradient(lagrangian, prob.p)
+        ])
+        self.lambda00_jac_fun = model.lambda00_fun.factory('lambda00_jac_fun', ['i0', 'i1', 'i2'],
+                                                           ['jac:o0:i0', 'jac:o0:i2'])
+
+    def _get_parameter_jacobians(self) -> dict:
+        """
+        Jacobians of the NLP parameter vector p (see setup_p_val) with respect to x0, p_global and p_time_var,
+        including the dependency of lambda00 on x0 and the parameters of the first control stage,
+        evaluated at the parameters of the last solution.
+        """
+        prob = self.problem
+        model = prob.model
+        dims = model.dims
+        n_p_stage = dims.n_p_time_var + dims.n_p_glob
+        N_stages = self.opts.N_stages
+        n_p = casadi_length(prob.p)
+        n_lambda00 = len(self.lambda00)
+        ind_lambda00 = np.arange(N_stages * n_p_stage + 2, N_stages * n_p_stage + 2 + n_lambda00)
+        ind_x0 = np.arange(n_p - dims.n_x, n_p)
+
+        # parameters of the last solution, which might differ from the currently stored ones
+        x0, p_val_ctrl_stages = self._split_p_val(self.nlp_solution["p"])
+        dlambda00_dx0, dlambda00_dp0 = self.lambda00_jac_fun(x0, model.z0, p_val_ctrl_stages[0])
+        dlambda00_dx0 = dlambda00_dx0.full()
+        dlambda00_dp0 = dlambda00_dp0.full()
+
+        dp_dx0 = np.zeros((n_p, dims.n_x))
+        dp_dx0[ind_x0, :] = np.eye(dims.n_x)
+        dp_dx0[ind_lambda00, :] = dlambda00_dx0
+
+        dp_dp_global = np.zeros((n_p, dims.n_p_glob))
+        for i in range(N_stages):
+            ind_p_global = i * n_p_stage + dims.n_p_time_var + np.arange(dims.n_p_glob)
+            dp_dp_global[ind_p_global, :] = np.eye(dims.n_p_glob)
+        dp_dp_global[ind_lambda00, :] = dlambda00_dp0[:, dims.n_p_time_var:]
+
+        dp_dp_time_var = np.zeros((n_p, N_stages * dims.n_p_time_var))
+        for i in range(N_stages):
+            ind_p_time_var = i * n_p_stage + np.arange(dims.n_p_time_var)
+            dp_dp_time_var[ind_p_time_var, i * dims.n_p_time_var:(i + 1) * dims.n_p_time_var] = \
+                np.eye(dims.n_p_time_var)
+        dp_dp_time_var[ind_lambda00, :dims.n_p_time_var] = dlambda00_dp0[:, :dims.n_p_time_var]
+
+        return {"x0": dp_dx0, "p_global": dp_dp_global, "p_time_var": dp_dp_time_var}
+
+    def compute_sensitivities(self, active_set_tol: float = 1e-6) -> dict:
+        """
+        Compute the derivatives of the last NLP solution w_opt and of the optimal cost
+        with respect to x0, p_global and p_time_var.
+
+        The sensitivities are obtained from the KKT conditions at the active set of the last solved NLP,
+        i.e. the polished one if do_polishing_step is set.
+        Equality constraints are always active, inequality constraints and bounds are considered
+        active if their multiplier is larger than active_set_tol.
+        Variables at active bounds, e.g. fixed in the polishing step, have zero sensitivity.
+
+        :param active_set_tol: threshold on the multipliers to detect active constraints and bounds.
+        :return: dict with fields "dw_dx0", "dw_dp_global", "dw_dp_time_var" of shape (n_w, n),
+            and "dcost_dx0", "dcost_dp_global", "dcost_dp_time_var" of shape (n,).
+            The p_time_var derivatives are ordered stage by stage.
+        """
+        if getattr(self, "nlp_solution", None) is None:
+            raise Exception("compute_sensitivities: call solve() first.")
+        if self.sensitivities is not None:
+            return self.sensitivities
+        if not hasattr(self, "kkt_sensitivity_fun"):
+            self._create_sensitivity_functions()
+
+        sol = self.nlp_solution
+        prob = self.problem
+        H, L_wp, J_g, J_gp, L_p = self.kkt_sensitivity_fun(sol["w"], sol["p"], sol["lam_g"])
+        H = H.sparse()
+        J_g = J_g.sparse()
+        L_wp = L_wp.full()
+        J_gp = J_gp.full()
+        L_p = L_p.full().flatten()
+
+        # active set
+        n_w = len(sol["w"])
+        fixed = sol["lbw"] == sol["ubw"]
+        ind_free = np.where(np.logical_and(np.abs(sol["lam_x"]) <= active_set_tol, ~fixed))[0]
+        is_equality = prob.lbg == prob.ubg
+        ind_active = np.where(np.logical_or(is_equality, np.abs(sol["lam_g"]) > active_set_tol))[0]
+        J_A = J_g[ind_active, :][:, ind_free]
+        # constraints without dependency on the free variables cannot be satisfied to first order otherwise
+        ind_keep = np.where(np.abs(J_A).sum(axis=1).A1 > 0)[0]
+        J_A = J_A[ind_keep, :]
+        ind_active = ind_active[ind_keep]
+        n_free = len(ind_free)
+
+        # KKT system of reduced problem
+        K = sp.bmat([[H[ind_free, :][:, ind_free], J_A.T], [J_A, None]], format='csc')
+        dp_dparam = self._get_parameter_jacobians()
+        rhs_list = [
+            -np.vstack((L_wp[ind_free, :] @ dp, J_gp[ind_active, :] @ dp)) for dp in dp_dparam.values()
+        ]
+        rhs = np.hstack(rhs_list)
+        try:
+            if rhs.shape[1] == 0:
+                sol_kkt = rhs
+            else:
+                sol_kkt = scipy.sparse.linalg.splu(K).solve(rhs)
+            if not np.all(np.isfinite(sol_kkt)):
+                raise RuntimeError
+        except RuntimeError:
+            # degenerate active set
+            sol_kkt = np.linalg.lstsq(K.toarray(), rhs, rcond=None)[0]
+
+        self.sensitivities = dict()
+        col = 0
+        for name, dp in dp_dparam.items():
+            n_param = dp.shape[1]
+            dw = np.zeros((n_w, n_param))
+            dw[ind_free, :] = sol_kkt[:n_free, col:col + n_param]
+            col += n_param
+            self.sensitivities[f"dw_d{name}"] = dw
+            # envelope theorem: derivative of the Lagrangian
+            self.sensitivities[f"dcost_d{name}"] = L_p @ dp
+        return self.sensitivities
+
+    def compute_homotopy_tangent(self, regularization: float = 1e-8) -> np.ndarray:
+        """
+        Compute the derivative dw/dsigma of the last NLP solution w_opt with respect to the homotopy
+        parameter sigma, including the dependency of tau = min(sigma**1.5, sigma) on sigma.
+
+        The tangent is obtained from the primal-dual interior point KKT system at the last solution,
+        in which bounds and inequality constraints enter via the ratio of their multipliers and
+        slacks, as in IPOPT, such that no active set has to be detected.
+        The relaxed problems are often degenerate, therefore the KKT matrix is regularized.
+
+        :param regularization: added to the Hessian and subtracted from the constraint block of the
+            KKT matrix.
+        :return: array of shape (n_w,)
+        """
+        if getattr(self, "nlp_solution", None) is None:
+            raise Exception("compute_homotopy_tangent: call solve() first.")
+        if not hasattr(self, "kkt_sensitivity_fun"):
+            self._create_sensitivity_functions()
+
+        sol = self.nlp_solution
+        prob = self.problem
+        H, L_wp, J_g, J_gp, _ = self.kkt_sensitivity_fun(sol["w"], sol["p"], sol["lam_g"])
+        H = H.sparse()
+        J_g = J_g.sparse()
+        L_wp = L_wp.full()
+        J_gp = J_gp.full()
+
+        ind_sigma = prob.model.p_val_ctrl_stages.size
+        sigma = sol["p"][ind_sigma]
+        dp_dsigma = np.zeros(casadi_length(prob.p))
+        dp_dsigma[ind_sigma] = 1.0
+        dp_dsigma[ind_sigma + 1] = 1.5 * np.sqrt(sigma) if sigma < 1.0 else 1.0
+
+        # barrier terms of the bounds, fixed variables have zero derivative
+        w = sol["w"]
+        ind_free = np.where(sol["lbw"] < sol["ubw"])[0]
+        dist_w = np.maximum(np.minimum(w - sol["lbw"], sol["ubw"] - w), 1e-16)
+        sigma_w = np.abs(sol["lam_x"]) / dist_w
+        # inequality constraints: ratio of slack and multiplier, 0 for equality constraints
+        g_val = prob.g_fun(w, sol["p"]).full().flatten()
+        dist_g = np.maximum(np.minimum(g_val - prob.lbg, prob.ubg - g_val), 1e-16)
+        d_g = np.where(prob.lbg == prob.ubg, 0.0, dist_g / np.maximum(np.abs(sol["lam_g"]), 1e-16))
+
+        H_free = H[ind_free, :][:, ind_free] + sp.diags(sigma_w[ind_free] + regularization)
+        J_free = J_g[:, ind_free]
+        K = sp.bmat([[H_free, J_free.T], [J_free, -sp.diags(d_g + regularization)]], format='csc')
+        rhs = -np.concatenate((L_wp[ind_free, :] @ dp_dsigma, J_gp @ dp_dsigma))
+        dw_dsigma = np.zeros(len(w))
+        dw_dsigma[ind_free] = scipy.sparse.linalg.splu(K).solve(rhs)[:len(ind_free)]
+        return dw_dsigma
+
+    def predict(self,
+                x0_new: Optional[np.ndarray] = None,
+                p_global_new: Optional[np.ndarray] = None,
+                p_time_var_new: Optional[np.ndarray] = None) -> dict:
+        """
+        First-order (tangential) prediction of the solution for new values of x0, p_global and p_time_var,
+        based on the sensitivities of the last solution, see compute_sensitivities().
+        This can be used as an approximate feedback law or as a warm start via set("w", ...).
+        The stored values of the solver are not changed.
+
+        :return: dict with the same fields as get_results_from_primal_vector() and "w_sol", "cost_val".
+        """
+        sens = self.compute_sensitivities()
+        dims = self.problem.model.dims
+        w_pred = self.nlp_solution["w"].copy()
+        cost_pred = self.cost_val_opt
+
+        # deltas with respect to the parameters of the last solution
+        x0, p_val_ctrl_stages = self._split_p_val(self.nlp_solution["p"])
+        deltas = dict()
+        if x0_new is not None:
+            deltas["x0"] = np.asarray(x0_new, dtype=float).flatten() - x0
+        if p_global_new is not None:
+            deltas["p_global"] = (np.asarray(p_global_new, dtype=float).flatten() -
+                                  p_val_ctrl_stages[0, dims.n_p_time_var:])
+        if p_time_var_new is not None:
+            deltas["p_time_var"] = (np.asarray(p_time_var_new, dtype=float) -
+                                    p_val_ctrl_stages[:, :dims.n_p_time_var]).flatten()
+        for name, delta in deltas.items():
+            w_pred += sens[f"dw_d{name}"] @ delta
+            cost_pred += sens[f"dcost_d{name}"] @ delta
+
+        # keep prediction within bounds
+        w_pred = np.clip(w_pred, self.nlp_solution["lbw"], self.nlp_solution["ubw"])
+
+        results = get_results_from_primal_vector(self.problem, w_pred)
+        if x0_new is not None:
+            results["x_all_list"][0] = x0_new
+            results["x_traj"][0] = x0_new
+        results["w_sol"] = w_pred
+        results["cost_val"] = cost_pred
+        return results
+
     def create_function_calculate_vector_field(self, sigma, p=[], v=[]):
         """Create a function to calculate the vector field."""
         if self.opts.pss_mode != PssMode.STEWART:
@@ -308,7 +623,56 @@ class NosnocSolver(NosnocSolverBase):
         """
         super().__init__(opts, model, ocp)
 
-        # create NLP Solver
+        # scaling
+        if opts.automatic_scaling:
+            self.compute_lambda00()
+            self.setup_p_val(opts.sigma_0, min(opts.sigma_0**1.5, opts.sigma_0))
+            self.w_scale, self.g_scale = self.problem.compute_scaling(self.p_val, self.lambda00)
+
+        # linear solver settings from a previous autotune_linear_solver() run
+        ipopt_opts = None
+        if opts.linear_solver_tuning_file is not None:
+            tuning_cache = LinearSolverTuningCache(opts.linear_solver_tuning_file)
+            ipopt_opts = tuning_cache.get(self.problem.get_fingerprint())
+            if ipopt_opts is not None and opts.print_level:
+                print(f"using tuned IPOPT options {ipopt_opts}")
+
+        self._tuned_ipopt_opts = ipopt_opts
+        self.create_nlp_solver(ipopt_opts)
+
+        if opts.use_solution_cache:
+            self.solution_cache = NosnocSolutionCache(self._get_solution_cache_fingerprint(),
+                                                      tol=opts.solution_cache_tol,
+                                                      max_entries=opts.solution_cache_max_entries,
+                                                      max_bytes=opts.solution_cache_max_bytes,
+                                                      file=opts.solution_cache_file,
+                                                      save_interval=opts.solution_cache_save_interval)
+        else:
+            self.solution_cache = None
+
+        # see opts.fixed_switching_sequence
+        self.switching_sequence: Optional[dict] = None
+        self.fixed_sequence_solver = None
+
+    @property
+    def tuned_ipopt_opts(self) -> Optional[dict]:
+        """IPOPT options overriding the ones in opts.opts_casadi_nlp['ipopt'], see autotune_linear_solver."""
+        return self._tuned_ipopt_opts
+
+    @tuned_ipopt_opts.setter
+    def tuned_ipopt_opts(self, ipopt_opts: Optional[dict]) -> None:
+        self._tuned_ipopt_opts = ipopt_opts
+        # cached solutions depend on the IPOPT options
+        if self.solution_cache is not None:
+            self.solution_cache.set_fingerprint(self._get_solution_cache_fingerprint())
+
+    def create_nlp_solver(self, ipopt_opts: Optional[dict] = None) -> None:
+        """
+        Create the casadi NLP solver self.solver.
+
+        :param ipopt_opts: Optional: IPOPT options overriding the ones in opts.opts_casadi_nlp['ipopt'].
+        """
+        opts = self.opts
         try:
             casadi_nlp = {
                 'f': self.problem.cost,
@@ -316,16 +680,202 @@ class NosnocSolver(NosnocSolverBase):
                 'g': self.problem.g,
                 'p': self.problem.p
             }
-            self.solver = ca.nlpsol(model.name, 'ipopt', casadi_nlp, opts.opts_casadi_nlp)
+            opts_casadi_nlp = dict(opts.opts_casadi_nlp)
+            if ipopt_opts is not None:
+                opts_casadi_nlp['ipopt'] = {**opts_casadi_nlp['ipopt'], **ipopt_opts}
+            if opts.gauss_newton_hessian:
+                opts_casadi_nlp['hess_lag'] = self.problem.create_gauss_newton_hessian()
+            if opts.map_finite_elements:
+                w = ca.MX.sym('w', casadi_length(self.problem.w))
+                p = ca.MX.sym('p', casadi_length(self.problem.p))
+                cost_fun = ca.Function('cost_fun', [self.problem.w, self.problem.p], [self.problem.cost])
+                casadi_nlp = {'x': w, 'p': p, 'f': cost_fun(w, p), 'g': self.problem.create_mapped_g(w, p)}
+                self.solver = ca.nlpsol(self.model.name, 'ipopt', casadi_nlp, opts_casadi_nlp)
+            elif opts.presolve:
+                self.solver = PresolvedNlpSolver(self.model.name, self.problem.w, self.problem.p,
+                                                 self.problem.cost, self.problem.g, opts_casadi_nlp)
+            elif opts.automatic_scaling:
+                w_scaled = ca.SX.sym('w_scaled', casadi_length(self.problem.w))
+                f_g_fun = ca.Function('f_g_fun', [self.problem.w, self.problem.p],
+                                      [self.problem.cost, self.problem.g])
+                f_scaled, g_scaled = f_g_fun(self.w_scale * w_scaled, self.problem.p)
+                casadi_nlp['x'] = w_scaled
+                casadi_nlp['f'] = f_scaled
+                casadi_nlp['g'] = g_scaled / self.g_scale
+                self.solver = ScaledNlpSolver(
+                    ca.nlpsol(self.model.name, 'ipopt', casadi_nlp, opts_casadi_nlp), self.w_scale,
+                    self.g_scale)
+            else:
+                self.solver = ca.nlpsol(self.model.name, 'ipopt', casadi_nlp, opts_casadi_nlp)
         except Exception as err:
             self.print_problem()
             print(f"{opts=}")
             print("\nerror creating solver for problem above.")
             raise err
 
+    def _create_fixed_sequence_solver(self) -> None:
+        """NLP solver of the problem without the complementarity constraints of the finite elements."""
+        prob = self.problem
+        ind_comp = flatten(prob.ind_comp[:self.opts.N_stages])
+        self.ind_g_fixed_sequence = np.setdiff1d(np.arange(casadi_length(prob.g)), ind_comp)
+        casadi_nlp = {
+            'f': prob.cost,
+            'x': prob.w,
+            'g': prob.g[self.ind_g_fixed_sequence.tolist()],
+            'p': prob.p
+        }
+        opts_casadi_nlp = dict(self.opts.opts_casadi_nlp)
+        if self.tuned_ipopt_opts is not None:
+            opts_casadi_nlp['ipopt'] = {**opts_casadi_nlp['ipopt'], **self.tuned_ipopt_opts}
+        self.fixed_sequence_solver = ca.nlpsol(self.model.name + '_fixed_sequence', 'ipopt',
+                                               casadi_nlp, opts_casadi_nlp)
+
+    def _solve_fixed_switching_sequence(self) -> Optional[dict]:
+        """
+        Solve the smooth NLP with the active modes of self.switching_sequence.
+
+        :return: results as in solve() or None, if IPOPT fails, the complementarity residual is
+            larger than opts.comp_tol or the sign check fails. In this case the switching sequence is
+            discarded.
+        """
+        opts = self.opts
+        prob = self.problem
+        sequence = self.switching_sequence
+        if self.fixed_sequence_solver is None:
+            self._create_fixed_sequence_solver()
+
+        lbw = prob.lbw.copy()
+        ubw = prob.ubw.copy()
+        lbw[sequence["ind_fixed"]] = sequence["val_fixed"]
+        ubw[sequence["ind_fixed"]] = sequence["val_fixed"]
+        # the reduced NLP is nonconvex, start from the solution the sequence was taken from
+        w0 = np.clip(self.nlp_solution["w"], lbw, ubw)
+
+        sigma_k = opts.sigma_N
+        self.setup_p_val(sigma_k, min(sigma_k**1.5, sigma_k))
+        ind_g = self.ind_g_fixed_sequence
+        sol = self.fixed_sequence_solver(x0=w0,
+                                         lbg=prob.lbg[ind_g],
+                                         ubg=prob.ubg[ind_g],
+                                         lbx=lbw,
+                                         ubx=ubw,
+                                         p=self.p_val)
+        solver_stats = self.fixed_sequence_solver.stats()
+        status = solver_stats['return_status']
+        w_opt = sol['x'].full().flatten()
+        complementarity_residual = prob.comp_res(w_opt, self.p_val).full()[0][0]
+        sign_check = np.all(w_opt[sequence["ind_sign"]] > opts.fixed_switching_sequence_tol)
+        if opts.print_level:
+            print(f"fixed switching sequence: status {status}, complementarity residual "
+                  f"{complementarity_residual:.2e}, sign check {'passed' if sign_check else 'failed'}")
+        if (not check_ipopt_success(status) or complementarity_residual > opts.comp_tol or
+                not sign_check):
+            self.switching_sequence = None
+            return None
+
+        # the full NLP is not solved, store the solution with multipliers of the full constraints
+        lam_g = np.zeros(casadi_length(prob.g))
+        lam_g[ind_g] = sol['lam_g'].full().flatten()
+        self._store_nlp_solution({**sol, 'lam_g': ca.DM(lam_g)}, lbw, ubw)
+        self.cost_val_opt = prob.cost_fun(w_opt, self.p_val).full()[0][0]
+
+        results = get_results_from_primal_vector(prob, w_opt)
+        results["cpu_time_nlp"] = [solver_stats['t_proc_total']]
+        results["nlp_iter"] = [solver_stats['iter_count']]
+        if opts.homotopy_warm_start:
+            results["homotopy_iter_skipped"] = 0
+        if opts.homotopy_predictor:
+            results["cpu_time_predictor"] = [None]
+        results["w_all"] = [w0, w_opt]
+        results["w_sol"] = w_opt
+        results["cost_val"] = ca.norm_inf(sol['f']).full()[0][0]
+        results["status"] = Status.SUCCESS
+        results["fixed_switching_sequence"] = True
+        return results
+
+    def _skip_homotopy_iterations(self, sigma_k: float, complementarity_residual: float,
+                                  max_skip: int) -> tuple:
+        """
+        Advance sigma_k along the homotopy schedule to the smallest value that is not smaller than
+        complementarity_residual, see opts.homotopy_warm_start.
+
+        :param max_skip: maximum number of skipped homotopy iterations.
+        :return: sigma and the number of skipped homotopy iterations.
+        """
+        opts = self.opts
+        n_iter_skipped = 0
+        while sigma_k > opts.sigma_N and n_iter_skipped < max_skip:
+            sigma_next = self.homotopy_sigma_update(sigma_k)
+            if sigma_next < complementarity_residual:
+                break
+            sigma_k = sigma_next
+            n_iter_skipped += 1
+        return sigma_k, n_iter_skipped
+
+    def _homotopy_predictor_step(self, w_opt: np.ndarray, sigma_k: float, sigma_next: float,
+                                 lbw: np.ndarray, ubw: np.ndarray) -> np.ndarray:
+        """
+        First-order prediction of the solution at sigma_next from the solution w_opt at sigma_k,
+        see opts.homotopy_predictor.
+        The relaxed problems are often degenerate, such that the prediction is only used, if it
+        reduces the constraint violation at sigma_next compared to w_opt, otherwise w_opt is returned.
+        """
+        prob = self.problem
+        dw_dsigma = self.compute_homotopy_tangent()
+        w_pred = np.clip(w_opt + (sigma_next - sigma_k) * dw_dsigma, lbw, ubw)
+
+        p_val = self.p_val
+        self.setup_p_val(sigma_next, min(sigma_next**1.5, sigma_next))
+        violation = []
+        for w in [w_opt, w_pred]:
+            g_val = prob.g_fun(w, self.p_val).full().flatten()
+            violation.append(np.max(np.maximum(prob.lbg - g_val, g_val - prob.ubg), initial=0.0))
+        self.p_val = p_val
+        if self.opts.print_level > 1:
+            print(f"homotopy predictor: constraint violation {violation[0]:.2e} -> "
+                  f"{violation[1]:.2e}")
+        return w_pred if violation[1] < violation[0] else w_opt
+
+    def _get_solution_cache_fingerprint(self) -> str:
+        """
+        Hash of the problem fingerprint and the options that determine the solution returned by
+        solve() for given parameters, i.e. tolerances, homotopy and IPOPT options.
+        """
+        opts = self.opts
+        solve_opts = {
+            key: getattr(opts, key) for key in [
+                "comp_tol", "sigma_0", "sigma_N", "homotopy_update_slope",
+                "homotopy_update_exponent", "homotopy_update_rule", "max_iter_homotopy",
+                "homotopy_predictor", "homotopy_warm_start", "do_polishing_step",
+                "fix_active_set_fe0", "fixed_switching_sequence", "fixed_switching_sequence_tol"
+            ]
+        }
+        solve_opts["ipopt"] = {**opts.opts_casadi_nlp['ipopt'], **(self.tuned_ipopt_opts or {})}
+        h = hashlib.sha1(self.problem.get_fingerprint().encode())
+        h.update(json.dumps(solve_opts, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    def _get_solution_cache_key(self) -> str:
+        opts = self.opts
+        # the initial guess only defines the solution if it is provided by the user
+        w0 = self.problem.w0 if opts.initialization_strategy == InitializationStrategy.EXTERNAL else None
+        p_val = self._get_p_val(opts.sigma_0, 0.0)
+        return self.solution_cache.get_key(p_val, opts.initialization_strategy.name, w0)
+
+    def _load_cached_solution(self, entry: dict) -> dict:
+        self.nlp_solution = entry["nlp_solution"]
+        self.sensitivities = None
+        self.cost_val_opt = entry["cost_val_opt"]
+        self.p_val = self.nlp_solution["p"]
+        results = entry["results"]
+        if self.opts.initialization_strategy == InitializationStrategy.ALL_XCURRENT_WOPT_PREV:
+            self.problem.w0[:] = results["w_sol"][:]
+        return results
+
     def solve(self) -> dict:
         """
         Solves the NLP with the currently stored parameters.
+        If opts.use_solution_cache is set, a cached solution for the same parameters is returned if available.
 
         :return: Returns a dictionary containing ... TODO document all fields
         """
@@ -335,6 +885,18 @@ class NosnocSolver(NosnocSolverBase):
         # initialize
         self.initialize()
 
+        cache_key = None
+        if self.solution_cache is not None:
+            cache_key = self._get_solution_cache_key()
+            entry = self.solution_cache.get(cache_key)
+            if entry is not None:
+                return self._load_cached_solution(entry)
+
+        if opts.fixed_switching_sequence and self.switching_sequence is not None:
+            results = self._solve_fixed_switching_sequence()
+            if results is not None:
+                return self._finalize_solve(results, cache_key)
+
         w0 = prob.w0.copy()
 
         w_all = [w0.copy()]
@@ -342,6 +904,7 @@ class NosnocSolver(NosnocSolverBase):
         complementarity_stats = n_iter_polish * [None]
         cpu_time_nlp = n_iter_polish * [None]
         nlp_iter = n_iter_polish * [None]
+        cpu_time_predictor = n_iter_polish * [None]
 
         if opts.print_level:
             print('-------------------------------------------')
@@ -386,8 +949,22 @@ class NosnocSolver(NosnocSolverBase):
             lbw = prob.lbw
             ubw = prob.ubw
 
+        n_iter_skipped = 0
+        warm_started = False
+        if opts.homotopy_warm_start:
+            self.setup_p_val(sigma_k, min(sigma_k**1.5, sigma_k))
+            complementarity_residual = prob.comp_res(w0, self.p_val).full()[0][0]
+            sigma_k, n_iter_skipped = self._skip_homotopy_iterations(
+                sigma_k, complementarity_residual, opts.max_iter_homotopy - 1)
+            warm_started = n_iter_skipped > 0
+            if opts.print_level and n_iter_skipped:
+                print(f"homotopy warm start: skipping {n_iter_skipped} iterations, "
+                      f"starting at sigma = {sigma_k:.1e}")
+
         # homotopy loop
         for ii in range(opts.max_iter_homotopy):
+            if ii + n_iter_skipped >= opts.max_iter_homotopy:
+                break
             tau_val = min(sigma_k ** 1.5, sigma_k)
             # tau_val = sigma_k**1.5*1e3
             self.setup_p_val(sigma_k, tau_val)
@@ -400,6 +977,8 @@ class NosnocSolver(NosnocSolverBase):
                               ubx=ubw,
                               p=self.p_val)
 
+            self._store_nlp_solution(sol, lbw, ubw)
+
             # statistics
             solver_stats = self.solver.stats()
             cpu_time_nlp[ii] = solver_stats['t_proc_total']
@@ -419,6 +998,8 @@ class NosnocSolver(NosnocSolverBase):
             if opts.print_level:
                 self._print_iter_stats(sigma_k, complementarity_residual, nlp_res, cost_val,
                                        cpu_time_nlp[ii], nlp_iter[ii], status)
+            if opts.presolve and opts.print_level > 1:
+                print(f"presolve: {solver_stats['presolve']}")
             if not check_ipopt_success(status):
                 print(f"Warning: IPOPT exited with status {status}")
 
@@ -429,12 +1010,25 @@ class NosnocSolver(NosnocSolverBase):
                 break
 
             # Update the homotopy parameter.
-            sigma_k = self.homotopy_sigma_update(sigma_k)
+            sigma_next = self.homotopy_sigma_update(sigma_k)
+            if warm_started:
+                # skip the relaxed problems that are already solved by w_opt
+                sigma_next, n_skip = self._skip_homotopy_iterations(
+                    sigma_next, complementarity_residual,
+                    opts.max_iter_homotopy - ii - n_iter_skipped - 2)
+                n_iter_skipped += n_skip
+            if opts.homotopy_predictor and check_ipopt_success(status):
+                t = time.process_time()
+                w0 = self._homotopy_predictor_step(w_opt, sigma_k, sigma_next, lbw, ubw)
+                cpu_time_predictor[ii + 1] = time.process_time() - t
+            sigma_k = sigma_next
 
         if opts.do_polishing_step:
             w_opt, cpu_time_nlp[n_iter_polish - 1], nlp_iter[n_iter_polish - 1], status = \
                                             self.polish_solution(self.solver, w_opt)
 
+        self.cost_val_opt = prob.cost_fun(w_opt, self.p_val).full()[0][0]
+
         # collect results
         results = get_results_from_primal_vector(prob, w_opt)
 
@@ -452,11 +1046,13 @@ class NosnocSolver(NosnocSolverBase):
                 # print(f"lambda values: {w_opt[prob.ind_lam]}")
                 # print_casadi_vector(prob.g_lsq)
 
-        if opts.initialization_strategy == InitializationStrategy.ALL_XCURRENT_WOPT_PREV:
-            prob.w0[:] = w_opt[:]
         # stats
         results["cpu_time_nlp"] = cpu_time_nlp
         results["nlp_iter"] = nlp_iter
+        if opts.homotopy_warm_start:
+            results["homotopy_iter_skipped"] = n_iter_skipped
+        if opts.homotopy_predictor:
+            results["cpu_time_predictor"] = cpu_time_predictor
         results["w_all"] = w_all
         results["w_sol"] = w_opt
         results["cost_val"] = cost_val
@@ -466,6 +1062,36 @@ class NosnocSolver(NosnocSolverBase):
         else:
             results["status"] = Status.INFEASIBLE
 
+        results["fixed_switching_sequence"] = False
+        return self._finalize_solve(results, cache_key)
+
+    def _finalize_solve(self, results: dict, cache_key: Optional[str]) -> dict:
+        """
+        Update the initialization, the warm start database, the switching sequence and the
+        solution cache with the results of solve().
+        """
+        opts = self.opts
+        prob = self.problem
+        w_opt = results["w_sol"]
+        success = results["status"] == Status.SUCCESS
+
+        if opts.initialization_strategy == InitializationStrategy.ALL_XCURRENT_WOPT_PREV:
+            prob.w0[:] = w_opt[:]
+        elif opts.initialization_strategy == InitializationStrategy.WARM_START_DATABASE and success:
+            self.warm_start_db.add(self.get_warm_start_features(), w_opt, self.nlp_solution["lam_x"],
+                                   self.nlp_solution["lam_g"])
+
+        if opts.fixed_switching_sequence and success:
+            self.switching_sequence = prob.get_switching_sequence(
+                w_opt, opts.fixed_switching_sequence_tol)
+
+        if self.solution_cache is not None and success:
+            self.solution_cache.put(cache_key, {
+                "results": results,
+                "nlp_solution": self.nlp_solution,
+                "cost_val_opt": self.cost_val_opt
+            })
+
         return results
 
 
@@ -484,8 +1110,21 @@ def get_results_from_primal_vector(prob: NosnocProblem, w_opt: np.ndarray) -> di
     if opts.speed_of_time_variables != SpeedOfTimeVariableMode.NONE:
         results["sot"] = [w_opt[ind] for ind in prob.ind_sot]
 
-    results["theta_list"] = [w_opt[ind] for ind in get_cont_algebraic_indices(prob.ind_theta)]
-    results["lambda_list"] = [w_opt[ind] for ind in get_cont_algebraic_indices(prob.ind_lam)]
+    # one array per subsystem, as n_f_sys may differ between subsystems
+    results["theta_list"] = [[w_opt[ind_sys] for ind_sys in ind]
+                             for ind in get_cont_algebraic_indices(prob.ind_theta)]
+    results["lambda_list"] = [[w_opt[ind_sys] for ind_sys in ind]
+                              for ind in get_cont_algebraic_indices(prob.ind_lam)]
+    if opts.pss_mode == PssMode.STEWART and opts.eliminate_lambda:
+        # lambda = g_Stewart(x) + mu is no variable, evaluate it at the end of each finite element
+        model = prob.model
+        split = np.cumsum([0] + model.dims.n_f_sys)
+        results["lambda_list"] = []
+        for ctrl_idx, (ind_x_stage, ind_mu_stage) in enumerate(zip(prob.ind_x_cont, prob.ind_mu)):
+            for ind_x, ind_mu in zip(ind_x_stage, ind_mu_stage):
+                lam = model.lambda_stewart_fun(w_opt[ind_x], w_opt[flatten(ind_mu[-1])],
+                                               model.p_val_ctrl_stages[ctrl_idx]).full().flatten()
+                results["lambda_list"].append([lam[split[i]:split[i + 1]] for i in range(model.dims.n_sys)])
     # results["mu_list"] = [w_opt[ind] for ind in ind_mu_all]
     # if opts.pss_mode == PssMode.STEP:
     results["alpha_list"] = [
@@ -530,7 +1169,7 @@ def get_results_from_primal_vector(prob: NosnocProblem, w_opt: np.ndarray) -> di
     else:
         theta_prev = results["theta_list"][0]
         for i, theta in enumerate(results["theta_list"][1:]):
-            if any(np.abs(theta.flatten() - theta_prev.flatten()) > 0.1):
+            if any(np.abs(np.concatenate(theta) - np.concatenate(theta_prev)) > 0.1):
                 switch_indices.append(i)
             theta_prev = theta
 
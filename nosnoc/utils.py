@@ -61,6 +61,13 @@ def casadi_sum_list(input: list):
     return result
 
 
+def casadi_prod_list(input: list):
+    result = input[0]
+    for v in input[1:]:
+        result *= v
+    return result
+
+
 def check_ipopt_success(status: str):
     if status in ['Solve_Succeeded', 'Solved_To_Acceptable_Level', 'Feasible_Point_Found', 'Search_Direction_Becomes_Too_Small']:
         return True
@@ -0,0 +1,67 @@
+from typing import Optional
+from collections import deque
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class NosnocWarmStartDatabase:
+    """
+    Database of past solutions indexed by feature vectors, e.g. built from x0 and the parameters.
+    Used by InitializationStrategy.WARM_START_DATABASE to initialize a solve with a blend of the
+    solutions of the k nearest stored features, found via a KD-tree.
+
+    The database is bounded by max_size, if full, the oldest entry is evicted.
+    """
+
+    def __init__(self, max_size: int = 1000, k: int = 3):
+        """
+        :param max_size: maximum number of stored solutions.
+        :param k: number of nearest neighbors that are blended.
+        """
+        if max_size < 1:
+            raise ValueError(f"warm start database max_size should be >= 1, got {max_size}")
+        if k < 1:
+            raise ValueError(f"warm start database k should be >= 1, got {k}")
+        self.max_size = max_size
+        self.k = k
+        self.entries: deque = deque(maxlen=max_size)
+        self._tree: Optional[cKDTree] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, features: np.ndarray, w: np.ndarray, lam_x: np.ndarray, lam_g: np.ndarray) -> None:
+        """Store a solution with its multipliers."""
+        self.entries.append((np.array(features, dtype=float), w.copy(), lam_x.copy(), lam_g.copy()))
+        self._tree = None
+
+    def query(self, features: np.ndarray) -> Optional[dict]:
+        """
+        Blend the k nearest solutions with inverse distance weights.
+
+        :return: None if the database is empty, otherwise a dict with the blended "w", "lam_x", "lam_g"
+            and the distance to the nearest stored features "distance".
+        """
+        if len(self.entries) == 0:
+            return None
+        if self._tree is None:
+            self._tree = cKDTree(np.array([entry[0] for entry in self.entries]))
+        k = min(self.k, len(self.entries))
+        distances, indices = self._tree.query(np.array(features, dtype=float), k=k)
+        distances = np.atleast_1d(distances)
+        indices = np.atleast_1d(indices)
+
+        if distances[0] == 0.0:
+            weights = np.zeros(k)
+            weights[0] = 1.0
+        else:
+            weights = 1 / distances
+            weights /= np.sum(weights)
+
+        blended = {
+            name: sum(weights[i] * self.entries[j][field] for i, j in enumerate(indices))
+            for field, name in [(1, "w"), (2, "lam_x"), (3, "lam_g")]
+        }
+        blended["distance"] = distances[0]
+        return blended
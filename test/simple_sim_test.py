@@ -174,6 +174,26 @@ class SimpleTests(unittest.TestCase):
             raise Exception(f"Test failed.")
 
 
+    def test_least_squares_gauss_newton(self):
+        model = get_simplest_model_switch()
+
+        opts = get_default_options()
+        opts.n_s = 2
+        opts.constraint_handling = nosnoc.ConstraintHandling.LEAST_SQUARES
+        opts.gauss_newton_hessian = True
+        opts.cross_comp_mode = nosnoc.CrossComplementarityMode.COMPLEMENT_ALL_STAGE_VALUES_WITH_EACH_OTHER
+        opts.mpcc_mode = nosnoc.MpccMode.FISCHER_BURMEISTER_IP_AUG
+        opts.step_equilibration = nosnoc.StepEquilibrationMode.DIRECT_COMPLEMENTARITY
+        opts.initialization_strategy = nosnoc.InitializationStrategy.ALL_XCURRENT_W0_START
+        opts.sigma_0 = 1e0
+        opts.gamma_h = np.inf
+
+        check_opts(opts, model=model)
+
+        opts.constraint_handling = nosnoc.ConstraintHandling.EXACT
+        with self.assertRaises(ValueError):
+            opts.preprocess()
+
     def test_least_squares_problem_opts(self):
         model = get_simplest_model_switch()
 
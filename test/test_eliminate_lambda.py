@@ -0,0 +1,60 @@
+import unittest
+from parameterized import parameterized
+import numpy as np
+
+import nosnoc
+from examples.simplest.simplest_example import (
+    get_default_options,
+    get_simplest_model_sliding,
+    solve_simplest_example,
+)
+from examples.sliding_mode_ocp.sliding_mode_ocp import solve_ocp
+from examples.sliding_mode_ocp.sliding_mode_ocp import get_default_options as get_ocp_options
+
+IRK_SCHEMES = [nosnoc.IrkSchemes.RADAU_IIA, nosnoc.IrkSchemes.GAUSS_LEGENDRE]
+IRK_REPRESENTATIONS = [
+    nosnoc.IrkRepresentation.DIFFERENTIAL,
+    nosnoc.IrkRepresentation.DIFFERENTIAL_LIFT_X,
+    nosnoc.IrkRepresentation.INTEGRAL,
+]
+options = [(irk_scheme, irk_representation)
+           for irk_scheme in IRK_SCHEMES
+           for irk_representation in IRK_REPRESENTATIONS]
+
+
+class TestEliminateLambda(unittest.TestCase):
+
+    @parameterized.expand(options)
+    def test_sliding_mode(self, irk_scheme, irk_representation):
+        opts = get_default_options()
+        opts.comp_tol = 1e-7
+        opts.pss_mode = nosnoc.PssMode.STEWART
+        opts.eliminate_lambda = True
+        opts.irk_scheme = irk_scheme
+        opts.irk_representation = irk_representation
+
+        x0 = np.array([-np.sqrt(2)])
+        results = solve_simplest_example(opts, get_simplest_model_sliding(x0), x0=x0, Nsim=7, Tsim=2.0)
+
+        xt = np.vstack((results["X_sim"].T, results["t_grid"]))
+        diff = xt - np.array([[0], [np.sqrt(2) / 3]])
+        self.assertTrue(np.min(np.linalg.norm(diff, axis=0)) < 1e-5)
+
+    def test_ocp(self):
+        results = dict()
+        n_w = dict()
+        for eliminate_lambda in [False, True]:
+            opts = get_ocp_options()
+            opts.pss_mode = nosnoc.PssMode.STEWART
+            opts.eliminate_lambda = eliminate_lambda
+            opts.print_level = 0
+            results[eliminate_lambda] = solve_ocp(opts)
+            n_w[eliminate_lambda] = len(results[eliminate_lambda]["w_sol"])
+        self.assertLess(n_w[True], n_w[False])
+        self.assertTrue(np.allclose(results[True]["cost_val"], results[False]["cost_val"], rtol=1e-3))
+        lam_true = np.concatenate([np.concatenate(lam) for lam in results[True]["lambda_list"]])
+        self.assertTrue(np.all(lam_true > -1e-6))
+
+
+if __name__ == "__main__":
+    unittest.main()
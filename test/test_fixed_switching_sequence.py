@@ -0,0 +1,80 @@
+import unittest
+from parameterized import parameterized
+
+import numpy as np
+
+import nosnoc
+from examples.simple_car_algebraics.simple_car_algebraic import car_model, get_default_options
+
+
+def get_solver(pss_mode, fixed_switching_sequence, **kwargs):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.terminal_time = 30
+    opts.N_stages = 10
+    opts.pss_mode = pss_mode
+    opts.fixed_switching_sequence = fixed_switching_sequence
+    for key, value in kwargs.items():
+        setattr(opts, key, value)
+    model, ocp = car_model()
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+class TestFixedSwitchingSequence(unittest.TestCase):
+
+    @parameterized.expand([(nosnoc.PssMode.STEWART,), (nosnoc.PssMode.STEP,)])
+    def test_perturbed_x0(self, pss_mode):
+        solver = get_solver(pss_mode, True)
+        results_nominal = solver.solve()
+        self.assertFalse(results_nominal["fixed_switching_sequence"])
+        self.assertIsNotNone(solver.switching_sequence)
+
+        solver.set('x0', np.array([0.1, 0.0]))
+        results = solver.solve()
+        self.assertTrue(results["fixed_switching_sequence"])
+        self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+        self.assertLess(sum(results["nlp_iter"]), sum(results_nominal["nlp_iter"]))
+        # the solution is feasible for the problem with complementarity constraints
+        prob = solver.problem
+        w = results["w_sol"]
+        g_val = prob.g_fun(w, solver.p_val).full().flatten()
+        self.assertTrue(np.all(g_val >= prob.lbg - 1e-6) and np.all(g_val <= prob.ubg + 1e-6))
+        self.assertLess(prob.comp_res(w, solver.p_val).full()[0][0], solver.opts.comp_tol)
+        # and close to the nominal solution
+        self.assertAlmostEqual(results["cost_val"], results_nominal["cost_val"], places=2)
+
+    def test_fallback(self):
+        solver = get_solver(nosnoc.PssMode.STEWART, True)
+        solver.solve()
+
+        # starting above the speed limit changes the active modes
+        solver.set('x0', np.array([0.0, 20.0]))
+        results = solver.solve()
+        self.assertFalse(results["fixed_switching_sequence"])
+        self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+        self.assertIsNotNone(solver.switching_sequence)
+
+    def test_postprocessing(self):
+        # results of the fixed sequence solve are cached and have the same fields
+        solver = get_solver(nosnoc.PssMode.STEWART, True, use_solution_cache=True,
+                            homotopy_warm_start=True, homotopy_predictor=True)
+        results_nominal = solver.solve()
+        solver.set('x0', np.array([0.1, 0.0]))
+        results = solver.solve()
+        self.assertTrue(results["fixed_switching_sequence"])
+        self.assertEqual(results.keys(), results_nominal.keys())
+
+        results_cached = solver.solve()
+        self.assertEqual(solver.solution_cache.hits, 1)
+        self.assertTrue(np.array_equal(results_cached["w_sol"], results["w_sol"]))
+
+    def test_not_implemented(self):
+        opts = get_default_options()
+        opts.fixed_switching_sequence = True
+        opts.mpcc_mode = nosnoc.MpccMode.ELASTIC_INEQ
+        with self.assertRaises(NotImplementedError):
+            opts.preprocess()
+
+
+if __name__ == "__main__":
+    unittest.main()
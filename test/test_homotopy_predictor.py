@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+import nosnoc
+from examples.simplest.simplest_example import get_default_options, get_simplest_model_switch
+
+
+class TestHomotopyPredictor(unittest.TestCase):
+
+    def test_tangent(self):
+        opts = get_default_options()
+        opts.print_level = 0
+        opts.mpcc_mode = nosnoc.MpccMode.SCHOLTES_INEQ
+        opts.sigma_0 = 1e-1
+        opts.sigma_N = 1e-1
+        solver = nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+        w = solver.solve()["w_sol"]
+        dw_dsigma = solver.compute_homotopy_tangent()
+
+        # the tangent step satisfies the constraints at the new sigma to second order
+        prob = solver.problem
+        for delta in [-1e-3, -1e-4]:
+            sigma = opts.sigma_0 + delta
+            solver.setup_p_val(sigma, min(sigma**1.5, sigma))
+            violation = []
+            for w_new in [w, w + delta * dw_dsigma]:
+                g_val = prob.g_fun(w_new, solver.p_val).full().flatten()
+                violation.append(np.max(np.maximum(prob.lbg - g_val, g_val - prob.ubg)))
+            self.assertLess(violation[1], 1e-2 * violation[0])
+
+    def test_solve(self):
+        results = []
+        for homotopy_predictor in [False, True]:
+            opts = get_default_options()
+            opts.print_level = 0
+            opts.homotopy_predictor = homotopy_predictor
+            solver = nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+            results.append(solver.solve())
+        self.assertEqual(results[1]["status"], nosnoc.Status.SUCCESS)
+        self.assertIn("cpu_time_predictor", results[1])
+        self.assertTrue(np.allclose(results[0]["x_traj"], results[1]["x_traj"], atol=1e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+import nosnoc
+from examples.simplest.simplest_example import get_default_options, get_simplest_model_switch
+from examples.oscillator.oscillator_example import (
+    get_default_options as get_oscillator_options,
+    get_oscillator_model,
+)
+
+
+class TestHomotopyWarmStart(unittest.TestCase):
+
+    def test_cold_start(self):
+        # the default initial guess is far from complementarity, nothing is skipped
+        results = []
+        for homotopy_warm_start in [False, True]:
+            opts = get_default_options()
+            opts.print_level = 0
+            opts.homotopy_warm_start = homotopy_warm_start
+            solver = nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+            results.append(solver.solve())
+        self.assertEqual(results[1]["homotopy_iter_skipped"], 0)
+        self.assertEqual(results[0]["nlp_iter"], results[1]["nlp_iter"])
+
+    def test_cold_start_full_schedule(self):
+        # on a cold start, homotopy iterations are not skipped even if an iterate is close to
+        # complementarity
+        results = []
+        for homotopy_warm_start in [False, True]:
+            opts = get_oscillator_options()
+            opts.print_level = 0
+            opts.homotopy_update_slope = 0.5
+            opts.homotopy_warm_start = homotopy_warm_start
+            solver = nosnoc.NosnocSolver(opts, get_oscillator_model())
+            results.append(solver.solve())
+        self.assertEqual(results[1]["homotopy_iter_skipped"], 0)
+        self.assertEqual(results[0]["nlp_iter"], results[1]["nlp_iter"])
+
+    def test_external_initial_guess(self):
+        opts = get_default_options()
+        opts.print_level = 0
+        solver = nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+        results_ref = solver.solve()
+
+        opts = get_default_options()
+        opts.print_level = 0
+        opts.homotopy_warm_start = True
+        opts.initialization_strategy = nosnoc.InitializationStrategy.EXTERNAL
+        solver = nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+        solver.set('w', results_ref["w_sol"].copy())
+        results = solver.solve()
+
+        self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+        self.assertGreater(results["homotopy_iter_skipped"], 0)
+        n_iter = sum(i for i in results["nlp_iter"] if i is not None)
+        n_iter_ref = sum(i for i in results_ref["nlp_iter"] if i is not None)
+        self.assertLess(n_iter, n_iter_ref)
+        self.assertTrue(np.allclose(results["x_traj"], results_ref["x_traj"], atol=1e-5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+import nosnoc
+from examples.simplest.simplest_example import (
+    get_default_options,
+    get_simplest_model_sliding,
+    get_simplest_model_switch,
+)
+
+
+class TestL1Penalty(unittest.TestCase):
+
+    def test_simplest(self):
+        for get_model in [get_simplest_model_switch, get_simplest_model_sliding]:
+            results = []
+            for mpcc_mode in [nosnoc.MpccMode.SCHOLTES_INEQ, nosnoc.MpccMode.L1_PENALTY]:
+                opts = get_default_options()
+                opts.print_level = 0
+                opts.mpcc_mode = mpcc_mode
+                opts.set_recommended_homotopy_schedule()
+                solver = nosnoc.NosnocSolver(opts, get_model())
+                results.append(solver.solve())
+            self.assertEqual(results[1]["status"], nosnoc.Status.SUCCESS)
+            self.assertLess(solver.problem.comp_res(results[1]["w_sol"], solver.p_val).full(),
+                            opts.comp_tol)
+            self.assertTrue(np.allclose(results[0]["x_traj"], results[1]["x_traj"], atol=1e-4))
+
+    def test_recommended_homotopy_schedule(self):
+        opts = nosnoc.NosnocOpts()
+        opts.mpcc_mode = nosnoc.MpccMode.L1_PENALTY
+        opts.set_recommended_homotopy_schedule()
+        self.assertEqual((opts.sigma_0, opts.homotopy_update_slope),
+                         nosnoc.RECOMMENDED_HOMOTOPY_SCHEDULES[nosnoc.MpccMode.L1_PENALTY])
+
+        opts.mpcc_mode = nosnoc.MpccMode.SCHOLTES_INEQ
+        opts.set_recommended_homotopy_schedule()
+        self.assertEqual(opts.sigma_0, nosnoc.NosnocOpts.sigma_0)
+        self.assertEqual(opts.homotopy_update_slope, nosnoc.NosnocOpts.homotopy_update_slope)
+
+    def test_not_implemented(self):
+        opts = get_default_options()
+        opts.print_level = 0
+        opts.mpcc_mode = nosnoc.MpccMode.L1_PENALTY
+        opts.step_equilibration = nosnoc.StepEquilibrationMode.DIRECT_COMPLEMENTARITY
+        with self.assertRaises(NotImplementedError):
+            nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import nosnoc
+from examples.simplest.simplest_example import get_default_options, get_simplest_model_switch
+
+CONFIGURATIONS = [{'linear_solver': 'mumps', 'mu_strategy': 'adaptive'},
+                  {'linear_solver': 'mumps', 'mu_strategy': 'monotone'},
+                  {'linear_solver': 'mumps', 'max_iter': 0}]
+
+
+def get_solver(**tuning_opts):
+    opts = get_default_options()
+    opts.print_level = 0
+    for key, value in tuning_opts.items():
+        setattr(opts, key, value)
+    return nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+
+
+class TestLinearSolverTuning(unittest.TestCase):
+
+    def test_available_linear_solvers(self):
+        available = nosnoc.get_available_linear_solvers(['mumps', 'not_a_linear_solver'])
+        self.assertEqual(available, ['mumps'])
+
+    def test_autotune_and_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file = os.path.join(tmp_dir, "tuning.json")
+            solver = get_solver()
+            results_ref = solver.solve()
+            tuning = nosnoc.autotune_linear_solver(solver, CONFIGURATIONS, file=file)
+
+            self.assertEqual(len(tuning["timings"]), len(CONFIGURATIONS))
+            self.assertEqual(tuning["timings"][-1][1], np.inf)
+            self.assertIn(tuning["ipopt_opts"], CONFIGURATIONS[:2])
+            self.assertTrue(os.path.exists(file))
+            # tuned solver gives the same solution
+            results = solver.solve()
+            self.assertTrue(np.allclose(results["w_sol"], results_ref["w_sol"], atol=1e-6))
+
+            # options are applied on construction for the same problem
+            solver_tuned = get_solver(linear_solver_tuning_file=file)
+            self.assertEqual(solver_tuned.tuned_ipopt_opts, tuning["ipopt_opts"])
+            # but not for a different one
+            solver_other = get_solver(linear_solver_tuning_file=file, N_finite_elements=3)
+            self.assertIsNone(solver_other.tuned_ipopt_opts)
+
+    def test_autotune_fixed_switching_sequence(self):
+        solver = get_solver(fixed_switching_sequence=True)
+        solver.solve()
+        switching_sequence = solver.switching_sequence
+        self.assertIsNotNone(switching_sequence)
+
+        # every configuration is timed on the full homotopy, not on the fixed sequence NLP
+        solve = solver.solve
+        fixed_sequence_solves = []
+
+        def solve_and_record():
+            results = solve()
+            fixed_sequence_solves.append(results["fixed_switching_sequence"])
+            return results
+
+        solver.solve = solve_and_record
+        tuning = nosnoc.autotune_linear_solver(solver, CONFIGURATIONS[:2], n_repeat=2)
+        solver.solve = solve
+        self.assertEqual(fixed_sequence_solves, 4 * [False])
+        self.assertEqual(solver.tuned_ipopt_opts, tuning["ipopt_opts"])
+        self.assertIs(solver.switching_sequence, switching_sequence)
+        self.assertIsNone(solver.fixed_sequence_solver)
+        self.assertTrue(solver.solve()["fixed_switching_sequence"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from parameterized import parameterized
+
+import numpy as np
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options,
+    TERMINAL_TIME,
+)
+
+
+def solve_sliding_mode_ocp(**map_opts):
+    opts = get_default_options()
+    opts.terminal_time = TERMINAL_TIME
+    opts.print_level = 0
+    for key, value in map_opts.items():
+        setattr(opts, key, value)
+    model, ocp = get_sliding_mode_ocp_description()
+    solver = nosnoc.NosnocSolver(opts, model, ocp)
+    return solver, solver.solve()
+
+
+class TestMapFiniteElements(unittest.TestCase):
+
+    @parameterized.expand([('serial', 1), ('thread', 2)])
+    def test_sliding_mode_ocp(self, parallelization, n_threads):
+        _, results_ref = solve_sliding_mode_ocp()
+        solver, results = solve_sliding_mode_ocp(map_finite_elements=True,
+                                                 parallelization=parallelization,
+                                                 n_threads=n_threads)
+        # first finite element of a control stage and all others
+        self.assertEqual(solver.problem.n_mapped_groups, 2)
+        self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+        self.assertTrue(np.allclose(results["w_sol"], results_ref["w_sol"], atol=1e-6))
+
+    def test_mapped_g(self):
+        solver, _ = solve_sliding_mode_ocp(map_finite_elements=True, max_iter_homotopy=1)
+        prob = solver.problem
+        solver.setup_p_val(1.0, 1.0)
+        w_val = prob.w0 + np.random.default_rng(0).uniform(size=prob.w0.shape)
+        g_ref = prob.g_fun(w_val, solver.p_val).full()
+        g = solver.solver.get_function('nlp_g')(w_val, solver.p_val).full()
+        self.assertTrue(np.allclose(g, g_ref))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+import nosnoc
+from examples.oscillator.oscillator_example import (
+    get_oscillator_model,
+    get_default_options,
+    TSIM,
+    X_SOL,
+)
+
+
+def get_options(use_fesd=True):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.n_s = 2
+    opts.N_stages = 4
+    opts.N_finite_elements = 2
+    opts.terminal_time = TSIM
+    opts.use_fesd = use_fesd
+    return opts
+
+
+class TestMeshRefinement(unittest.TestCase):
+
+    def test_error_estimate(self):
+        opts = get_options()
+        solver = nosnoc.NosnocSolver(opts, get_oscillator_model())
+        results = solver.solve()
+        defect_fun = solver.problem.create_defect_fun()
+        defect_fe = defect_fun(results["w_sol"], solver.p_val).full().flatten()
+        self.assertEqual(len(defect_fe), sum(opts.Nfe_list))
+
+        errors = nosnoc.estimate_stage_errors(solver, results)
+        self.assertEqual(errors["defect"].shape, (opts.N_stages,))
+        self.assertTrue(np.all(errors["defect"] > 0))
+        # the oscillator switches once at t = 1
+        self.assertEqual(np.sum(errors["n_switches"]), 1)
+
+    def test_refinement(self):
+        opts = get_options()
+        tol = 5e-3
+        results = nosnoc.solve_with_mesh_refinement(opts, get_oscillator_model(), tol=tol)
+        history = results["mesh_refinement"]
+
+        self.assertTrue(results["converged"])
+        self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+        self.assertTrue(np.all(history[-1]["defect"] <= tol))
+        self.assertGreater(len(history), 1)
+        # only stages above tol are refined
+        for prev, new in zip(history[:-1], history[1:]):
+            refined = np.array(new["Nfe_list"]) > np.array(prev["Nfe_list"])
+            self.assertTrue(np.all(refined == (prev["defect"] > tol)))
+        self.assertEqual(results["Nfe_list"], history[-1]["Nfe_list"])
+        # opts is not modified
+        self.assertEqual(opts.Nfe_list, [])
+
+        solver = nosnoc.NosnocSolver(get_options(), get_oscillator_model())
+        err_initial = np.max(np.abs(solver.solve()["x_out"] - X_SOL))
+        err_refined = np.max(np.abs(results["x_out"] - X_SOL))
+        self.assertLess(err_refined, err_initial)
+
+    def test_uniform_without_fesd(self):
+        opts = get_options(use_fesd=False)
+        results = nosnoc.solve_with_mesh_refinement(opts,
+                                                    get_oscillator_model(),
+                                                    tol=1e-8,
+                                                    max_refinements=1,
+                                                    uniform=True)
+        self.assertFalse(results["converged"])
+        self.assertEqual(results["Nfe_list"], opts.N_stages * [2 * opts.N_finite_elements])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            nosnoc.solve_with_mesh_refinement(get_options(), get_oscillator_model(),
+                                              refinement_factor=1)
+        with self.assertRaises(ValueError):
+            nosnoc.solve_with_mesh_refinement(get_options(), get_oscillator_model(),
+                                              max_refinements=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
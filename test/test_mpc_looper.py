@@ -0,0 +1,100 @@
+import unittest
+import numpy as np
+from casadi import SX, DM, horzcat
+import nosnoc
+
+X0 = np.array([1.0])
+N_STAGES = 4
+T_HORIZON = 0.4
+NSIM = 8
+
+
+def get_model(control_as_parameter=False):
+    x = SX.sym('x')
+    u = SX.sym('u')
+    F = [horzcat(3 + u, -1 + u)]
+    c = [x]
+    S = [np.array([[-1], [1]])]
+    if control_as_parameter:
+        return nosnoc.NosnocModel(x=x, F=F, c=c, S=S, x0=X0, p_global=u, p_global_val=np.zeros(1))
+    return nosnoc.NosnocModel(x=x, F=F, c=c, S=S, x0=X0, u=u)
+
+
+def get_controller():
+    opts = nosnoc.NosnocOpts()
+    opts.N_stages = N_STAGES
+    opts.N_finite_elements = 2
+    opts.terminal_time = T_HORIZON
+    opts.comp_tol = 1e-6
+    opts.print_level = 0
+    opts.initialization_strategy = nosnoc.InitializationStrategy.EXTERNAL
+    model = get_model()
+    ocp = nosnoc.NosnocOcp(lbu=-2 * np.ones(1), ubu=2 * np.ones(1),
+                           f_q=model.x**2 + 0.1 * model.u**2, f_terminal=10 * model.x**2)
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+def get_plant_solver():
+    opts = nosnoc.NosnocOpts()
+    opts.terminal_time = T_HORIZON / N_STAGES
+    opts.comp_tol = 1e-6
+    opts.print_level = 0
+    return nosnoc.NosnocSolver(opts, get_model(control_as_parameter=True))
+
+
+def smooth_plant(x, u):
+    # smooth approximation of the switching dynamics
+    f = lambda x: DM(1 + u - 2 * np.tanh(x / 0.05))
+    x_traj, _ = nosnoc.rk4(f, x, T_HORIZON / N_STAGES, n_steps=20)
+    return x_traj[-1]
+
+
+class TestMpcLooper(unittest.TestCase):
+
+    def check_closed_loop(self, plant, tol=1e-3):
+        looper = nosnoc.NosnocMpcLooper(get_controller(), plant, X0, NSIM)
+        looper.run()
+        results = looper.get_results()
+
+        self.assertEqual(results["X_sim"].shape, (NSIM + 1, 1))
+        self.assertEqual(results["U_sim"].shape, (NSIM, 1))
+        self.assertTrue(np.all(np.abs(results["U_sim"]) <= 2 + 1e-6))
+        self.assertTrue(abs(results["X_sim"][-1][0]) < tol)
+        self.assertTrue(all(status == nosnoc.Status.SUCCESS for status in results["status"]))
+        stats = results["latency_stats"]
+        self.assertTrue(stats["p50"] <= stats["p90"] <= stats["p99"] <= stats["max"])
+        return results
+
+    def test_nosnoc_plant(self):
+        self.check_closed_loop(get_plant_solver())
+
+    def test_smooth_plant(self):
+        self.check_closed_loop(smooth_plant, tol=5e-2)
+
+    def test_deadline_misses(self):
+        for deadline, n_misses in [(np.inf, 0), (0.0, NSIM)]:
+            looper = nosnoc.NosnocMpcLooper(get_controller(), smooth_plant, X0, NSIM, deadline=deadline)
+            looper.run()
+            stats = looper.get_results()["latency_stats"]
+            self.assertEqual(stats["deadline"], deadline)
+            self.assertEqual(stats["deadline_misses"], n_misses)
+
+    def test_shift(self):
+        looper = nosnoc.NosnocMpcLooper(get_controller(), smooth_plant, X0, NSIM)
+        problem = looper.controller.problem
+        w = np.arange(problem.w.shape[0], dtype=float)
+        w_shifted = looper.shift(w)
+        for i in range(N_STAGES - 1):
+            self.assertTrue(np.array_equal(w_shifted[looper.ind_w_stages[i]], w[looper.ind_w_stages[i + 1]]))
+        self.assertTrue(np.array_equal(w_shifted[looper.ind_w_stages[-1]], w[looper.ind_w_stages[-1]]))
+
+    def test_requires_external_initialization(self):
+        controller = get_controller()
+        controller.opts.initialization_strategy = nosnoc.InitializationStrategy.ALL_XCURRENT_W0_START
+        with self.assertRaises(ValueError):
+            nosnoc.NosnocMpcLooper(controller, smooth_plant, X0, NSIM)
+        nosnoc.NosnocMpcLooper(controller, smooth_plant, X0, NSIM, shift_warm_start=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import casadi as ca
+import numpy as np
+
+import nosnoc
+from examples.simplest.simplest_example import (
+    get_default_options,
+    get_simplest_model_sliding,
+    get_simplest_model_switch,
+)
+from nosnoc.problem import NosnocFormulationObject
+
+
+class ComplementarityFormulation(NosnocFormulationObject):
+
+    def __init__(self, opts):
+        super().__init__()
+        self.opts = opts
+        self.ind_comp = []
+
+
+def solve(mpcc_mode, get_model):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.mpcc_mode = mpcc_mode
+    opts.set_recommended_homotopy_schedule()
+    return nosnoc.NosnocSolver(opts, get_model()).solve()
+
+
+class TestMpccRelaxations(unittest.TestCase):
+
+    def check_relaxation(self, mpcc_mode, get_model):
+        results_ref = solve(nosnoc.MpccMode.SCHOLTES_INEQ, get_model)
+        results = solve(mpcc_mode, get_model)
+        self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+        self.assertTrue(np.allclose(results_ref["x_traj"], results["x_traj"], atol=1e-4))
+
+    def test_kanzow_schwartz(self):
+        for get_model in [get_simplest_model_switch, get_simplest_model_sliding]:
+            self.check_relaxation(nosnoc.MpccMode.KANZOW_SCHWARTZ, get_model)
+
+    def test_steffensen_ulbrich(self):
+        for get_model in [get_simplest_model_switch, get_simplest_model_sliding]:
+            with self.assertWarns(UserWarning):
+                self.check_relaxation(nosnoc.MpccMode.STEFFENSEN_ULBRICH, get_model)
+        self.assertNotIn(nosnoc.MpccMode.STEFFENSEN_ULBRICH, nosnoc.RECOMMENDED_HOMOTOPY_SCHEDULES)
+
+    def test_relaxation_functions(self):
+        # complementary pairs are feasible, pairs with min(w_1, w_2) > sigma are not
+        w_1 = ca.SX.sym("w_1", 4)
+        w_2 = ca.SX.sym("w_2", 4)
+        sigma = ca.SX.sym("sigma")
+        for mpcc_mode in [nosnoc.MpccMode.KANZOW_SCHWARTZ, nosnoc.MpccMode.STEFFENSEN_ULBRICH]:
+            opts = nosnoc.NosnocOpts()
+            opts.mpcc_mode = mpcc_mode
+            formulation = ComplementarityFormulation(opts)
+            formulation.create_complementarity([w_1], w_2, sigma, sigma, None)
+            g_fun = ca.Function("g_fun", [w_1, w_2, sigma], [formulation.g])
+            g = g_fun([0.0, 2.0, 0.0, 0.5], [3.0, 0.0, 0.0, 0.5], 0.1).full().flatten()
+            self.assertTrue(np.all(g[:3] <= formulation.ubg[:3]))
+            self.assertGreater(g[3], formulation.ubg[3])
+
+    def test_not_implemented(self):
+        for mpcc_mode in [nosnoc.MpccMode.KANZOW_SCHWARTZ, nosnoc.MpccMode.STEFFENSEN_ULBRICH]:
+            opts = get_default_options()
+            opts.print_level = 0
+            opts.mpcc_mode = mpcc_mode
+            opts.step_equilibration = nosnoc.StepEquilibrationMode.DIRECT_COMPLEMENTARITY
+            with self.assertRaises(NotImplementedError):
+                nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+
+import numpy as np
+
+import nosnoc
+from nosnoc.utils import flatten, flatten_layer
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options,
+    TERMINAL_TIME,
+    X_TARGET,
+)
+
+
+def get_options():
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.terminal_time = TERMINAL_TIME
+    opts.N_stages = 6
+    opts.N_finite_elements = 2
+    return opts
+
+
+class TestMultilevel(unittest.TestCase):
+
+    def test_prolongation_identity(self):
+        # prolongation to the same discretization reproduces the solution
+        for irk_representation in [nosnoc.IrkRepresentation.INTEGRAL,
+                                   nosnoc.IrkRepresentation.DIFFERENTIAL]:
+            opts = get_options()
+            opts.irk_representation = irk_representation
+            model, ocp = get_sliding_mode_ocp_description()
+            solver = nosnoc.NosnocSolver(opts, model, ocp)
+            results = solver.solve()
+            prob = solver.problem
+            prob.w0[:] = 0.0
+            nosnoc.prolongate_solution(prob, prob, results)
+            ind = flatten([prob.ind_x, prob.ind_u, prob.ind_h, prob.ind_v, prob.ind_theta,
+                           prob.ind_lam, prob.ind_mu])
+            self.assertTrue(np.allclose(prob.w0[ind], results["w_sol"][ind], atol=1e-10))
+
+    def test_prolongation_finite_elements(self):
+        # every coarse finite element is split in two
+        opts = get_options()
+        model, ocp = get_sliding_mode_ocp_description()
+        solver_coarse = nosnoc.NosnocSolver(nosnoc.create_coarse_opts(opts, N_finite_elements=1),
+                                            model, ocp)
+        results = solver_coarse.solve()
+        prob = nosnoc.NosnocSolver(opts, *get_sliding_mode_ocp_description()).problem
+        nosnoc.prolongate_solution(prob, solver_coarse.problem, results)
+
+        x_fine = np.array([prob.w0[ind] for ind in flatten_layer(prob.ind_x_cont)])
+        self.assertTrue(np.allclose(x_fine[1::2], np.array(results["x_list"])))
+        h_fine = prob.w0[prob.ind_h]
+        self.assertTrue(np.allclose(h_fine[::2] + h_fine[1::2], results["time_steps"]))
+
+    def test_prolongation_control_stages(self):
+        opts = get_options()
+        model, ocp = get_sliding_mode_ocp_description()
+        solver_coarse = nosnoc.NosnocSolver(nosnoc.create_coarse_opts(opts, N_stages=3),
+                                            model, ocp)
+        results = solver_coarse.solve()
+        prob = nosnoc.NosnocSolver(opts, *get_sliding_mode_ocp_description()).problem
+        nosnoc.prolongate_solution(prob, solver_coarse.problem, results)
+
+        u_fine = np.array([prob.w0[ind] for ind in prob.ind_u])
+        self.assertTrue(np.allclose(u_fine, np.repeat(np.array(results["u_list"]), 2, axis=0)))
+        # states on the coarse trajectory
+        x_end = prob.w0[prob.ind_x[-1][-1][-1]]
+        self.assertTrue(np.allclose(x_end, results["x_out"]))
+
+    def test_multilevel_solve(self):
+        opts = get_options()
+        opts_levels = [nosnoc.create_coarse_opts(opts, N_stages=3, N_finite_elements=1, n_s=1),
+                       opts]
+        model, ocp = get_sliding_mode_ocp_description()
+        solver = nosnoc.NosnocMultilevelSolver(opts_levels, model, ocp, sigma_0_fine=1e-4)
+        self.assertEqual(solver.solvers[1].opts.sigma_0, 1e-4)
+        self.assertEqual(solver.solvers[1].opts.initialization_strategy,
+                         nosnoc.InitializationStrategy.EXTERNAL)
+        # solve twice, the solvers are reused
+        for _ in range(2):
+            results = solver.solve()
+            self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+            levels = results["multilevel"]
+            self.assertEqual([level["N_stages"] for level in levels], [3, 6])
+            self.assertEqual([level["n_s"] for level in levels], [1, opts.n_s])
+            self.assertLess(levels[1]["n_homotopy_iter"], levels[0]["n_homotopy_iter"])
+            self.assertAlmostEqual(results["cpu_time_total"],
+                                   sum(level["cpu_time"] for level in levels))
+        self.assertTrue(np.allclose(results["x_out"][:2], X_TARGET, atol=1e-6))
+
+    def test_invalid_levels(self):
+        model, ocp = get_sliding_mode_ocp_description()
+        with self.assertRaises(ValueError):
+            nosnoc.NosnocMultilevelSolver([], model, ocp)
+        opts_coarse = get_options()
+        opts_coarse.terminal_time = 1.0
+        with self.assertRaises(ValueError):
+            nosnoc.NosnocMultilevelSolver([opts_coarse, get_options()], model, ocp)
+        solver = nosnoc.NosnocMultilevelSolver([get_options()], model, ocp)
+        with self.assertRaises(NotImplementedError):
+            solver.set("u", np.zeros(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+
+import numpy as np
+import casadi as ca
+
+import nosnoc
+from nosnoc.presolve import PresolvedNlpSolver
+from nosnoc.utils import casadi_length
+from examples.simplest.simplest_example import get_default_options, get_simplest_model_sliding
+
+
+class TestPresolve(unittest.TestCase):
+
+    def test_elimination(self):
+        # x0 fixed by bounds, x1 by the affine equality x0 * x1 = 1 -> x2 from 2 x2 - x1 = 0
+        x = ca.SX.sym('x', 4)
+        f = ca.sumsqr(x) + x[3]**4
+        g = ca.vertcat(x[0] * x[1] - 1, 2 * x[2] - x[1], x[3] - x[2] * x[0], x[0]**2)
+        opts_casadi_nlp = {'print_time': 0, 'ipopt': {'print_level': 0, 'sb': 'yes'}}
+        args = dict(x0=np.zeros(4), lbg=[0, 0, -np.inf, 0], ubg=[0, 0, 10, 10],
+                    lbx=[2, -10, -10, -10], ubx=[2, 10, 10, 10], p=[])
+
+        presolver = PresolvedNlpSolver('test', x, ca.SX(0, 1), f, g, opts_casadi_nlp)
+        sol = presolver(**args)
+        report = presolver.stats()['presolve']
+        self.assertEqual(report['n_w_reduced'], 1)
+        self.assertEqual(report['n_g_reduced'], 1)
+        self.assertEqual(report['n_eliminated'], 2)
+
+        solver = ca.nlpsol('test', 'ipopt', {'x': x, 'f': f, 'g': g}, opts_casadi_nlp)
+        sol_ref = solver(**args)
+        for key in ['x', 'g', 'lam_x', 'lam_g']:
+            self.assertTrue(np.allclose(sol[key].full(), sol_ref[key].full(), atol=1e-6), key)
+
+    def check_infeasible(self, w, p_sym, g, **args):
+        opts_casadi_nlp = {'print_time': 0, 'ipopt': {'print_level': 0, 'sb': 'yes'}}
+        presolver = PresolvedNlpSolver('test', w, p_sym, ca.sumsqr(w), g, opts_casadi_nlp)
+        sol = presolver(x0=np.zeros(casadi_length(w)), lbg=np.zeros(casadi_length(g)),
+                        ubg=np.zeros(casadi_length(g)), **args)
+        self.assertTrue(presolver.stats()['presolve']['violated'])
+        self.assertFalse(nosnoc.utils.check_ipopt_success(presolver.stats()['return_status']))
+        g_val = sol['g'].full().flatten()
+        self.assertGreater(np.max(np.abs(g_val)), 1e-6)
+
+    def test_conflicting_equalities(self):
+        w = ca.SX.sym('w', 2)
+        g = ca.vertcat(w[0] - 1, w[0] - 2, w[1] - w[0])
+        self.check_infeasible(w, ca.SX(0, 1), g, lbx=-10 * np.ones(2), ubx=10 * np.ones(2), p=[])
+
+    def test_violated_fixed_row(self):
+        w = ca.SX.sym('w', 2)
+        p = ca.SX.sym('p')
+        g = ca.vertcat(w[0] + p, w[1] - 1)
+        self.check_infeasible(w, p, g, lbx=[1, -10], ubx=[1, 10], p=[0])
+
+    def test_fix_active_set(self):
+        results = []
+        for presolve in [False, True]:
+            opts = get_default_options()
+            opts.print_level = 0
+            opts.fix_active_set_fe0 = True
+            opts.presolve = presolve
+            solver = nosnoc.NosnocSolver(opts, get_simplest_model_sliding())
+            results.append(solver.solve())
+        self.assertEqual(results[1]["status"], nosnoc.Status.SUCCESS)
+        self.assertTrue(np.allclose(results[0]["w_sol"], results[1]["w_sol"], atol=1e-8))
+        self.assertLess(solver.solver.report['n_w_reduced'], solver.solver.report['n_w'])
+
+
+if __name__ == "__main__":
+    unittest.main()
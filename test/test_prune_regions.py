@@ -0,0 +1,56 @@
+import unittest
+import itertools
+
+import numpy as np
+import casadi as ca
+
+import nosnoc
+
+X0 = np.array([2.0])
+TSIM = 2.0
+
+
+def get_redundant_switching_model():
+    # switching functions x and x - 1, the region x < 0, x > 1 is empty.
+    # dx/dt = -0.75 for x > 1 and 0.25 for 0 < x < 1, sliding mode on x = 1
+    x = ca.SX.sym('x', 1)
+    c = [ca.vertcat(x, x - 1)]
+    S = np.array(list(itertools.product([1, -1], repeat=2)), dtype=float)
+    F = [np.array([-0.5 * S[:, 0] - 0.5 * S[:, 1] + 0.25])]
+    return nosnoc.NosnocModel(x=x, F=F, c=c, S=[S], x0=X0)
+
+
+class TestPruneRegions(unittest.TestCase):
+
+    def test_empty_regions(self):
+        model = get_redundant_switching_model()
+        self.assertEqual(model.prune_empty_regions(), [[2]])
+        self.assertEqual(model.S[0].shape, (3, 2))
+        self.assertEqual(model.F[0].shape, (1, 3))
+
+        # x <= 0.5 leaves only x < 0 and 0 < x < 1
+        model = get_redundant_switching_model()
+        self.assertEqual(model.prune_empty_regions(ubx=np.array([0.5])), [[0, 2]])
+
+    def test_pruned_simulation(self):
+        x_end = dict()
+        n_w = dict()
+        for prune in [False, True]:
+            opts = nosnoc.NosnocOpts()
+            opts.pss_mode = nosnoc.PssMode.STEWART
+            opts.prune_empty_regions = prune
+            opts.N_finite_elements = 3
+            opts.n_s = 2
+            opts.terminal_time = TSIM
+            opts.comp_tol = 1e-7
+            opts.print_level = 0
+            solver = nosnoc.NosnocSolver(opts, get_redundant_switching_model())
+            x_end[prune] = solver.solve()["x_traj"][-1]
+            n_w[prune] = len(solver.problem.w0)
+        self.assertLess(n_w[True], n_w[False])
+        self.assertTrue(np.allclose(x_end[True], 1.0, atol=1e-4))
+        self.assertTrue(np.allclose(x_end[True], x_end[False], atol=1e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+import casadi as ca
+
+import nosnoc
+
+X0 = np.array([0.3, -0.2, 0.8])
+TSIM = 1.0
+X_END = np.array([0.0, 0.0, 0.3])
+
+
+def get_template_model(general_inclusion=False):
+    # dx/dt = -sign(x) + 0.5, sliding mode on x = 0
+    x = ca.SX.sym('x')
+    if general_inclusion:
+        alpha = ca.SX.sym('alpha')
+        f_x = [alpha * -0.5 + (1 - alpha) * 1.5]
+        return nosnoc.NosnocModel(x=x, f_x=f_x, alpha=[alpha], c=[x], x0=np.array([0.0]))
+    F = [ca.DM([[-0.5, 1.5]])]
+    S = [np.array([[1.0], [-1.0]])]
+    return nosnoc.NosnocModel(x=x, F=F, c=[x], S=S, x0=np.array([0.0]))
+
+
+def get_default_options(pss_mode):
+    opts = nosnoc.NosnocOpts()
+    opts.pss_mode = pss_mode
+    opts.N_finite_elements = 3
+    opts.n_s = 2
+    opts.terminal_time = TSIM
+    opts.comp_tol = 1e-6
+    opts.print_level = 0
+    return opts
+
+
+class TestReplicatedModel(unittest.TestCase):
+
+    def test_replicated_simulation(self):
+        for pss_mode, general_inclusion in [(nosnoc.PssMode.STEWART, False), (nosnoc.PssMode.STEP, False),
+                                            (nosnoc.PssMode.STEP, True)]:
+            model = nosnoc.create_replicated_model(get_template_model(general_inclusion), 3, x0=X0)
+            solver = nosnoc.NosnocSolver(get_default_options(pss_mode), model)
+            self.assertEqual(model.dims.n_sys, 3)
+            x_end = solver.solve()["x_traj"][-1]
+            self.assertTrue(np.allclose(x_end, X_END, atol=1e-4), f"{pss_mode}, {general_inclusion}: {x_end}")
+
+    def test_coupling(self):
+        # compare against the same model with explicitly written subsystems
+        def f_coupling(X, U):
+            return 0.2 * ca.repmat(ca.sum2(X) / 3, 1, 3) - 0.2 * X
+
+        model = nosnoc.create_replicated_model(get_template_model(), 3, x0=X0, f_coupling=f_coupling)
+
+        x = ca.SX.sym('x', 3)
+        F = [ca.SX.zeros(3, 2) for _ in range(3)]
+        for i in range(3):
+            F[i][i, :] = ca.DM([[-0.5, 1.5]])
+        F[0] += ca.repmat(0.2 * ca.sum1(x) / 3 - 0.2 * x, 1, 2)
+        model_ref = nosnoc.NosnocModel(x=x, F=F, c=[x[i] for i in range(3)], S=3 * [np.array([[1.0], [-1.0]])], x0=X0)
+
+        x_end = []
+        for m in [model, model_ref]:
+            solver = nosnoc.NosnocSolver(get_default_options(nosnoc.PssMode.STEWART), m)
+            x_end.append(solver.solve()["x_traj"][-1])
+        self.assertTrue(np.allclose(x_end[0], x_end[1], atol=1e-6))
+
+
+if __name__ == "__main__":
+    unittest.main()
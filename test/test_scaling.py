@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options,
+    TERMINAL_TIME,
+    X0,
+    X_TARGET,
+)
+
+
+def solve_sliding_mode_ocp(automatic_scaling: bool):
+    opts = get_default_options()
+    opts.terminal_time = TERMINAL_TIME
+    opts.automatic_scaling = automatic_scaling
+    opts.print_level = 0
+    model, ocp = get_sliding_mode_ocp_description()
+    solver = nosnoc.NosnocSolver(opts, model, ocp)
+    return solver, solver.solve()
+
+
+class TestAutomaticScaling(unittest.TestCase):
+
+    def test_scaling_factors(self):
+        opts = get_default_options()
+        opts.terminal_time = TERMINAL_TIME
+        model, ocp = get_sliding_mode_ocp_description()
+        solver = nosnoc.NosnocSolver(opts, model, ocp)
+        prob = solver.problem
+        solver.compute_lambda00()
+        solver.setup_p_val(opts.sigma_0, opts.sigma_0)
+        w_scale, g_scale = prob.compute_scaling(solver.p_val, solver.lambda00)
+
+        self.assertEqual(len(w_scale), len(prob.w0))
+        self.assertEqual(len(g_scale), len(prob.lbg))
+        self.assertTrue(np.all(w_scale > 0.0))
+        self.assertTrue(np.all(g_scale >= 1.0))
+        # same component of x shares one factor on all finite elements
+        ind_x = np.array(nosnoc.utils.flatten(prob.ind_x)).reshape(-1, model.dims.n_x)
+        for i in range(model.dims.n_x):
+            self.assertTrue(np.all(w_scale[ind_x[:, i]] == w_scale[ind_x[0, i]]))
+
+    def test_sliding_mode_ocp(self):
+        _, results_ref = solve_sliding_mode_ocp(False)
+        solver, results = solve_sliding_mode_ocp(True)
+
+        self.assertIsInstance(solver.solver, nosnoc.solver.ScaledNlpSolver)
+        self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+        self.assertTrue(np.allclose(results["x_traj"][0], X0, atol=1e-4))
+        self.assertTrue(np.allclose(results["x_traj"][-1][:2], X_TARGET, atol=1e-4))
+        self.assertAlmostEqual(results["cost_val"], results_ref["cost_val"], places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
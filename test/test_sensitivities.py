@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+from casadi import SX, horzcat
+import nosnoc
+
+X0 = np.array([1.0])
+P_GLOBAL = np.array([0.0])
+DELTA = 1e-3
+
+
+def get_solver(x0=X0, p_global=P_GLOBAL):
+    x = SX.sym('x')
+    u = SX.sym('u')
+    p = SX.sym('p')
+    F = [horzcat(3 + u + p, -1 + u + p)]
+    model = nosnoc.NosnocModel(x=x, F=F, c=[x], S=[np.array([[-1], [1]])], x0=x0, u=u,
+                               p_global=p, p_global_val=p_global)
+    ocp = nosnoc.NosnocOcp(lbu=-2 * np.ones(1), ubu=2 * np.ones(1), f_q=x**2 + 0.1 * u**2,
+                           f_terminal=10 * x**2)
+    opts = nosnoc.NosnocOpts()
+    opts.N_stages = 4
+    opts.N_finite_elements = 2
+    opts.terminal_time = 0.4
+    opts.comp_tol = 1e-6
+    opts.print_level = 0
+    opts.do_polishing_step = True
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+class TestSensitivities(unittest.TestCase):
+
+    def check_prediction(self, solver, results, results_new, **kwargs):
+        prediction = solver.predict(**kwargs)
+        error_prediction = np.max(np.abs(prediction["w_sol"] - results_new["w_sol"]))
+        change = np.max(np.abs(results["w_sol"] - results_new["w_sol"]))
+        self.assertLess(error_prediction, 1e-2 * change)
+        cost_new = solver.problem.cost_fun(results_new["w_sol"], solver.p_val).full()[0][0]
+        self.assertAlmostEqual(prediction["cost_val"], cost_new, delta=1e-2 * abs(cost_new - solver.cost_val_opt))
+
+    def test_x0(self):
+        solver = get_solver()
+        results = solver.solve()
+        solver_new = get_solver(x0=X0 + DELTA)
+        results_new = solver_new.solve()
+        self.check_prediction(solver, results, results_new, x0_new=X0 + DELTA)
+
+    def test_x0_after_set(self):
+        # the prediction is relative to the parameters of the last solution, not the stored ones
+        solver = get_solver()
+        results = solver.solve()
+        prediction_ref = solver.predict(x0_new=X0 + DELTA)
+        solver.set("x0", X0 + DELTA)
+        prediction = solver.predict(x0_new=X0 + DELTA)
+        self.assertTrue(np.allclose(prediction["w_sol"], prediction_ref["w_sol"]))
+        self.assertFalse(np.allclose(prediction["w_sol"], results["w_sol"]))
+
+    def test_p_global(self):
+        solver = get_solver()
+        results = solver.solve()
+        solver_new = get_solver(p_global=P_GLOBAL + DELTA)
+        results_new = solver_new.solve()
+        self.check_prediction(solver, results, results_new, p_global_new=P_GLOBAL + DELTA)
+
+    def test_sensitivity_shapes(self):
+        solver = get_solver()
+        with self.assertRaises(Exception):
+            solver.compute_sensitivities()
+        solver.solve()
+        sens = solver.compute_sensitivities()
+        n_w = solver.problem.w.shape[0]
+        self.assertEqual(sens["dw_dx0"].shape, (n_w, 1))
+        self.assertEqual(sens["dw_dp_global"].shape, (n_w, 1))
+        self.assertEqual(sens["dw_dp_time_var"].shape, (n_w, 0))
+        self.assertEqual(sens["dcost_dx0"].shape, (1,))
+
+
+if __name__ == "__main__":
+    unittest.main()
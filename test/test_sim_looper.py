@@ -0,0 +1,140 @@
+import unittest
+import tempfile
+import numpy as np
+import nosnoc
+from examples.simplest.simplest_example import (
+    get_default_options,
+    get_simplest_model_switch,
+    X0,
+    TSIM,
+)
+
+NSIM = 3
+
+
+def get_looper(**kwargs):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.terminal_time = TSIM / NSIM
+    opts.initialization_strategy = nosnoc.InitializationStrategy.ALL_XCURRENT_WOPT_PREV
+    model = get_simplest_model_switch()
+    solver = nosnoc.NosnocSolver(opts, model)
+    return nosnoc.NosnocSimLooper(solver, X0, NSIM, **kwargs)
+
+
+class TestSimLooper(unittest.TestCase):
+
+    def test_iter_steps(self):
+        looper = get_looper()
+        looper.run()
+        results = looper.get_results()
+
+        streamed = get_looper()
+        x_list = [X0]
+        time_steps = []
+        switch_times = []
+        for step in streamed.iter_steps():
+            x_list += step["x_list"]
+            time_steps += list(step["time_steps"])
+            switch_times += step["switch_times"].tolist()
+
+        self.assertTrue(np.allclose(np.array(x_list), results["X_sim"]))
+        self.assertTrue(np.allclose(time_steps, results["time_steps"]))
+        self.assertTrue(np.allclose(switch_times, results["switch_times"]))
+        # nothing is accumulated when streaming
+        self.assertEqual(len(streamed.X_sim), 1)
+        self.assertEqual(len(streamed.w_sim), 0)
+
+    def test_iter_steps_early_stop(self):
+        looper = get_looper()
+        for step in looper.iter_steps():
+            if step["sim_step"] == 0:
+                break
+        self.assertEqual(looper.sim_step, 1)
+        remaining = [step["sim_step"] for step in looper.iter_steps()]
+        self.assertEqual(remaining, list(range(1, NSIM)))
+
+    def test_checkpoint_resume(self):
+        looper = get_looper()
+        looper.run()
+        results = looper.get_results()
+
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            # streaming does not write checkpoints
+            streamed = get_looper(checkpoint_dir=checkpoint_dir)
+            for step in streamed.iter_steps():
+                pass
+            self.assertFalse(streamed.load_checkpoint())
+
+            # simulation interrupted while solving the second step
+            interrupted = get_looper(checkpoint_dir=checkpoint_dir)
+            solve = interrupted.solver.solve
+
+            def interrupted_solve():
+                if interrupted.sim_step == 1:
+                    raise KeyboardInterrupt
+                return solve()
+
+            interrupted.solver.solve = interrupted_solve
+            with self.assertRaises(KeyboardInterrupt):
+                interrupted.run()
+
+            resumed = get_looper(checkpoint_dir=checkpoint_dir)
+            self.assertTrue(resumed.load_checkpoint())
+            self.assertEqual(resumed.sim_step, 1)
+            resumed.run()
+            results_resumed = resumed.get_results()
+
+        self.assertTrue(np.array_equal(results["X_sim"], results_resumed["X_sim"]))
+        self.assertTrue(np.array_equal(results["t_grid"], results_resumed["t_grid"]))
+        self.assertEqual(len(results_resumed["w_sim"]), NSIM)
+        self.assertEqual(len(results_resumed["w_all"]), NSIM)
+
+    def test_checkpoint_incomplete_record(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            looper = get_looper(checkpoint_dir=checkpoint_dir)
+            looper.run()
+            # interruption while appending a record
+            with open(looper.checkpoint_file, "ab") as f:
+                f.write(b"\x80\x04\x95")
+
+            resumed = get_looper(checkpoint_dir=checkpoint_dir)
+            self.assertTrue(resumed.load_checkpoint())
+            self.assertEqual(resumed.sim_step, NSIM)
+            self.assertTrue(np.array_equal(looper.get_results()["X_sim"], resumed.get_results()["X_sim"]))
+
+    def test_checkpoint_stop_on_failure(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            looper = get_looper(checkpoint_dir=checkpoint_dir, checkpoint_every=NSIM)
+            solve = looper.solver.solve
+
+            def failing_solve():
+                results = solve()
+                if looper.sim_step == 1:
+                    results["status"] = nosnoc.Status.INFEASIBLE
+                return results
+
+            looper.solver.solve = failing_solve
+            self.assertFalse(looper.run(stop_on_failure=True))
+
+            resumed = get_looper(checkpoint_dir=checkpoint_dir)
+            self.assertTrue(resumed.load_checkpoint())
+            self.assertEqual(resumed.sim_step, 2)
+            self.assertEqual(resumed.status[-1], nosnoc.Status.INFEASIBLE)
+
+    def test_checkpoint_other_problem(self):
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            get_looper(checkpoint_dir=checkpoint_dir).run()
+
+            opts = get_default_options()
+            opts.print_level = 0
+            opts.terminal_time = TSIM / NSIM
+            opts.n_s = 3
+            solver = nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+            other = nosnoc.NosnocSimLooper(solver, X0, NSIM, checkpoint_dir=checkpoint_dir)
+            with self.assertRaises(ValueError):
+                other.load_checkpoint()
+
+
+if __name__ == "__main__":
+    unittest.main()
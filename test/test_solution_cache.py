@@ -0,0 +1,111 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import nosnoc
+from examples.simplest.simplest_example import get_default_options, get_simplest_model_switch, X0
+
+
+def get_solver(**cache_opts):
+    opts = get_default_options()
+    opts.print_level = 0
+    opts.use_solution_cache = True
+    for key, value in cache_opts.items():
+        setattr(opts, key, value)
+    return nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        solver = get_solver()
+        results = solver.solve()
+        results_cached = solver.solve()
+        self.assertTrue(np.array_equal(results["w_sol"], results_cached["w_sol"]))
+        solver.set("x0", X0 + 0.1)
+        results_other = solver.solve()
+        self.assertFalse(np.allclose(results["w_sol"], results_other["w_sol"]))
+        stats = solver.solution_cache.get_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["n_entries"], 2)
+
+    def test_quantization(self):
+        solver = get_solver(solution_cache_tol=1e-6)
+        solver.solve()
+        solver.set("x0", X0 + 1e-9)
+        solver.solve()
+        self.assertEqual(solver.solution_cache.hits, 1)
+
+    def test_lru_eviction(self):
+        solver = get_solver(solution_cache_max_entries=2)
+        for x0 in [X0, X0 + 0.1, X0]:
+            solver.set("x0", x0)
+            solver.solve()
+        # X0 is most recently used, X0 + 0.2 should evict X0 + 0.1
+        solver.set("x0", X0 + 0.2)
+        solver.solve()
+        stats = solver.solution_cache.get_stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["n_entries"], 2)
+        solver.set("x0", X0)
+        solver.solve()
+        self.assertEqual(solver.solution_cache.hits, 2)
+
+        # byte limit
+        solver = get_solver(solution_cache_max_bytes=1)
+        solver.solve()
+        self.assertEqual(len(solver.solution_cache), 0)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "cache.pickle")
+            solver = get_solver(solution_cache_file=file)
+            results = solver.solve()
+            self.assertTrue(os.path.exists(file))
+
+            solver_new = get_solver(solution_cache_file=file)
+            self.assertEqual(len(solver_new.solution_cache), 1)
+            results_cached = solver_new.solve()
+            self.assertEqual(solver_new.solution_cache.hits, 1)
+            self.assertTrue(np.array_equal(results["w_sol"], results_cached["w_sol"]))
+
+            # solutions computed with other tolerances are not reused
+            solver_tight = get_solver(solution_cache_file=file, comp_tol=1e-11)
+            self.assertEqual(len(solver_tight.solution_cache), 0)
+            solver_tight.solve()
+            self.assertEqual(solver_tight.solution_cache.hits, 0)
+
+    def test_save_interval(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "cache.pickle")
+            solver = get_solver(solution_cache_file=file, solution_cache_save_interval=1e3)
+            for x0 in [X0, X0 + 0.1]:
+                solver.set("x0", x0)
+                solver.solve()
+            # only the first entry is written within the save interval
+            self.assertEqual(len(get_solver(solution_cache_file=file).solution_cache), 1)
+            solver.solution_cache.flush()
+            self.assertEqual(len(get_solver(solution_cache_file=file).solution_cache), 2)
+
+    def test_autotune_invalidates(self):
+        solver = get_solver()
+        solver.solve()
+        nosnoc.autotune_linear_solver(solver, [{'linear_solver': 'mumps', 'mu_strategy': 'monotone'}])
+        # solutions computed with other IPOPT options are not reused
+        self.assertEqual(len(solver.solution_cache), 0)
+        solver.solve()
+        self.assertEqual(solver.solution_cache.hits, 0)
+        solver.solve()
+        self.assertEqual(solver.solution_cache.hits, 1)
+
+    def test_key_keeps_p_val(self):
+        solver = get_solver()
+        solver.solve()
+        p_val = solver.p_val.copy()
+        solver._get_solution_cache_key()
+        self.assertTrue(np.array_equal(solver.p_val, p_val))
+
+
+if __name__ == "__main__":
+    unittest.main()
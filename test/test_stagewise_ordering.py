@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+import casadi as ca
+
+import nosnoc
+from examples.sliding_mode_ocp.sliding_mode_ocp import (
+    get_sliding_mode_ocp_description,
+    get_default_options,
+    TERMINAL_TIME,
+)
+
+
+def get_solver(stagewise_ordering: bool):
+    opts = get_default_options()
+    opts.terminal_time = TERMINAL_TIME
+    opts.stagewise_ordering = stagewise_ordering
+    opts.print_level = 0
+    model, ocp = get_sliding_mode_ocp_description()
+    return nosnoc.NosnocSolver(opts, model, ocp)
+
+
+class TestStagewiseOrdering(unittest.TestCase):
+
+    def test_stage_structure(self):
+        prob = get_solver(True).problem
+        N_stages = prob.opts.N_stages
+        bw = prob.stage_boundaries_w
+        bg = prob.stage_boundaries_g
+        self.assertEqual(len(bw), N_stages + 1)
+        self.assertEqual(len(bg), N_stages + 1)
+        for k in range(N_stages):
+            self.assertEqual(sorted(prob.get_stage_indices(k)), list(range(bw[k], bw[k + 1])))
+
+        # constraints of stage k only depend on global variables and the ones of stages k-1 and k
+        rows, cols = ca.jacobian_sparsity(prob.g, prob.w).get_triplet()
+        stage_w = np.searchsorted(bw, cols, side='right') - 1
+        stage_g = np.searchsorted(bg, rows, side='right') - 1
+        stage_w_ind = stage_w >= 0
+        self.assertTrue(np.all(stage_w[stage_w_ind] <= stage_g[stage_w_ind]))
+        self.assertTrue(np.all(stage_w[stage_w_ind] >= stage_g[stage_w_ind] - 1))
+
+    def test_same_solution(self):
+        results_ref = get_solver(False).solve()
+        results = get_solver(True).solve()
+        self.assertEqual(results["status"], nosnoc.Status.SUCCESS)
+        self.assertAlmostEqual(results["cost_val"], results_ref["cost_val"], places=5)
+        self.assertTrue(np.allclose(results["x_traj"], results_ref["x_traj"], atol=1e-5))
+        self.assertTrue(np.allclose(results["u_traj"], results_ref["u_traj"], atol=1e-5))
+
+
+if __name__ == "__main__":
+    unittest.main()
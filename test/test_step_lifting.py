@@ -0,0 +1,68 @@
+import unittest
+import itertools
+
+import numpy as np
+import scipy.sparse as sp
+import casadi as ca
+
+import nosnoc
+from nosnoc.utils import flatten
+
+X0 = np.array([0.3, -0.2, 0.8])
+TSIM = 1.0
+
+
+def get_sign_model(sparse_S=False):
+    # dx_i/dt = -sign(x_i) + 0.5, sliding mode on x_i = 0
+    x = ca.SX.sym('x', 3)
+    S = np.array(list(itertools.product([1, -1], repeat=3)), dtype=float)
+    F = -S.T + 0.5
+    if sparse_S:
+        S = sp.csr_matrix(S)
+    return nosnoc.NosnocModel(x=x, F=[F], c=[x], S=[S], x0=X0)
+
+
+def get_default_options():
+    opts = nosnoc.NosnocOpts()
+    opts.pss_mode = nosnoc.PssMode.STEP
+    opts.N_finite_elements = 3
+    opts.n_s = 2
+    opts.terminal_time = TSIM
+    opts.comp_tol = 1e-6
+    opts.print_level = 0
+    return opts
+
+
+class TestStepLifting(unittest.TestCase):
+
+    def solve(self, n_depth, sparse_S=False):
+        opts = get_default_options()
+        opts.n_depth_step_lifting = n_depth
+        solver = nosnoc.NosnocSolver(opts, get_sign_model(sparse_S))
+        return solver, solver.solve()
+
+    def test_lifted_solution(self):
+        x_end_expected = np.array([0.0, 0.0, 0.3])
+        _, results_ref = self.solve(0)
+        self.assertTrue(np.allclose(results_ref["x_traj"][-1], x_end_expected, atol=1e-4))
+
+        for n_depth, sparse_S in [(0, True), (2, False), (2, True), (3, False)]:
+            solver, results = self.solve(n_depth, sparse_S)
+            if n_depth == 2:
+                self.assertGreater(solver.model.dims.n_beta, 0)
+                self.assertEqual(len(flatten(solver.problem.ind_beta)),
+                                 solver.model.dims.n_beta * 3 * 2)
+            else:
+                self.assertEqual(solver.model.dims.n_beta, 0)
+            self.assertTrue(np.allclose(results["x_traj"][-1], results_ref["x_traj"][-1], atol=1e-4),
+                            f"n_depth {n_depth}, sparse S {sparse_S}")
+
+    def test_invalid_depth(self):
+        opts = get_default_options()
+        opts.n_depth_step_lifting = 1
+        with self.assertRaises(ValueError):
+            nosnoc.NosnocSolver(opts, get_sign_model())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import itertools
+
+import numpy as np
+import casadi as ca
+
+import nosnoc
+
+X0 = np.array([0.3, -0.2, 0.8])
+TSIM = 1.0
+
+
+def get_coupled_sign_model():
+    # dx_0/dt and dx_1/dt depend on sign(x_0) and sign(x_1), dx_2/dt = -sign(x_2) + 0.5
+    x = ca.SX.sym('x', 3)
+    S = np.array(list(itertools.product([1, -1], repeat=3)), dtype=float)
+    F = ca.SX(-S.T + 0.5)
+    F[0, :] = F[0, :] - 0.25 * ca.DM(S[:, 1]).T
+    return nosnoc.NosnocModel(x=x, F=[F], c=[x], S=[S], x0=X0)
+
+
+class TestSubsystemDecomposition(unittest.TestCase):
+
+    def test_decomposition(self):
+        model = get_coupled_sign_model()
+        report = model.decompose_subsystems()
+        self.assertEqual(report['n_sys'], (1, 2))
+        self.assertEqual(report['n_f'], (8, 6))
+        self.assertEqual(len(model.F), 2)
+        self.assertEqual(model.S[0].shape, (4, 2))
+        self.assertEqual(model.S[1].shape, (2, 1))
+
+        # decomposing again does not change anything
+        report = model.decompose_subsystems()
+        self.assertEqual(report['n_sys'], (2, 2))
+
+    def test_decomposed_simulation(self):
+        x_end = {}
+        for pss_mode in nosnoc.PssMode:
+            for decompose in [False, True]:
+                opts = nosnoc.NosnocOpts()
+                opts.pss_mode = pss_mode
+                opts.decompose_subsystems = decompose
+                opts.N_finite_elements = 3
+                opts.n_s = 2
+                opts.terminal_time = TSIM
+                opts.comp_tol = 1e-6
+                opts.print_level = 0
+                model = get_coupled_sign_model()
+                solver = nosnoc.NosnocSolver(opts, model)
+                self.assertEqual(model.dims.n_sys, 2 if decompose else 1)
+                x_end[pss_mode, decompose] = solver.solve()["x_traj"][-1]
+            self.assertTrue(np.allclose(x_end[pss_mode, True], x_end[pss_mode, False], atol=1e-4),
+                            f"pss_mode {pss_mode}: {x_end}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import nosnoc
+from nosnoc.warm_start_db import NosnocWarmStartDatabase
+from examples.simplest.simplest_example import get_default_options, get_simplest_model_switch, X0
+
+
+def add_entry(db, feature, value):
+    db.add(np.array([feature]), value * np.ones(2), np.zeros(2), np.zeros(1))
+
+
+class TestWarmStartDatabase(unittest.TestCase):
+
+    def test_query(self):
+        db = NosnocWarmStartDatabase(max_size=3, k=2)
+        self.assertIsNone(db.query(np.zeros(1)))
+        add_entry(db, 0.0, 0.0)
+        add_entry(db, 1.0, 3.0)
+        add_entry(db, 5.0, 10.0)
+        # exact match
+        self.assertTrue(np.allclose(db.query(np.array([1.0]))["w"], 3.0))
+        # inverse distance blend of the two nearest
+        blended = db.query(np.array([0.25]))
+        self.assertTrue(np.allclose(blended["w"], (4 * 0.0 + 4 / 3 * 3.0) / (4 + 4 / 3)))
+        self.assertAlmostEqual(blended["distance"], 0.25)
+        # oldest entry is evicted
+        add_entry(db, 6.0, 12.0)
+        self.assertEqual(len(db), 3)
+        self.assertAlmostEqual(db.query(np.array([0.0]))["distance"], 1.0)
+
+    def test_solver(self):
+        opts = get_default_options()
+        opts.print_level = 0
+        opts.initialization_strategy = nosnoc.InitializationStrategy.WARM_START_DATABASE
+        solver = nosnoc.NosnocSolver(opts, get_simplest_model_switch())
+        results = solver.solve()
+        self.assertEqual(len(solver.warm_start_db), 1)
+        solver.set("x0", X0 + 1e-3)
+        results_warm = solver.solve()
+        self.assertEqual(len(solver.warm_start_db), 2)
+        self.assertLessEqual(sum(results_warm["nlp_iter"][:1]), sum(results["nlp_iter"][:1]))
+
+
+if __name__ == "__main__":
+    unittest.main()